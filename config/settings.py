@@ -23,6 +23,9 @@ SUPABASE_KEY = get_secret("SUPABASE_KEY", "your-supabase-anon-key")
 
 # OpenAI
 OPENAI_API_KEY = get_secret("OPENAI_API_KEY", "sk-your-openai-api-key")
+# LLM 백엔드: mock(개발용 목업) | openai | stub(scripts/llm_stub_server.py 로컬 스텁)
+LLM_BACKEND = get_secret("LLM_BACKEND", "mock")
+LLM_BASE_URL = get_secret("LLM_BASE_URL", "")  # 비우면 기본 주소 (stub은 http://127.0.0.1:8765/v1)
 
 # Stripe
 STRIPE_API_KEY = get_secret("STRIPE_API_KEY", "sk_test_your-stripe-key")
@@ -30,6 +33,83 @@ STRIPE_PRICE_ID = get_secret("STRIPE_PRICE_ID", "price_your-price-id")
 STRIPE_SUCCESS_URL = get_secret("STRIPE_SUCCESS_URL", "https://your-app.streamlit.app/?payment=success")
 STRIPE_CANCEL_URL = get_secret("STRIPE_CANCEL_URL", "https://your-app.streamlit.app/?payment=cancel")
 
+# =============================================================================
+# ⚡ 성능 설정
+# =============================================================================
+
+# 패키지 생성 시 문서를 병렬로 렌더링할 워커 수 (1이면 순차 처리)
+DOCUMENT_RENDER_WORKERS = int(get_secret("DOCUMENT_RENDER_WORKERS", "4"))
+
+# 템플릿 구조 인덱스 저장 위치 (프로세스 재시작 후에도 재사용)
+TEMPLATE_INDEX_DIR = get_secret("TEMPLATE_INDEX_DIR", ".cache/template_index")
+
+# 생성된 ZIP 패키지 저장소 (세션에는 핸들만 보관)
+PACKAGE_STORE_DIR = get_secret("PACKAGE_STORE_DIR", ".cache/packages")
+PACKAGE_STORE_MAX_BYTES = int(get_secret("PACKAGE_STORE_MAX_BYTES", str(512 * 1024 * 1024)))
+
+# 패키지 생성 백그라운드 작업 (상태는 SQLite에 저장, 렌더링 프로세스 0이면 작업 스레드에서 렌더링)
+JOB_STORE_PATH = get_secret("JOB_STORE_PATH", ".cache/jobs.sqlite3")
+JOB_WORKERS = int(get_secret("JOB_WORKERS", "4"))  # 동시에 실행할 작업 수
+JOB_RENDER_PROCESSES = int(get_secret("JOB_RENDER_PROCESSES", "2"))
+# 실행 중인 작업은 소유 프로세스가 주기적으로 heartbeat를 남기며, JOB_STALE_SECONDS 동안
+# 갱신이 없는 작업만 중단된 것으로 보고 실패 처리 (다른 레플리카/워커의 작업은 건드리지 않음)
+JOB_HEARTBEAT_SECONDS = float(get_secret("JOB_HEARTBEAT_SECONDS", "10"))
+JOB_STALE_SECONDS = float(get_secret("JOB_STALE_SECONDS", "60"))
+
+# 생성 문서 렌더링 캐시 최대 용량 (0이면 비활성화)
+RENDER_CACHE_MAX_BYTES = int(get_secret("RENDER_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# RAG 임베딩 저장소 (python -m rag_data.knowledge_base 로 빌드)
+RAG_STORE_DIR = get_secret("RAG_STORE_DIR", "rag_data/store")
+
+# AI 응답 캐시 (자주 묻는 질문은 LLM 호출 없이 응답)
+RESPONSE_CACHE_MAX_ENTRIES = int(get_secret("RESPONSE_CACHE_MAX_ENTRIES", "512"))
+RESPONSE_CACHE_TTL_SECONDS = float(get_secret("RESPONSE_CACHE_TTL_SECONDS", "3600"))
+RESPONSE_CACHE_SIMILARITY = float(get_secret("RESPONSE_CACHE_SIMILARITY", "0"))  # 0이면 정확히 일치할 때만 (유사 매칭은 비자 코드/숫자가 같을 때만)
+
+# LLM 클라이언트 커넥션 풀 (프로세스 전역, 모든 세션 공유)
+LLM_MAX_CONNECTIONS = int(get_secret("LLM_MAX_CONNECTIONS", "20"))
+LLM_MAX_KEEPALIVE_CONNECTIONS = int(get_secret("LLM_MAX_KEEPALIVE_CONNECTIONS", "10"))
+LLM_KEEPALIVE_EXPIRY = float(get_secret("LLM_KEEPALIVE_EXPIRY", "30"))
+LLM_CONNECT_TIMEOUT = float(get_secret("LLM_CONNECT_TIMEOUT", "5"))
+LLM_READ_TIMEOUT = float(get_secret("LLM_READ_TIMEOUT", "60"))
+LLM_MAX_CONCURRENCY = int(get_secret("LLM_MAX_CONCURRENCY", "16"))  # 동시 LLM 요청 상한
+
+# LLM 요청 스케줄러 (프로세스 전역 분당 요청/토큰 한도, 0이면 제한 없음)
+LLM_RATE_LIMIT_RPM = int(get_secret("LLM_RATE_LIMIT_RPM", "500"))
+LLM_RATE_LIMIT_TPM = int(get_secret("LLM_RATE_LIMIT_TPM", "30000"))
+LLM_QUEUE_TIMEOUT = float(get_secret("LLM_QUEUE_TIMEOUT", "120"))  # 대기열 최대 대기 시간 (초, 0이면 대기 없이 실패)
+LLM_PRIORITY_AGING_SECONDS = float(get_secret("LLM_PRIORITY_AGING_SECONDS", "30"))  # 무료 요청 기아 방지
+
+# LLM 모델 라우팅 (FAQ 채팅/검증/요약은 mini, 사연 생성/긴 대화는 full)
+LLM_MODEL_FULL = get_secret("LLM_MODEL_FULL", "gpt-4o")
+LLM_MODEL_MINI = get_secret("LLM_MODEL_MINI", "gpt-4o-mini")
+LLM_COMPLEX_CHAT_TOKENS = int(get_secret("LLM_COMPLEX_CHAT_TOKENS", "2000"))  # 초과 시 full 모델
+
+# 호출 유형별 마감 시간 (초, 대기열 대기 포함, 스트리밍은 첫 토큰까지). 초과 시 로컬 응답으로 대체
+LLM_DEADLINE_CHAT = float(get_secret("LLM_DEADLINE_CHAT", "20"))
+LLM_DEADLINE_VALIDATION = float(get_secret("LLM_DEADLINE_VALIDATION", "20"))
+LLM_DEADLINE_SUMMARY = float(get_secret("LLM_DEADLINE_SUMMARY", "10"))
+LLM_DEADLINE_NARRATIVE = float(get_secret("LLM_DEADLINE_NARRATIVE", "40"))
+
+# 모델별 서킷 브레이커 (연속 실패 시 일정 시간 로컬 응답 사용)
+LLM_BREAKER_FAILURES = int(get_secret("LLM_BREAKER_FAILURES", "3"))
+LLM_BREAKER_COOLDOWN = float(get_secret("LLM_BREAKER_COOLDOWN", "30"))
+
+# 사연 일괄 생성/검증 (사용자 1명의 패키지 준비 시 동시 호출 수, 호출당 제한 시간)
+NARRATIVE_MAX_CONCURRENCY = int(get_secret("NARRATIVE_MAX_CONCURRENCY", "4"))
+NARRATIVE_CALL_TIMEOUT = float(get_secret("NARRATIVE_CALL_TIMEOUT", "45"))
+
+# 사연 초안 선행 생성 (Phase 1 입력이 채워지면 인터뷰 중 백그라운드 생성, 0이면 비활성화)
+NARRATIVE_PREFETCH_WORKERS = int(get_secret("NARRATIVE_PREFETCH_WORKERS", "2"))
+NARRATIVE_PREFETCH_MAX_ENTRIES = int(get_secret("NARRATIVE_PREFETCH_MAX_ENTRIES", "256"))
+NARRATIVE_PREFETCH_TTL_SECONDS = float(get_secret("NARRATIVE_PREFETCH_TTL_SECONDS", "1800"))
+
+# 대화 메모리 (요약 + 최근 대화를 토큰 예산 안에서 전송)
+CHAT_MEMORY_TOKEN_BUDGET = int(get_secret("CHAT_MEMORY_TOKEN_BUDGET", "1200"))
+CHAT_MEMORY_SUMMARY_EVERY = int(get_secret("CHAT_MEMORY_SUMMARY_EVERY", "4"))  # 턴 단위
+CHAT_MEMORY_SUMMARY_TOKENS = int(get_secret("CHAT_MEMORY_SUMMARY_TOKENS", "300"))
+
 # =============================================================================
 # 📊 시나리오 설정
 # =============================================================================
@@ -426,6 +506,7 @@ def init_session_state():
         'ai_feedback': {},
         'chat_history': [],
         'generated_documents': [],
+        'package_job': None,
     }
     
     for key, default_value in defaults.items():
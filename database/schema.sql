@@ -124,6 +124,7 @@ CREATE TABLE IF NOT EXISTS generated_documents (
     -- Storage reference (Supabase Storage)
     storage_path TEXT,
     file_size INTEGER,
+    content_hash CHAR(64), -- 패키지 콘텐츠 해시 (MANIFEST 제외, 같은 값이면 storage_path 공유)
     
     download_count INTEGER DEFAULT 0,
     
@@ -195,6 +196,7 @@ CREATE INDEX IF NOT EXISTS idx_payments_user_id ON payments(user_id);
 CREATE INDEX IF NOT EXISTS idx_submissions_user_id ON scenario_submissions(user_id);
 CREATE INDEX IF NOT EXISTS idx_submissions_scenario ON scenario_submissions(scenario_id);
 CREATE INDEX IF NOT EXISTS idx_documents_user_id ON generated_documents(user_id);
+CREATE INDEX IF NOT EXISTS idx_documents_content_hash ON generated_documents(content_hash);
 CREATE INDEX IF NOT EXISTS idx_chat_user_id ON chat_history(user_id);
 CREATE INDEX IF NOT EXISTS idx_rag_category ON rag_documents(category);
 
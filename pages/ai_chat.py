@@ -5,7 +5,12 @@ Clean White/Blue Theme
 """
 
 import streamlit as st
-from services.ai_service import AIService, RAGService
+from services.ai_service import (
+    estimated_wait_message, get_ai_service, get_rag_service, render_response_stream
+)
+from services.conversation_memory import create_conversation_memory
+from services.llm_scheduler import get_llm_scheduler, llm_priority
+from services.single_flight import get_single_flight
 
 
 def render():
@@ -52,6 +57,8 @@ def render():
     # 채팅 기록 초기화
     if 'ai_chat_history' not in st.session_state:
         st.session_state.ai_chat_history = []
+    if 'ai_chat_memory' not in st.session_state:
+        st.session_state.ai_chat_memory = create_conversation_memory()
     
     # 빠른 질문 버튼
     st.markdown("""
@@ -167,6 +174,49 @@ def render():
             add_message("user", user_input)
             generate_response(user_input)
     
+    # 관리자용 RAG 인덱스 메모리 사용량
+    if st.session_state.get('is_admin'):
+        usage = get_rag_service().memory_usage()
+        st.caption(
+            f"RAG 인덱스: 청크 {usage['chunks']}개 · "
+            f"벡터 {usage['vector_bytes'] / 1024:.1f}KB"
+            f"{' (mmap)' if usage['vectors_mapped'] else ''} · "
+            f"텍스트 {usage['text_bytes'] / 1024:.1f}KB · "
+            f"역색인 {usage['postings_bytes'] / 1024:.1f}KB"
+        )
+        pool = get_ai_service().llm.metrics()
+        st.caption(
+            f"LLM 풀: 처리 중 {pool['in_flight']}/{pool['max_concurrency']} "
+            f"(최대 {pool['peak_in_flight']}) · 대기 {pool['waiting']} · "
+            f"평균 대기 {pool['avg_wait_seconds'] * 1000:.0f}ms · "
+            f"요청 {pool['requests']} · 오류 {pool['errors']}"
+        )
+        queue = get_llm_scheduler().metrics()
+        st.caption(
+            f"LLM 대기열: {queue['queue_depth']}건 "
+            f"(결제 {queue['queue_depth_by_priority']['paid']} · 무료 {queue['queue_depth_by_priority']['free']}) · "
+            f"평균 대기 결제 {queue['avg_wait_seconds']['paid']:.1f}s / 무료 {queue['avg_wait_seconds']['free']:.1f}s · "
+            f"한도 대기 {queue['throttled']} · 시간 초과 {queue['timeouts']}"
+        )
+        routing = get_ai_service().router.metrics()
+        st.caption(
+            "LLM 모델: " + " · ".join(
+                f"{tier} {m['state']} (성공 {m['successes']} · 실패 {m['failures']} · p99 {m['p99_seconds']:.1f}s)"
+                for tier, m in routing['models'].items()
+            ) + f" · 로컬 대체 {sum(routing['fallbacks'].values())}"
+        )
+        flight = get_single_flight().stats()
+        st.caption(
+            f"요청 합치기: 실행 {flight['executions']} · 합쳐진 호출 {flight['coalesced']} · "
+            f"진행 중 {flight['in_flight']}"
+        )
+        memory = st.session_state.ai_chat_memory.stats()
+        st.caption(
+            f"대화 메모리: 프롬프트 {memory['prompt_tokens']}토큰 "
+            f"(최대 {memory['max_prompt_tokens']}) · 요약 {memory['summary_tokens']}토큰 · "
+            f"요약된 메시지 {memory['summarized_messages']}개"
+        )
+    
     # 주의사항
     st.markdown("""
         <div style="
@@ -192,20 +242,25 @@ def add_message(role: str, content: str):
 
 
 def generate_response(user_message: str):
-    """AI 응답 생성"""
+    """AI 응답 생성 (토큰이 도착하는 대로 표시)"""
     
-    with st.spinner("AI가 답변을 준비 중입니다..."):
-        # RAG 컨텍스트 검색
-        rag_service = RAGService()
-        context = rag_service.retrieve_context(user_message)
-        
-        # AI 응답 생성
-        ai_service = AIService()
-        response = ai_service.chat_response(
-            user_message,
-            st.session_state.ai_chat_history,
-            context
+    # RAG 컨텍스트 검색 (프로세스 전역 인덱스 공유)
+    rag_service = get_rag_service()
+    context = rag_service.retrieve_context(user_message)
+    
+    # AI 응답 스트리밍
+    # 결제 사용자 요청을 LLM 대기열에서 먼저 처리
+    ai_service = get_ai_service()
+    with llm_priority(st.session_state.get('is_paid', False)):
+        response = render_response_stream(
+            ai_service.chat_response_stream(
+                user_message,
+                st.session_state.ai_chat_history,
+                context,
+                memory=st.session_state.ai_chat_memory
+            ),
+            waiting_message=estimated_wait_message()
         )
-        
-        add_message("assistant", response)
-        st.rerun()
+    
+    add_message("assistant", response)
+    st.rerun()
@@ -4,16 +4,37 @@ Clean White/Blue Theme
 """
 
 import streamlit as st
-from datetime import datetime
+import time
+from typing import Dict
 from config.settings import SCENARIOS
-from services.document_service import DocumentService
+from services.ai_service import estimated_wait_message
+from services.job_queue import (
+    JOB_DONE, JOB_FAILED, JOB_QUEUED, JOB_RUNNING, STAGE_NARRATIVE, get_job_queue
+)
+from services.llm_scheduler import llm_priority
+
+# 패키지 생성 작업 진행 상황 조회 간격 (초)
+JOB_POLL_INTERVAL = 1.0
 
 
 def render():
     """문서 미리보기 및 결제 페이지 렌더링"""
     
     scenario_id = st.session_state.get('selected_scenario')
-    zip_bytes = st.session_state.get('generated_zip')
+    package = st.session_state.get('generated_package')
+    
+    # 백그라운드 패키지 생성 작업 확인 (완료되면 패키지 핸들을 세션에 보관)
+    job = None
+    job_expired = False
+    job_id = st.session_state.get('package_job')
+    if job_id and not package:
+        job = get_job_queue().status(job_id)
+        if job and job['status'] == JOB_DONE:
+            package = get_job_queue().handle(job_id)
+            st.session_state.generated_package = package
+            # 작업은 끝났지만 저장소 용량 정리로 패키지가 이미 삭제된 경우
+            job_expired = package is None
+    job_pending = bool(job) and job['status'] in (JOB_QUEUED, JOB_RUNNING)
     
     if not scenario_id:
         st.warning("생성된 문서가 없습니다.")
@@ -33,6 +54,18 @@ def render():
         ">결제 및 문서 확인</h2>
     """, unsafe_allow_html=True)
     
+    if job_pending:
+        render_job_progress(job)
+    elif job_expired or (job and job['status'] == JOB_FAILED):
+        if job_expired:
+            st.warning("생성된 패키지가 만료되었습니다. 문서를 다시 생성해주세요.")
+        else:
+            st.error(f"문서 생성 중 오류가 발생했습니다: {job['error']}")
+        if st.button("🔄 인터뷰로 돌아가 다시 생성"):
+            st.session_state.package_job = None
+            st.session_state.current_page = 'scenario_form'
+            st.rerun()
+    
     # 2단 레이아웃
     order_col, payment_col = st.columns(2)
     
@@ -221,10 +254,21 @@ def render():
             """, unsafe_allow_html=True)
             
             # 다운로드 버튼
-            if zip_bytes:
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                filename = f"KStay_{scenario.visa_type}_{timestamp}.zip"
-                
+            zip_bytes = None
+            if package:
+                # st.download_button은 전달한 내용을 Streamlit 미디어 파일 관리자(메모리)에
+                # 복사하므로, 버튼이 표시되는 동안 세션마다 패키지 한 개 분량을 메모리에
+                # 둡니다. 패키지 저장소가 줄이는 것은 세션 상태에 보관하는 바이트입니다.
+                try:
+                    with package.open() as zip_file:
+                        zip_bytes = zip_file.read()
+                except FileNotFoundError:
+                    # 저장소 용량 정리로 파일이 삭제된 경우
+                    pass
+            
+            if zip_bytes is not None:
+                # 콘텐츠 해시 기반 파일명: 같은 패키지는 다시 받아도 같은 이름
+                filename = f"KStay_{scenario.visa_type}_{package.digest[:12]}.zip"
                 st.download_button(
                     label="📥 구직활동계획서 다운로드",
                     data=zip_bytes,
@@ -233,6 +277,10 @@ def render():
                     use_container_width=True,
                     type="primary"
                 )
+            elif package:
+                st.warning("패키지 파일이 만료되었습니다. 문서를 다시 생성해주세요.")
+            elif job_pending:
+                st.info("문서를 생성하는 중입니다. 완료되면 다운로드 버튼이 표시됩니다.")
             
             st.markdown("<br>", unsafe_allow_html=True)
             
@@ -242,7 +290,8 @@ def render():
                 st.session_state.form_step = 1
                 st.session_state.form_data = {}
                 st.session_state.chat_history = []
-                st.session_state.generated_zip = None
+                st.session_state.generated_package = None
+                st.session_state.package_job = None
                 st.session_state.payment_complete = False
                 st.session_state.current_page = 'dashboard'
                 st.rerun()
@@ -257,3 +306,27 @@ def render():
         
         ⚠️ 본 문서는 AI가 생성한 초안입니다. 제출 전 반드시 확인하세요.
     """)
+    
+    if job_pending:
+        # 작업이 끝날 때까지 주기적으로 다시 그려 진행 상황 갱신
+        time.sleep(JOB_POLL_INTERVAL)
+        st.rerun()
+
+
+def render_job_progress(job: Dict):
+    """패키지 생성 작업 진행 상황 표시"""
+    total = job['progress_total'] or 1
+    done = job['progress_done']
+    
+    if job['status'] == JOB_QUEUED:
+        value, text = 0.0, "문서 생성 대기 중입니다..."
+    elif job['stage'] == STAGE_NARRATIVE:
+        with llm_priority(st.session_state.get('is_paid', False)):
+            wait_message = estimated_wait_message()
+        value, text = 0.05, wait_message or "AI가 사연을 준비 중입니다..."
+    else:
+        value, text = 0.1 + 0.9 * done / total, f"문서 생성 중... ({done}/{job['progress_total']})"
+    
+    st.progress(min(value, 1.0), text=text)
+    for document in job['documents']:
+        st.caption(f"✓ {document['document_name']}")
@@ -7,7 +7,12 @@ Clean White/Blue Theme
 import streamlit as st
 from datetime import date
 from config.settings import SCENARIOS
-from services.ai_service import AIService, RAGService
+from services.ai_service import (
+    get_ai_service, estimated_wait_message, render_response_stream
+)
+from services.conversation_memory import create_conversation_memory
+from services.llm_scheduler import llm_priority
+from services.narrative_prefetch import get_narrative_prefetcher
 
 
 def render():
@@ -65,6 +70,7 @@ def render_phase1_form(scenario):
     
     # 뒤로가기
     if st.button("← 다른 시나리오 선택"):
+        get_narrative_prefetcher().release(st.session_state.pop('narrative_prefetch_key', None))
         st.session_state.selected_scenario = None
         st.session_state.form_step = 1
         st.session_state.form_data = {}
@@ -123,6 +129,9 @@ def render_phase1_form(scenario):
                     options=["IT/SW 개발", "마케팅/영업", "무역/유통", "디자인", "기타"]
                 )
             
+            # 시나리오별 상세 정보 (사연 생성 프롬프트 입력 포함)
+            smart_values = render_smart_form_fields(scenario, st.session_state.form_data)
+            
             st.markdown("<br>", unsafe_allow_html=True)
             
             submitted = st.form_submit_button(
@@ -135,22 +144,93 @@ def render_phase1_form(scenario):
                 if not name or not passport:
                     st.error("필수 정보(성명, 여권번호)를 입력해주세요.")
                 else:
-                    st.session_state.form_data = {
+                    submit_phase1_form(scenario, {
                         'name': name,
                         'passport': passport,
                         'nationality': nationality,
-                        'job_category': job_category
-                    }
-                    
-                    initial_greeting = {
-                        'role': 'assistant',
-                        'content': f"안녕하세요! {job_category} 분야 구직을 희망하시는군요. 구직활동계획서 작성을 도와드리겠습니다. 구체적으로 어떤 회사나 직무를 목표로 하고 계신가요?"
-                    }
-                    st.session_state.chat_history = [initial_greeting]
-                    st.session_state.form_step = 2
+                        'job_category': job_category,
+                        **smart_values
+                    })
                     st.rerun()
 
 
+def render_smart_form_fields(scenario, values: dict) -> dict:
+    """시나리오 smart_form_fields 입력 (st.form 안에서 호출)"""
+    if not scenario.smart_form_fields:
+        return {}
+    
+    st.markdown("**상세 정보**")
+    result = {}
+    columns = st.columns(2)
+    
+    for idx, field in enumerate(scenario.smart_form_fields):
+        name, label, field_type = field['name'], field['label'], field.get('type', 'text')
+        current = values.get(name)
+        
+        with columns[idx % 2]:
+            if field_type == 'select':
+                options = field.get('options', [])
+                index = options.index(current) if current in options else 0
+                result[name] = st.selectbox(label, options=options, index=index, key=f"smart_{name}")
+            elif field_type == 'date':
+                picked = st.date_input(
+                    label,
+                    value=date.fromisoformat(current) if current else None,
+                    key=f"smart_{name}"
+                )
+                result[name] = picked.isoformat() if picked else ""
+            elif field_type == 'number':
+                result[name] = st.number_input(
+                    label, value=float(current or 0), min_value=0.0, key=f"smart_{name}"
+                )
+            elif field_type == 'textarea':
+                result[name] = st.text_area(label, value=current or "", key=f"smart_{name}")
+            else:
+                result[name] = st.text_input(label, value=current or "", key=f"smart_{name}")
+    
+    return result
+
+
+def submit_phase1_form(scenario, form_data: dict):
+    """Phase 1 제출 처리 (폼 데이터 저장, 사연 초안 선행 생성, 인터뷰 시작)"""
+    st.session_state.form_data = form_data
+    
+    # 인터뷰가 진행되는 동안 사연 초안을 미리 생성
+    start_narrative_prefetch(scenario)
+    
+    initial_greeting = {
+        'role': 'assistant',
+        'content': f"안녕하세요! {form_data.get('job_category')} 분야 구직을 희망하시는군요. 구직활동계획서 작성을 도와드리겠습니다. 구체적으로 어떤 회사나 직무를 목표로 하고 계신가요?"
+    }
+    st.session_state.chat_history = [initial_greeting]
+    st.session_state.interview_memory = create_conversation_memory()
+    st.session_state.form_step = 2
+
+
+def start_narrative_prefetch(scenario):
+    """
+    사연 초안 선행 생성
+    
+    생성 프롬프트가 참조하는 입력이 모두 채워졌으면 백그라운드 생성을 시작하고,
+    입력이 바뀌었으면 이전 초안을 취소합니다. 사용자가 직접 쓴 초안이 있으면
+    생성하지 않습니다.
+    """
+    prompts = scenario.ai_prompts or {}
+    prompt = prompts.get('generation_prompt')
+    previous = st.session_state.get('narrative_prefetch_key')
+    prefetcher = get_narrative_prefetcher()
+    
+    if not prompt or st.session_state.get('narrative_data', {}).get(prompts.get('narrative_field')):
+        prefetcher.release(previous)
+        st.session_state.narrative_prefetch_key = None
+        return
+    
+    data = {**st.session_state.get('user_data', {}), **st.session_state.get('form_data', {})}
+    st.session_state.narrative_prefetch_key = prefetcher.prefetch(
+        prompt, data, get_ai_service(), previous_key=previous
+    )
+
+
 def render_phase2_chat(scenario):
     """Phase 2: AI 인터뷰 (Chat Interface)"""
     
@@ -266,12 +346,21 @@ def render_phase2_chat(scenario):
                     'content': user_message
                 })
                 
-                ai_service = AIService()
-                response = ai_service.chat_response(
-                    user_message,
-                    st.session_state.chat_history,
-                    ""
-                )
+                ai_service = get_ai_service()
+                with llm_priority(st.session_state.get('is_paid', False)):
+                    response = render_response_stream(
+                        ai_service.chat_response_stream(
+                            user_message,
+                            st.session_state.chat_history,
+                            "",
+                            memory=st.session_state.setdefault(
+                                'interview_memory', create_conversation_memory()
+                            ),
+                            # 인터뷰 답변은 세션마다 달라 캐시/요청 합치기를 쓰지 않음
+                            shared=False
+                        ),
+                        waiting_message=estimated_wait_message()
+                    )
                 
                 st.session_state.chat_history.append({
                     'role': 'assistant',
@@ -283,21 +372,27 @@ def render_phase2_chat(scenario):
         st.markdown("<br>", unsafe_allow_html=True)
         
         if st.button("✓ 인터뷰 종료 및 문서 생성", use_container_width=True, type="primary"):
-            # 문서 생성 및 미리보기 페이지로 이동
-            from services.document_service import DocumentService
+            # 사연 생성/검증과 문서 생성은 백그라운드 작업으로 실행하고,
+            # 미리보기 페이지에서 작업 ID로 진행 상황을 확인
+            from services.job_queue import get_job_queue
             
-            doc_service = DocumentService()
-            zip_bytes = doc_service.generate_full_package(
-                scenario.id,
+            job_id = get_job_queue().submit(
+                scenario,
                 st.session_state.get('user_data', {}),
                 st.session_state.get('form_data', {}),
-                {'chat_history': st.session_state.get('chat_history', [])}
+                drafts=st.session_state.get('narrative_data', {}),
+                chat_history=st.session_state.get('chat_history', []),
+                ai_service=get_ai_service(),
+                user_id=st.session_state.get('user_id'),
+                is_paid=st.session_state.get('is_paid', False),
+                # 이전 패키지가 있으면 바뀐 문서만 다시 생성
+                previous=st.session_state.get('generated_package')
             )
             
-            if zip_bytes:
-                st.session_state.generated_zip = zip_bytes
-                st.session_state.current_page = 'document_preview'
-                st.rerun()
+            st.session_state.package_job = job_id
+            st.session_state.generated_package = None
+            st.session_state.current_page = 'document_preview'
+            st.rerun()
     
     with info_col:
         form_data = st.session_state.get('form_data', {})
@@ -236,8 +236,19 @@ GLOSSARY = {
 # 저장 함수
 # =============================================================================
 
-def save_knowledge_base():
-    """지식 베이스를 JSON 파일로 저장"""
+def save_knowledge_base(store_dir=None, dtype="float32"):
+    """
+    지식 베이스를 JSON 파일로 저장하고 임베딩 저장소를 빌드
+    
+    임베딩 저장소(.npy + JSON 사이드카)는 런타임 RAGService가 memory-map으로
+    열어 재임베딩 없이 사용합니다. rag_documents(DB 또는 기존 내보내기 파일)도
+    저장소에 내보내 함께 임베딩합니다. 배포 이미지 빌드 시 한 번 실행하세요:
+        python -m rag_data.knowledge_base
+    
+    Args:
+        store_dir: 임베딩 저장 디렉터리 (기본값: RAG_STORE_DIR 설정)
+        dtype: 임베딩 저장 형식 ("float32" 또는 "float16")
+    """
     knowledge_base = {
         "visa_guides": VISA_GUIDES,
         "part_time_work": PART_TIME_WORK_GUIDE,
@@ -249,6 +260,30 @@ def save_knowledge_base():
         json.dump(knowledge_base, f, ensure_ascii=False, indent=2)
     
     print("Knowledge base saved to knowledge_base.json")
+    
+    # 임베딩 저장소 빌드
+    from config.settings import RAG_STORE_DIR
+    from services.rag_index import (
+        HashedNgramEmbedder, chunk_knowledge_base, load_rag_documents,
+        save_embedding_store, save_rag_documents
+    )
+    
+    # 런타임과 같은 청크가 되도록 rag_documents도 내보내고 함께 임베딩
+    rag_documents = load_rag_documents(store_dir or RAG_STORE_DIR)
+    save_rag_documents(store_dir or RAG_STORE_DIR, rag_documents)
+    
+    embedder = HashedNgramEmbedder()
+    chunks = chunk_knowledge_base(rag_documents)
+    vectors = embedder.embed([c["text"] for c in chunks])
+    sidecar_path = save_embedding_store(store_dir or RAG_STORE_DIR, chunks, vectors,
+                                        embedder.name, dtype)
+    
+    print(f"Embedding store saved to {sidecar_path} ({len(chunks)} chunks)")
 
 if __name__ == "__main__":
+    # python rag_data/knowledge_base.py 로 실행해도 프로젝트 모듈을 찾을 수 있도록
+    import os
+    import sys
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    
     save_knowledge_base()
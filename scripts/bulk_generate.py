@@ -0,0 +1,326 @@
+"""
+K-Stay Bulk Package Generator
+행정사/대행 기관용 일괄 패키지 생성 (CSV/JSONL 입력 → 의뢰인별 ZIP)
+
+사용법:
+    python scripts/bulk_generate.py clients.jsonl --out out/ --workers 4
+    python scripts/bulk_generate.py clients.csv --out out/ --generate-narratives
+
+입력 레코드:
+    JSONL: {"id": "client-001", "scenario_id": "A",
+            "user": {...}, "form": {...}, "narrative": {...}}
+    CSV:   id, scenario_id 열 + user./form./narrative. 접두사 열.
+           접두사가 없는 열은 시나리오 smart_form_fields에 있으면 form, 아니면 user
+
+출력:
+    <out>/<id>_<scenario_id>.zip, <out>/report.json (처리량/실패/고유 패키지 수/단계별 소요 시간)
+"""
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Tuple
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SECTIONS = ("user", "form", "narrative")
+STAGES = ("validate", "narrative", "render", "package")
+
+
+def read_records(path: str) -> Iterator[Dict]:
+    """
+    입력 파일을 레코드 단위로 읽음 (제너레이터, 파일 전체를 메모리에 올리지 않음)
+    
+    Yields:
+        {"id", "scenario_id", "user", "form", "narrative", "line"}
+    """
+    is_csv = path.lower().endswith(".csv")
+    with open(path, "r", encoding="utf-8-sig", newline="" if is_csv else None) as f:
+        if is_csv:
+            for line, row in enumerate(csv.DictReader(f), start=2):
+                yield _record_from_row(row, line)
+            return
+        
+        for line, text in enumerate(f, start=1):
+            if not text.strip():
+                continue
+            try:
+                data = json.loads(text)
+            except ValueError as e:
+                yield {"id": f"line{line}", "scenario_id": "", "line": line,
+                       "error": f"JSON 형식 오류: {e}"}
+                continue
+            record = {section: dict(data.get(section) or {}) for section in SECTIONS}
+            record.update(id=str(data.get("id") or f"line{line}"),
+                          scenario_id=str(data.get("scenario_id") or ""), line=line)
+            yield record
+
+
+def _record_from_row(row: Dict[str, str], line: int) -> Dict:
+    """CSV 행 → 레코드 (빈 칸은 값 없음으로 처리)"""
+    from config.settings import SCENARIOS
+    
+    scenario_id = (row.pop("scenario_id", "") or "").strip()
+    record_id = (row.pop("id", "") or "").strip() or f"line{line}"
+    scenario = SCENARIOS.get(scenario_id)
+    form_names = {f["name"] for f in scenario.smart_form_fields} if scenario else set()
+    
+    record = {section: {} for section in SECTIONS}
+    for column, value in row.items():
+        if column is None or value is None or not value.strip():
+            continue
+        section, _, name = column.partition(".")
+        if section in SECTIONS and name:
+            record[section][name] = value.strip()
+        else:
+            record["form" if column in form_names else "user"][column] = value.strip()
+    
+    record.update(id=record_id, scenario_id=scenario_id, line=line)
+    return record
+
+
+def validate_form(scenario, form_data: Dict) -> Tuple[Dict, List[str]]:
+    """
+    시나리오 smart_form_fields 기준 폼 데이터 검증/정규화
+    
+    select는 선택지 중 하나, date는 ISO 날짜(YYYY-MM-DD), number는 0 이상의 숫자.
+    
+    Returns:
+        (정규화된 폼 데이터, 오류 메시지 목록)
+    """
+    fields = {f["name"]: f for f in scenario.smart_form_fields}
+    cleaned: Dict = {}
+    errors: List[str] = []
+    
+    for name, value in form_data.items():
+        field = fields.get(name)
+        if field is None:
+            errors.append(f"알 수 없는 필드입니다: {name}")
+            continue
+        if value is None or (isinstance(value, str) and not value.strip()):
+            continue
+        
+        label, field_type = field["label"], field.get("type", "text")
+        if field_type == "select":
+            options = field.get("options", [])
+            if str(value) not in options:
+                errors.append(f"{label}: '{value}'은(는) 선택지({', '.join(options)})에 없습니다.")
+                continue
+            cleaned[name] = str(value)
+        elif field_type == "date":
+            try:
+                cleaned[name] = date.fromisoformat(str(value).strip()).isoformat()
+            except ValueError:
+                errors.append(f"{label}: 날짜 형식(YYYY-MM-DD)이 아닙니다: {value}")
+        elif field_type == "number":
+            try:
+                number = float(str(value).replace(",", ""))
+            except ValueError:
+                errors.append(f"{label}: 숫자가 아닙니다: {value}")
+                continue
+            if number < 0:
+                errors.append(f"{label}: 0 이상이어야 합니다: {value}")
+                continue
+            cleaned[name] = number
+        else:
+            cleaned[name] = str(value)
+    
+    return cleaned, errors
+
+
+def _init_worker():
+    """렌더링 프로세스 초기화 (의뢰인마다 입력이 달라 렌더링 캐시는 끔)"""
+    from services.render_cache import get_render_cache
+    
+    get_render_cache().max_bytes = 0
+
+
+def generate_package(record: Dict, out_dir: str, generate_narratives: bool = False,
+                     render_threads: int = 1) -> Dict:
+    """
+    레코드 하나의 패키지 생성 (렌더링 프로세스에서 실행)
+    
+    Returns:
+        {"id", "path", "size", "stages": {단계: 초}, "error"}
+    """
+    from config.settings import SCENARIOS
+    from services.document_service import DocumentService
+    
+    scenario = SCENARIOS[record["scenario_id"]]
+    stages = {}
+    narrative = dict(record["narrative"])
+    
+    if generate_narratives:
+        from services.narrative_batch import prepare_narrative_bundle_sync
+        
+        started = time.perf_counter()
+        bundle = prepare_narrative_bundle_sync(
+            scenario, {**record["user"], **record["form"]}, narrative
+        )
+        stages["narrative"] = time.perf_counter() - started
+        if bundle.errors:
+            return {"id": record["id"], "stages": stages,
+                    "error": "; ".join(bundle.errors.values())}
+        narrative.update(bundle.narrative_data)
+    
+    safe_id = re.sub(r"[^\w.-]+", "_", record["id"])
+    path = os.path.join(out_dir, f"{safe_id}_{scenario.id}.zip")
+    
+    doc_service = DocumentService(max_workers=render_threads)
+    started = time.perf_counter()
+    fd, tmp_path = tempfile.mkstemp(dir=out_dir, suffix=".part")
+    try:
+        with os.fdopen(fd, "w+b") as f:
+            digest = doc_service.write_package(
+                f, scenario.id, record["user"], record["form"], narrative
+            )
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    
+    stages["package"] = time.perf_counter() - started
+    stages["render"] = sum(doc_service.last_render_report.get("documents", {}).values())
+    return {"id": record["id"], "path": path, "size": os.path.getsize(path),
+            "content_hash": digest, "stages": stages, "error": None}
+
+
+def _prepare(record: Dict) -> Tuple[Optional[Dict], Optional[str], float]:
+    """레코드 검증 (부모 프로세스, 잘못된 레코드는 작업으로 보내지 않음)"""
+    from config.settings import SCENARIOS
+    
+    started = time.perf_counter()
+    if record.get("error"):
+        return None, record["error"], time.perf_counter() - started
+    
+    scenario = SCENARIOS.get(record["scenario_id"])
+    if scenario is None:
+        return None, f"유효하지 않은 시나리오입니다: '{record['scenario_id']}'", \
+            time.perf_counter() - started
+    
+    form, errors = validate_form(scenario, record["form"])
+    if errors:
+        return None, "; ".join(errors), time.perf_counter() - started
+    return dict(record, form=form), None, time.perf_counter() - started
+
+
+def _summarize(values: List[float]) -> Dict[str, float]:
+    """단계별 소요 시간 요약 (초)"""
+    if not values:
+        return {"count": 0, "total": 0.0, "mean": 0.0, "p50": 0.0, "p95": 0.0, "max": 0.0}
+    ordered = sorted(values)
+    return {
+        "count": len(ordered),
+        "total": sum(ordered),
+        "mean": sum(ordered) / len(ordered),
+        "p50": ordered[len(ordered) // 2],
+        "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        "max": ordered[-1],
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="CSV/JSONL 레코드로 문서 패키지 일괄 생성")
+    parser.add_argument("input", help="입력 파일 (.csv 또는 .jsonl)")
+    parser.add_argument("--out", required=True, help="ZIP과 report.json을 저장할 디렉터리")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="렌더링 프로세스 수 (기본값: CPU 수)")
+    parser.add_argument("--render-threads", type=int, default=1,
+                        help="프로세스당 문서 렌더링 스레드 수")
+    parser.add_argument("--max-pending", type=int, default=None,
+                        help="동시에 처리 중인 최대 레코드 수 (기본값: workers x 2, 메모리 상한)")
+    parser.add_argument("--max-tasks-per-child", type=int, default=200,
+                        help="렌더링 프로세스 재시작 주기 (레코드 수)")
+    parser.add_argument("--generate-narratives", action="store_true",
+                        help="비어 있는 사연을 AI로 생성하고 모든 사연을 검증")
+    args = parser.parse_args(argv)
+    
+    os.makedirs(args.out, exist_ok=True)
+    workers = max(1, args.workers)
+    max_pending = max(1, args.max_pending or workers * 2)
+    
+    results: List[Dict] = []
+    failures: List[Dict] = []
+    stage_times: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+    total_bytes = 0
+    
+    def collect(result: Dict):
+        nonlocal total_bytes
+        for stage, seconds in result.get("stages", {}).items():
+            stage_times[stage].append(seconds)
+        if result["error"]:
+            failures.append({"id": result["id"], "error": result["error"]})
+        else:
+            results.append(result)
+            total_bytes += result["size"]
+            print(f"  ✓ {result['id']} → {os.path.basename(result['path'])}", flush=True)
+    
+    started = time.perf_counter()
+    records = read_records(args.input)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             max_tasks_per_child=args.max_tasks_per_child) as pool:
+        pending = deque()
+        
+        while True:
+            # 처리 중인 레코드를 max_pending개로 제한하며 입력을 조금씩 읽음
+            for record in islice(records, max_pending - len(pending)):
+                prepared, error, elapsed = _prepare(record)
+                stage_times["validate"].append(elapsed)
+                if error:
+                    failures.append({"id": record["id"], "line": record.get("line"), "error": error})
+                    print(f"  ✗ {record['id']}: {error}", flush=True)
+                    continue
+                future = pool.submit(generate_package, prepared, args.out,
+                                     args.generate_narratives, args.render_threads)
+                pending.append((record["id"], future))
+            
+            if not pending:
+                break
+            
+            record_id, future = pending.popleft()
+            try:
+                collect(future.result())
+            except Exception as e:
+                collect({"id": record_id, "error": f"{type(e).__name__}: {e}"})
+    
+    elapsed = time.perf_counter() - started
+    total = len(results) + len(failures)
+    report = {
+        "input": args.input,
+        "records": total,
+        "succeeded": len(results),
+        "failed": len(failures),
+        "elapsed_seconds": elapsed,
+        "packages_per_second": len(results) / elapsed if elapsed else 0.0,
+        "output_bytes": total_bytes,
+        # 입력이 같은 고객은 콘텐츠 해시가 같은 패키지를 받음 (저장 시 중복 제거 가능)
+        "unique_packages": len({r["content_hash"] for r in results}),
+        "workers": workers,
+        "stages": {stage: _summarize(values) for stage, values in stage_times.items()},
+        "failures": failures,
+    }
+    with open(os.path.join(args.out, "report.json"), "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    
+    print(f"records={total} succeeded={len(results)} failed={len(failures)} "
+          f"unique={report['unique_packages']} workers={workers}")
+    print(f"throughput={report['packages_per_second']:.2f} packages/s  elapsed={elapsed:.1f}s  "
+          f"output={total_bytes / 1024:.0f}KB")
+    for stage, summary in report["stages"].items():
+        if summary["count"]:
+            print(f"{stage:>9}: mean={summary['mean'] * 1000:.1f}ms p50={summary['p50'] * 1000:.1f}ms "
+                  f"p95={summary['p95'] * 1000:.1f}ms")
+    return 0 if not failures else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
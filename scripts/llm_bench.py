@@ -0,0 +1,127 @@
+"""
+K-Stay LLM Benchmark
+스텁 서버(또는 실제 API)를 상대로 AI 채팅 처리량/지연 측정
+
+사용법:
+    python scripts/llm_stub_server.py --latency lognormal:3,12 &
+    python scripts/llm_bench.py --sessions 32 --requests 200
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+QUESTIONS = [
+    "D-10 구직비자에 대해 알려주세요.",
+    "유학생 아르바이트 허가 조건이 뭔가요?",
+    "F-6 비자 신청 조건과 필요 서류는?",
+    "체류기간 연장 신청은 어떻게 하나요?",
+]
+
+ERROR_PREFIX = "죄송합니다. 응답 생성 중 오류가 발생했습니다"
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """백분위수 (최근접 순위)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def run_request(ai_service, index: int, stream: bool, degraded_notice: str) -> Dict:
+    """채팅 요청 1회 (응답 캐시/요청 합치기를 피하도록 질문마다 번호를 붙임)"""
+    question = f"{QUESTIONS[index % len(QUESTIONS)]} (#{index})"
+    history = [{"role": "user", "content": question}]
+    started = time.perf_counter()
+    first_token: Optional[float] = None
+    
+    if stream:
+        parts = []
+        for token in ai_service.chat_response_stream(question, history, ""):
+            if first_token is None:
+                first_token = time.perf_counter() - started
+            parts.append(token)
+        text = "".join(parts)
+    else:
+        text = ai_service.chat_response(question, history, "")
+    
+    total = time.perf_counter() - started
+    return {
+        "ttft": first_token if first_token is not None else total,
+        "total": total,
+        "error": text.startswith(ERROR_PREFIX),
+        "degraded": text.startswith(degraded_notice),
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="AI 채팅 처리량/지연 벤치마크")
+    parser.add_argument("--base-url", default=None, help="OpenAI 호환 API 주소 (기본값: 스텁 서버)")
+    parser.add_argument("--api-key", default="stub-key")
+    parser.add_argument("--sessions", type=int, default=16, help="동시 사용자 수")
+    parser.add_argument("--requests", type=int, default=100, help="전체 요청 수")
+    parser.add_argument("--max-concurrency", type=int, default=None,
+                        help="LLM 동시 요청 상한 (기본값: LLM_MAX_CONCURRENCY)")
+    parser.add_argument("--no-stream", action="store_true", help="스트리밍 없이 측정")
+    parser.add_argument("--deadline", type=float, default=None,
+                        help="채팅 호출 마감 시간 (초, 기본값: LLM_DEADLINE_CHAT)")
+    args = parser.parse_args(argv)
+    
+    from config.settings import LLM_MAX_CONCURRENCY, LLM_MAX_CONNECTIONS
+    from services.ai_service import DEGRADED_NOTICE, AIService
+    from services.llm_client import STUB_BASE_URL, LLMClientManager
+    from services.model_router import get_model_router
+    from services.response_cache import get_response_cache
+    
+    # 같은 질문이 캐시에서 응답되지 않도록 응답 캐시를 끔
+    get_response_cache().max_entries = 0
+    if args.deadline:
+        get_model_router().deadlines["chat"] = args.deadline
+    
+    llm = LLMClientManager(
+        api_key=args.api_key,
+        base_url=args.base_url or STUB_BASE_URL,
+        backend="stub",
+        max_connections=LLM_MAX_CONNECTIONS,
+        max_concurrency=args.max_concurrency or LLM_MAX_CONCURRENCY,
+    )
+    ai_service = AIService(llm=llm)
+    if ai_service.client is None:
+        print("openai 패키지가 설치되어 있지 않습니다: pip install openai")
+        return 1
+    
+    stream = not args.no_stream
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.sessions) as executor:
+        results = list(executor.map(
+            lambda i: run_request(ai_service, i, stream, DEGRADED_NOTICE), range(args.requests)
+        ))
+    elapsed = time.perf_counter() - started
+    llm.close()
+    
+    ok = [r for r in results if not r["error"] and not r["degraded"]]
+    ttft = [r["ttft"] for r in ok]
+    total = [r["total"] for r in ok]
+    metrics = llm.metrics()
+    
+    degraded = sum(1 for r in results if r["degraded"])
+    print(f"requests={len(results)} errors={len(results) - len(ok) - degraded} degraded={degraded} "
+          f"sessions={args.sessions} stream={stream}")
+    print(f"throughput={len(results) / elapsed:.2f} req/s  elapsed={elapsed:.1f}s")
+    for name, values in (("ttft", ttft), ("total", total)):
+        print(f"{name:>5}: p50={percentile(values, 50):.2f}s p90={percentile(values, 90):.2f}s "
+              f"p99={percentile(values, 99):.2f}s max={max(values, default=0):.2f}s")
+    print(f"llm pool: peak_in_flight={metrics['peak_in_flight']}/{metrics['max_concurrency']} "
+          f"avg_wait={metrics['avg_wait_seconds']:.2f}s max_wait={metrics['max_wait_seconds']:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,355 @@
+"""
+K-Stay LLM Stub Server
+OpenAI 호환 chat-completions 스텁 서버 (오프라인 부하/지연 테스트용)
+
+사용법:
+    python scripts/llm_stub_server.py --latency lognormal:3,12 --tokens-per-second 40
+    # .streamlit/secrets.toml
+    # LLM_BACKEND = "stub"
+
+지원 기능:
+    - POST /v1/chat/completions (stream, response_format json_object)
+    - GET  /v1/models, GET /stats
+    - 첫 토큰 지연 분포 (fixed / uniform / lognormal), 토큰 생성 속도
+    - 오류 주입 (500), 요청/토큰 한도 초과 시 429 + Retry-After
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+import argparse
+import json
+import math
+import random
+import threading
+import time
+import uuid
+
+
+# 응답 본문에 쓰는 문장 (토큰 = 공백 단위 조각)
+FILLER_SENTENCES = [
+    "문의하신 내용에 대해 안내드립니다.",
+    "체류자격 변경 신청은 체류기간 만료 전에 하이코리아 또는 관할 출입국·외국인관서에서 할 수 있습니다.",
+    "필요 서류는 통합신청서, 여권, 외국인등록증, 수수료와 체류지 입증 서류입니다.",
+    "사안에 따라 추가 서류를 요구할 수 있으므로 방문 전 1345 콜센터로 확인하시기 바랍니다.",
+    "K-Stay에서 신청 서류 초안을 자동으로 만들어 드릴 수 있습니다.",
+]
+
+
+class LatencyModel:
+    """첫 토큰 지연 분포 (초)"""
+    
+    def __init__(self, spec: str, rng: random.Random):
+        """
+        Args:
+            spec: "fixed:2" | "uniform:2,15" | "lognormal:중앙값,p95"
+        """
+        self.spec = spec
+        self.rng = rng
+        kind, _, params = spec.partition(":")
+        values = [float(v) for v in params.split(",") if v]
+        if kind == "fixed" and len(values) == 1:
+            self._sample = lambda: values[0]
+        elif kind == "uniform" and len(values) == 2:
+            self._sample = lambda: rng.uniform(values[0], values[1])
+        elif kind == "lognormal" and len(values) == 2:
+            median, p95 = values
+            sigma = math.log(p95 / median) / 1.645 if p95 > median else 0.0
+            self._sample = lambda: rng.lognormvariate(math.log(median), sigma)
+        else:
+            raise ValueError(f"지원하지 않는 지연 분포입니다: {spec}")
+        self._lock = threading.Lock()
+    
+    def sample(self) -> float:
+        """지연 시간 1회 추출"""
+        with self._lock:
+            return max(0.0, self._sample())
+
+
+class RateLimiter:
+    """분당 요청/토큰 한도 (1분 슬라이딩 윈도우)"""
+    
+    def __init__(self, rpm: int = 0, tpm: int = 0):
+        self.rpm = rpm
+        self.tpm = tpm
+        self._events: deque = deque()  # (시각, 토큰 수)
+        self._lock = threading.Lock()
+    
+    def acquire(self, tokens: int) -> Optional[float]:
+        """
+        한도 확인 후 기록
+        
+        Returns:
+            한도 초과 시 재시도까지 대기할 초, 허용되면 None
+        """
+        if not self.rpm and not self.tpm:
+            return None
+        
+        now = time.monotonic()
+        with self._lock:
+            while self._events and now - self._events[0][0] >= 60:
+                self._events.popleft()
+            
+            used_tokens = sum(t for _, t in self._events)
+            over_rpm = self.rpm and len(self._events) >= self.rpm
+            over_tpm = self.tpm and used_tokens + tokens > self.tpm
+            if over_rpm or over_tpm:
+                oldest = self._events[0][0] if self._events else now
+                return max(1.0, 60 - (now - oldest))
+            
+            self._events.append((now, tokens))
+            return None
+
+
+class StubState:
+    """서버 설정과 통계"""
+    
+    def __init__(self, args: argparse.Namespace):
+        self.rng = random.Random(args.seed)
+        self.latency = LatencyModel(args.latency, self.rng)
+        self.tokens_per_second = args.tokens_per_second
+        self.response_tokens = args.response_tokens
+        self.error_rate = args.error_rate
+        self.limiter = RateLimiter(args.rpm, args.tpm)
+        self.verbose = args.verbose
+        
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "streamed": 0, "errors": 0, "rate_limited": 0,
+                      "in_flight": 0, "completion_tokens": 0}
+    
+    def count(self, key: str, delta: int = 1):
+        with self._lock:
+            self.stats[key] += delta
+    
+    def should_fail(self) -> bool:
+        with self._lock:
+            return self.rng.random() < self.error_rate
+
+
+def estimate_tokens(text: str) -> int:
+    """대략적인 토큰 수 (ASCII 4글자당 1, 그 밖의 문자 1글자당 1)"""
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    return math.ceil(ascii_chars / 4) + (len(text) - ascii_chars)
+
+
+def build_completion(body: Dict, limit: int) -> List[str]:
+    """응답 토큰 조각 목록"""
+    response_format = (body.get("response_format") or {}).get("type")
+    if response_format == "json_object":
+        payload = {
+            "is_valid": True,
+            "score": 8,
+            "issues": [],
+            "suggestions": ["구체적인 날짜와 장소를 한두 군데 더 보완하면 좋습니다."],
+            "improved_version": None,
+        }
+        text = json.dumps(payload, ensure_ascii=False)
+        return [text[i:i + 8] for i in range(0, len(text), 8)]
+    
+    messages = body.get("messages") or []
+    question = next((m.get("content", "") for m in reversed(messages) if m.get("role") == "user"), "")
+    words = [f'"{" ".join(question.split())[:60]}"에 ', "대한 ", "답변입니다.\n\n"]
+    idx = 0
+    while len(words) < limit:
+        words.extend(w + " " for w in FILLER_SENTENCES[idx % len(FILLER_SENTENCES)].split())
+        idx += 1
+    return words[:limit]
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """OpenAI 호환 요청 처리"""
+    
+    protocol_version = "HTTP/1.1"
+    server_version = "KStayLLMStub/1.0"
+    state: StubState = None
+    
+    def log_message(self, format, *args):
+        if self.state.verbose:
+            super().log_message(format, *args)
+    
+    def do_GET(self):
+        if self.path.rstrip("/") == "/v1/models":
+            self._send_json(200, {"object": "list", "data": [
+                {"id": "gpt-4o", "object": "model", "owned_by": "stub"},
+                {"id": "gpt-4o-mini", "object": "model", "owned_by": "stub"},
+            ]})
+        elif self.path.rstrip("/") == "/stats":
+            self._send_json(200, dict(self.state.stats))
+        else:
+            self._send_error(404, "not_found", f"Unknown path {self.path}")
+    
+    def do_POST(self):
+        if self.path.rstrip("/") != "/v1/chat/completions":
+            self._send_error(404, "not_found", f"Unknown path {self.path}")
+            return
+        
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError:
+            self._send_error(400, "invalid_request_error", "Request body is not valid JSON")
+            return
+        
+        state = self.state
+        state.count("requests")
+        
+        prompt_tokens = sum(estimate_tokens(str(m.get("content", ""))) + 4
+                            for m in body.get("messages") or [])
+        limit = min(state.response_tokens, int(body.get("max_tokens") or state.response_tokens))
+        
+        retry_after = state.limiter.acquire(prompt_tokens + limit)
+        if retry_after is not None:
+            state.count("rate_limited")
+            self._send_error(429, "rate_limit_exceeded", "Rate limit reached for requests",
+                             headers={"Retry-After": f"{retry_after:.0f}"})
+            return
+        
+        if state.should_fail():
+            state.count("errors")
+            self._send_error(500, "server_error", "Injected failure from stub server")
+            return
+        
+        pieces = build_completion(body, limit)
+        state.count("in_flight")
+        try:
+            time.sleep(state.latency.sample())
+            if body.get("stream"):
+                state.count("streamed")
+                self._stream(body, pieces, prompt_tokens)
+            else:
+                if state.tokens_per_second > 0:
+                    time.sleep(len(pieces) / state.tokens_per_second)
+                self._send_json(200, self._completion(body, "".join(pieces), prompt_tokens, len(pieces)))
+            state.count("completion_tokens", len(pieces))
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            state.count("in_flight", -1)
+    
+    def _completion(self, body: Dict, text: str, prompt_tokens: int, completion_tokens: int) -> Dict:
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:24]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "gpt-4o"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": text},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+    
+    def _stream(self, body: Dict, pieces: List[str], prompt_tokens: int):
+        """server-sent events로 토큰 전송"""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+        model = body.get("model", "gpt-4o")
+        
+        def chunk(delta: Dict, finish_reason: Optional[str] = None, usage: Optional[Dict] = None):
+            payload = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [] if usage else [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+            if usage:
+                payload["usage"] = usage
+            self._write_chunk(f"data: {json.dumps(payload, ensure_ascii=False)}\n\n")
+        
+        interval = 1.0 / self.state.tokens_per_second if self.state.tokens_per_second > 0 else 0.0
+        chunk({"role": "assistant", "content": ""})
+        for piece in pieces:
+            chunk({"content": piece})
+            if interval:
+                time.sleep(interval)
+        chunk({}, "stop")
+        
+        if (body.get("stream_options") or {}).get("include_usage"):
+            chunk({}, usage={
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": len(pieces),
+                "total_tokens": prompt_tokens + len(pieces),
+            })
+        self._write_chunk("data: [DONE]\n\n")
+        self._write_chunk("")
+    
+    def _write_chunk(self, data: str):
+        encoded = data.encode("utf-8")
+        self.wfile.write(f"{len(encoded):X}\r\n".encode("ascii") + encoded + b"\r\n")
+        self.wfile.flush()
+    
+    def _send_json(self, status: int, payload: Dict, headers: Optional[Dict[str, str]] = None):
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+    
+    def _send_error(self, status: int, code: str, message: str,
+                    headers: Optional[Dict[str, str]] = None):
+        self._send_json(status, {"error": {
+            "message": message,
+            "type": code,
+            "param": None,
+            "code": code,
+        }}, headers)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="OpenAI 호환 LLM 스텁 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", default="lognormal:3,12",
+                        help="첫 토큰 지연 분포 (fixed:S | uniform:MIN,MAX | lognormal:MEDIAN,P95)")
+    parser.add_argument("--tokens-per-second", type=float, default=40.0,
+                        help="토큰 생성 속도 (0이면 지연 없음)")
+    parser.add_argument("--response-tokens", type=int, default=300,
+                        help="응답 토큰 수 상한 (요청의 max_tokens가 더 작으면 그 값)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="500 오류 주입 비율 (0~1)")
+    parser.add_argument("--rpm", type=int, default=0, help="분당 요청 한도 (0이면 무제한)")
+    parser.add_argument("--tpm", type=int, default=0, help="분당 토큰 한도 (0이면 무제한)")
+    parser.add_argument("--seed", type=int, default=None, help="난수 시드 (재현용)")
+    parser.add_argument("--verbose", action="store_true", help="요청 로그 출력")
+    return parser.parse_args(argv)
+
+
+def make_server(args: argparse.Namespace) -> Tuple[ThreadingHTTPServer, StubState]:
+    """스텁 서버 생성 (테스트/벤치마크에서 직접 띄울 때 사용)"""
+    state = StubState(args)
+    handler = type("BoundStubHandler", (StubHandler,), {"state": state})
+    server = ThreadingHTTPServer((args.host, args.port), handler)
+    server.daemon_threads = True
+    return server, state
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    server, _ = make_server(args)
+    print(f"LLM stub server: http://{args.host}:{server.server_port}/v1 "
+          f"(latency={args.latency}, {args.tokens_per_second:g} tok/s, "
+          f"error_rate={args.error_rate:g}, rpm={args.rpm}, tpm={args.tpm})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
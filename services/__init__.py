@@ -1,4 +1,4 @@
 from .auth_service import AuthService, SessionManager
 from .payment_service import PaymentService, PaymentGateway
-from .ai_service import AIService, RAGService, NarrativeValidator
+from .ai_service import AIService, RAGService, NarrativeValidator, get_ai_service, get_rag_service
 from .document_service import DocumentService, DocumentPreviewService
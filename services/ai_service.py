@@ -4,22 +4,136 @@ OpenAI 기반 AI 기능 처리
 """
 
 import streamlit as st
-from typing import Optional, Dict, List, Tuple
+from typing import Optional, Dict, List, Tuple, Iterator, AsyncIterator, Callable
+import asyncio
+import contextvars
+import importlib
 import json
+import math
+import os
+import re
+import sys
+import threading
+import time
 
-# OpenAI 클라이언트 (실제 배포 시 활성화)
-# from openai import OpenAI
-# from config.settings import OPENAI_API_KEY
+from config.settings import RAG_STORE_DIR
+from services.conversation_memory import (
+    ConversationMemory, create_conversation_memory, extractive_summary, message_tokens
+)
+from services.llm_client import LLMClientManager, get_llm_client_manager
+from services.llm_scheduler import get_llm_scheduler
+from services.model_router import ModelRouter, Route, get_model_router
+from services.narrative_rules import get_narrative_rule_engine
+from services.response_cache import context_fingerprint, get_response_cache, normalize_query
+from services.single_flight import get_single_flight
+from services.rag_index import (
+    RAG_DOCUMENTS_FILE, BM25Index, HashedNgramEmbedder, VectorIndex, chunk_knowledge_base,
+    load_embedding_store, load_rag_documents, reciprocal_rank_fusion
+)
+
+# OpenAI 클라이언트는 services.llm_client에서 프로세스당 하나만 생성
+
+# 사연 생성 시스템 프롬프트
+NARRATIVE_SYSTEM_PROMPT = '''
+당신은 한국 출입국관리사무소에 제출할 서류를 작성하는 전문가입니다.
+다음 원칙을 지켜주세요:
+1. 진정성 있고 설득력 있게 작성
+2. 구체적인 날짜, 장소, 에피소드 포함
+3. 행정적으로 적합한 표현 사용
+4. 한국어 존댓말 사용
+'''
+
+# 사연 생성 실패 시 반환 텍스트의 머리말
+NARRATIVE_ERROR_PREFIX = "생성 중 오류가 발생했습니다"
+
+# 실제 LLM 호출이 지연/실패해 로컬 채팅 응답으로 대체할 때 앞에 붙이는 안내
+# (사연은 서류에 들어가므로 붙이지 않고 generate_narrative_draft의 플래그로 알림)
+DEGRADED_NOTICE = "⚠️ 현재 AI 응답이 지연되어 기본 안내로 대신합니다.\n\n"
+
+# 로컬 사연 초안(_local_narrative)이 생성 프롬프트 외에 참조하는 필드
+LOCAL_NARRATIVE_FIELDS = ("nationality", "given_name", "narrative_content")
+
+# 목업 응답을 스트리밍할 때의 토큰 단위 (공백 포함, 이어 붙이면 원문과 동일)
+_TOKEN_PATTERN = re.compile(r"\S+\s*|\s+")
+
+
+def _iter_tokens(text: str) -> Iterator[str]:
+    """완성된 텍스트를 토큰 조각으로 분할"""
+    for match in _TOKEN_PATTERN.finditer(text):
+        yield match.group(0)
+
+
+async def _aiter_in_thread(factory: Callable[[], Iterator[str]]) -> AsyncIterator[str]:
+    """
+    동기 스트림을 별도 스레드에서 소비하며 비동기 이터레이터로 전달
+    
+    Args:
+        factory: 동기 스트림 생성 함수
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    done = object()
+    
+    def produce():
+        try:
+            for item in factory():
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, done)
+    
+    # 호출한 쪽의 컨텍스트(LLM 우선순위 등)를 워커 스레드에서도 사용
+    threading.Thread(target=contextvars.copy_context().run, args=(produce,), daemon=True).start()
+    while True:
+        item = await queue.get()
+        if item is done:
+            break
+        yield item
+
+
+def _request_tokens(messages: List[Dict], max_tokens: int) -> int:
+    """스케줄러에 알릴 예상 토큰 수 (프롬프트 + 최대 응답 토큰)"""
+    return message_tokens(messages) + max_tokens
+
+
+def _is_stateless_chat(user_message: str, chat_history: List[Dict],
+                       memory: Optional[ConversationMemory]) -> bool:
+    """
+    이전 대화/메모리 없이 질문만으로 답이 정해지는 호출인지
+    
+    응답 캐시와 요청 합치기는 프로세스 전역이라 세션 간에 공유되므로,
+    대화 맥락에 따라 답이 달라지는 호출(두 번째 턴 이후, 요약이 있는
+    메모리)에는 적용하지 않습니다. 기록 끝의 현재 메시지는 이전 대화로
+    보지 않습니다.
+    """
+    prior = list(chat_history or [])
+    if prior and prior[-1].get("content") == user_message:
+        prior.pop()
+    return not prior and (memory is None or not memory.summary)
+
+
+def _chat_flight_key(user_message: str, rag_context: str) -> Tuple[str, str, str]:
+    """채팅 요청 합치기 키 (응답 캐시와 같은 정규화, 이전 대화가 없는 호출에만 사용)"""
+    return ("chat", normalize_query(user_message), context_fingerprint(rag_context))
 
 
 class AIService:
     """AI 서비스 클래스"""
     
-    def __init__(self):
-        """OpenAI 클라이언트 초기화"""
-        # 실제 배포 시 아래 주석 해제
-        # self.client = OpenAI(api_key=OPENAI_API_KEY)
-        self.model = "gpt-4o"  # 또는 "gpt-4o-mini"
+    def __init__(self, llm: Optional[LLMClientManager] = None,
+                 router: Optional[ModelRouter] = None):
+        """
+        OpenAI 클라이언트 초기화
+        
+        Args:
+            llm: LLM 클라이언트 관리자 (기본값: 프로세스 전역 관리자)
+            router: 모델 라우터 (기본값: 프로세스 전역 라우터)
+        """
+        # 프로세스 전역 커넥션 풀 공유 (대화마다 새 연결을 맺지 않음)
+        self.llm = llm or get_llm_client_manager()
+        # LLM_BACKEND가 mock이거나 openai 패키지가 없으면 None (목업 응답 사용)
+        self.client = self.llm.client
+        # 호출 유형별 모델/마감 시간 (장애 시 목업 분기의 로컬 응답으로 대체)
+        self.router = router or get_model_router()
     
     def validate_narrative(self, narrative: str, validation_prompt: str, scenario_context: Dict) -> Dict:
         """
@@ -29,70 +143,73 @@ class AIService:
             narrative: 사용자가 작성한 사연
             validation_prompt: 시나리오별 검증 프롬프트
             scenario_context: 시나리오 컨텍스트 정보
-            
+        
         Returns:
             검증 결과 딕셔너리
         """
+        # 로컬 규칙 엔진 (길이/금지 표현 위반 시 LLM 호출 없이 반환)
+        rule_result, hard_passed = get_narrative_rule_engine(
+            (scenario_context or {}).get("scenario_id")
+        ).check(narrative)
+        if not hard_passed:
+            return rule_result
+        
         try:
             # =================================================================
-            # 실제 OpenAI 연동 코드 (배포 시 활성화)
+            # 실제 OpenAI 연동 코드 (LLM_BACKEND가 openai/stub일 때)
             # =================================================================
-            """
-            system_prompt = f'''
-            {validation_prompt}
-            
-            응답 형식 (JSON):
-            {{
-                "is_valid": true/false,
-                "score": 1-10,
-                "issues": ["문제점1", "문제점2"],
-                "suggestions": ["개선점1", "개선점2"],
-                "improved_version": "개선된 버전 (문제가 있을 경우)"
-            }}
-            '''
-            
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
+            if self.client is not None:
+                system_prompt = f'''
+                {validation_prompt}
+                
+                응답 형식 (JSON):
+                {{
+                    "is_valid": true/false,
+                    "score": 1-10,
+                    "issues": ["문제점1", "문제점2"],
+                    "suggestions": ["개선점1", "개선점2"],
+                    "improved_version": "개선된 버전 (문제가 있을 경우)"
+                }}
+                '''
+                
+                messages = [
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": f"다음 내용을 검토해주세요:\n\n{narrative}"}
-                ],
-                response_format={"type": "json_object"}
-            )
+                ]
+                
+                route = self.router.route("validation", message_tokens(messages))
+                if route is not None:
+                    try:
+                        response = self._complete(
+                            route, messages, max_tokens=2000,
+                            response_format={"type": "json_object"}
+                        )
+                        # 비어 있거나 깨진 JSON도 지연/장애와 같이 규칙 결과로 대체
+                        result = json.loads(response.choices[0].message.content or "")
+                        if not isinstance(result, dict):
+                            raise ValueError("검증 응답이 JSON 객체가 아닙니다.")
+                    except Exception:
+                        result = None
+                    
+                    if result is not None:
+                        # 규칙 엔진의 구조 규칙 지적 사항 병합
+                        result["issues"] = rule_result["issues"] + result.get("issues", [])
+                        result["suggestions"] = rule_result["suggestions"] + result.get("suggestions", [])
+                        result["is_valid"] = result.get("is_valid", False) and rule_result["is_valid"]
+                        return result
+                    self.router.record_fallback("validation")
+                
+                # 지연/장애 시 로컬 규칙 결과로 대체
+                return dict(rule_result, suggestions=rule_result["suggestions"] + [
+                    "AI 상세 검토가 지연되어 기본 규칙으로만 검토했습니다. 잠시 후 다시 검토해보세요."
+                ])
             
-            return json.loads(response.choices[0].message.content)
-            """
             # =================================================================
             # 개발용 목업 코드
             # =================================================================
-            # 간단한 규칙 기반 검증
-            issues = []
-            suggestions = []
-            score = 8
-            
-            if len(narrative) < 100:
-                issues.append("내용이 너무 짧습니다.")
-                suggestions.append("최소 200자 이상 작성해주세요.")
-                score -= 2
-            
-            if "취업 확정" in narrative or "내정" in narrative:
-                issues.append("'취업 확정', '내정' 등의 표현은 D-10 비자에 부적합합니다.")
-                suggestions.append("'구직 활동 계획'으로 수정하세요.")
-                score -= 3
-            
-            if "위장 결혼" in narrative or "돈을 받고" in narrative:
-                issues.append("위장결혼을 암시하는 표현이 감지되었습니다.")
-                suggestions.append("진정한 교제 과정을 설명하세요.")
-                score -= 5
-            
-            return {
-                "is_valid": len(issues) == 0,
-                "score": max(1, score),
-                "issues": issues,
-                "suggestions": suggestions,
-                "improved_version": None if len(issues) == 0 else "AI가 개선된 버전을 제안할 수 있습니다."
-            }
-            
+            # 로컬 규칙 엔진 결과를 그대로 사용
+            return rule_result
+        
         except Exception as e:
             return {
                 "is_valid": False,
@@ -109,42 +226,63 @@ class AIService:
         Args:
             generation_prompt: 생성 프롬프트 템플릿
             user_data: 사용자 입력 데이터
-            
+        
         Returns:
-            생성된 사연 텍스트
+            생성된 사연 텍스트 (오류 시 NARRATIVE_ERROR_PREFIX로 시작하는 안내)
         """
         try:
-            # 프롬프트에 사용자 데이터 삽입
-            formatted_prompt = generation_prompt.format(**user_data)
-            
-            # =================================================================
-            # 실제 OpenAI 연동 코드 (배포 시 활성화)
-            # =================================================================
-            """
-            system_prompt = '''
-            당신은 한국 출입국관리사무소에 제출할 서류를 작성하는 전문가입니다.
-            다음 원칙을 지켜주세요:
-            1. 진정성 있고 설득력 있게 작성
-            2. 구체적인 날짜, 장소, 에피소드 포함
-            3. 행정적으로 적합한 표현 사용
-            4. 한국어 존댓말 사용
-            '''
+            return self.generate_narrative_draft(generation_prompt, user_data)[0]
+        except Exception as e:
+            return f"{NARRATIVE_ERROR_PREFIX}: {str(e)}"
+    
+    def generate_narrative_draft(self, generation_prompt: str, user_data: Dict) -> Tuple[str, bool]:
+        """
+        서류에 넣을 사연 초안 생성
+        
+        지연/장애로 로컬 초안을 대신 반환할 때도 본문에는 안내 문구를 붙이지
+        않고, 대체 여부를 따로 반환합니다 (라우터 fallbacks 지표에도 기록).
+        
+        Args:
+            generation_prompt: 생성 프롬프트 템플릿
+            user_data: 사용자 입력 데이터
+        
+        Returns:
+            (사연 텍스트, 로컬 초안으로 대체했는지 여부)
+        
+        Raises:
+            Exception: 프롬프트 입력 누락 등 생성 오류
+        """
+        # 프롬프트에 사용자 데이터 삽입
+        formatted_prompt = generation_prompt.format(**user_data)
+        
+        # =================================================================
+        # 실제 OpenAI 연동 코드 (LLM_BACKEND가 openai/stub일 때)
+        # =================================================================
+        if self.client is not None:
+            messages = [
+                {"role": "system", "content": NARRATIVE_SYSTEM_PROMPT},
+                {"role": "user", "content": formatted_prompt}
+            ]
             
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": formatted_prompt}
-                ],
-                max_tokens=2000
-            )
+            route = self.router.route("narrative", message_tokens(messages))
+            if route is not None:
+                try:
+                    return self._complete(route, messages, max_tokens=2000).choices[0].message.content, False
+                except Exception:
+                    self.router.record_fallback("narrative")
             
-            return response.choices[0].message.content
-            """
-            # =================================================================
-            # 개발용 목업 코드
-            # =================================================================
-            return f"""
+            # 지연/장애 시 로컬 초안으로 대체
+            return self._local_narrative(user_data), True
+        
+        # =================================================================
+        # 개발용 목업 코드
+        # =================================================================
+        return self._local_narrative(user_data), False
+    
+    @staticmethod
+    def _local_narrative(user_data: Dict) -> str:
+        """LLM 없이 만드는 사연 초안 (개발용 목업 / 장애 시 대체 응답, LOCAL_NARRATIVE_FIELDS 참조)"""
+        return f"""
 [AI 생성 예시]
 
 안녕하십니까. 저는 {user_data.get('nationality', '외국')} 국적의 {user_data.get('given_name', '신청인')}입니다.
@@ -158,11 +296,81 @@ class AIService:
 ---
 ※ 이것은 AI가 생성한 초안입니다. 실제 제출 전 반드시 검토하세요.
             """
+    
+    def generate_narrative_stream(self, generation_prompt: str, user_data: Dict) -> Iterator[str]:
+        """
+        사연 내용 자동 생성 (스트리밍)
+        
+        토큰이 도착하는 대로 조각을 반환합니다. 조각을 모두 이어 붙이면
+        generate_narrative 결과와 같습니다.
+        
+        Args:
+            generation_prompt: 생성 프롬프트 템플릿
+            user_data: 사용자 입력 데이터
+        
+        Yields:
+            생성된 사연 텍스트 조각
+        """
+        try:
+            # =================================================================
+            # 실제 OpenAI 연동 코드 (LLM_BACKEND가 openai/stub일 때)
+            # =================================================================
+            if self.client is not None:
+                formatted_prompt = generation_prompt.format(**user_data)
+                
+                messages = [
+                    {"role": "system", "content": NARRATIVE_SYSTEM_PROMPT},
+                    {"role": "user", "content": formatted_prompt}
+                ]
+                
+                route = self.router.route("narrative", message_tokens(messages))
+                if route is not None:
+                    started = False
+                    try:
+                        for token in self._stream_completion(route, messages, max_tokens=2000):
+                            started = True
+                            yield token
+                        return
+                    except Exception:
+                        if started:
+                            raise  # 이미 일부를 보낸 뒤에는 대체할 수 없음
+                        self.router.record_fallback("narrative")
+                
+                # 첫 토큰 전에 지연/장애가 나면 로컬 초안으로 대체 (라우터 fallbacks에 기록됨)
+                yield from _iter_tokens(self._local_narrative(user_data))
+                return
             
+            # =================================================================
+            # 개발용 목업 코드
+            # =================================================================
+            yield from _iter_tokens(self.generate_narrative(generation_prompt, user_data))
+        
         except Exception as e:
-            return f"생성 중 오류가 발생했습니다: {str(e)}"
+            yield f"{NARRATIVE_ERROR_PREFIX}: {str(e)}"
+    
+    async def avalidate_narrative(self, narrative: str, validation_prompt: str,
+                                  scenario_context: Dict) -> Dict:
+        """validate_narrative의 비동기 버전 (공유 LLM 클라이언트를 워커 스레드에서 호출)"""
+        return await asyncio.to_thread(
+            self.validate_narrative, narrative, validation_prompt, scenario_context
+        )
     
-    def chat_response(self, user_message: str, chat_history: List[Dict], rag_context: str = "") -> str:
+    async def agenerate_narrative(self, generation_prompt: str, user_data: Dict) -> str:
+        """generate_narrative의 비동기 버전 (공유 LLM 클라이언트를 워커 스레드에서 호출)"""
+        return await asyncio.to_thread(self.generate_narrative, generation_prompt, user_data)
+    
+    async def agenerate_narrative_draft(self, generation_prompt: str, user_data: Dict) -> Tuple[str, bool]:
+        """generate_narrative_draft의 비동기 버전 (공유 LLM 클라이언트를 워커 스레드에서 호출)"""
+        return await asyncio.to_thread(self.generate_narrative_draft, generation_prompt, user_data)
+    
+    def agenerate_narrative_stream(self, generation_prompt: str, user_data: Dict) -> AsyncIterator[str]:
+        """generate_narrative_stream의 비동기 이터레이터 버전"""
+        return _aiter_in_thread(
+            lambda: self.generate_narrative_stream(generation_prompt, user_data)
+        )
+    
+    def chat_response(self, user_message: str, chat_history: List[Dict], rag_context: str = "",
+                      memory: Optional[ConversationMemory] = None) -> str:
         """
         AI 채팅 응답 생성
         
@@ -170,53 +378,302 @@ class AIService:
             user_message: 사용자 메시지
             chat_history: 이전 대화 기록
             rag_context: RAG로 검색된 컨텍스트
-            
+            memory: 세션별 대화 메모리 (없으면 이번 호출에서만 사용)
+        
         Returns:
             AI 응답 텍스트
+        
+        응답 캐시와 요청 합치기는 이전 대화가 없는 호출(첫 턴, 빠른 질문)에만
+        적용됩니다.
         """
+        stateless = _is_stateless_chat(user_message, chat_history, memory)
+        cache = get_response_cache()
+        cached = cache.get(user_message, rag_context) if stateless else None
+        if cached is not None:
+            return cached
+        
+        def generate() -> str:
+            return self._generate_chat_response(
+                user_message, self._chat_messages(user_message, chat_history, rag_context, memory)
+            )
+        
         try:
-            # =================================================================
-            # 실제 OpenAI 연동 코드 (배포 시 활성화)
-            # =================================================================
-            """
-            system_prompt = f'''
-            당신은 K-Stay의 AI 상담사입니다.
-            외국인의 한국 체류, 비자, 출입국 관련 질문에 답변합니다.
-            
-            참고 자료:
-            {rag_context}
-            
-            원칙:
-            1. 정확하고 최신 정보 제공
-            2. 불확실한 경우 하이코리아 확인 권장
-            3. 친절하고 이해하기 쉬운 설명
-            4. 필요시 영어 병행 사용
-            '''
-            
-            messages = [{"role": "system", "content": system_prompt}]
-            
-            # 이전 대화 기록 추가
-            for msg in chat_history[-10:]:  # 최근 10개 대화만
-                messages.append({"role": msg["role"], "content": msg["content"]})
-            
-            messages.append({"role": "user", "content": user_message})
+            if stateless:
+                # 같은 질문이 동시에 들어오면 LLM 호출 한 번을 공유
+                response = get_single_flight().do(
+                    _chat_flight_key(user_message, rag_context), generate
+                )
+            else:
+                response = generate()
+        except Exception as e:
+            return f"죄송합니다. 응답 생성 중 오류가 발생했습니다: {str(e)}"
+        
+        # 장애 시 대체 응답은 캐시하지 않음
+        if stateless and not response.startswith(DEGRADED_NOTICE):
+            cache.put(user_message, rag_context, response)
+        return response
+    
+    def chat_response_stream(self, user_message: str, chat_history: List[Dict],
+                             rag_context: str = "",
+                             memory: Optional[ConversationMemory] = None,
+                             shared: bool = True) -> Iterator[str]:
+        """
+        AI 채팅 응답 생성 (스트리밍)
+        
+        토큰이 도착하는 대로 조각을 반환합니다. 이전 대화가 없는 호출은
+        응답이 끝까지 생성되면 전체 텍스트를 응답 캐시에 저장하고, 캐시
+        적중 시에는 저장된 응답을 한 번에 반환합니다.
+        
+        같은 질문이 이미 생성 중이면(요청 합치기) 먼저 들어온 호출만
+        스트리밍하고, 나중 호출은 스트리밍 없이 생성이 끝날 때까지 기다린 뒤
+        전체 응답을 한 번에 받습니다.
+        
+        Args:
+            user_message: 사용자 메시지
+            chat_history: 이전 대화 기록
+            rag_context: RAG로 검색된 컨텍스트
+            memory: 세션별 대화 메모리 (없으면 이번 호출에서만 사용)
+            shared: False면 응답 캐시/요청 합치기를 항상 건너뜀 (인터뷰처럼 세션
+                고유 맥락에 답해야 하는 호출)
+        
+        Yields:
+            AI 응답 텍스트 조각
+        """
+        stateless = shared and _is_stateless_chat(user_message, chat_history, memory)
+        cache = get_response_cache()
+        cached = cache.get(user_message, rag_context) if stateless else None
+        if cached is not None:
+            yield cached
+            return
+        
+        if not stateless:
+            try:
+                messages = self._chat_messages(user_message, chat_history, rag_context, memory)
+                for token in self._stream_chat_response(user_message, messages):
+                    yield token
+            except Exception as e:
+                yield f"죄송합니다. 응답 생성 중 오류가 발생했습니다: {str(e)}"
+            return
+        
+        # 같은 질문이 이미 생성 중이면 그 결과를 기다려 한 번에 반환 (스트리밍 없음)
+        flight = get_single_flight()
+        key = _chat_flight_key(user_message, rag_context)
+        future, leader = flight.begin(key)
+        if not leader:
+            try:
+                yield future.result()
+            except Exception as e:
+                yield f"죄송합니다. 응답 생성 중 오류가 발생했습니다: {str(e)}"
+            return
+        
+        parts = []
+        try:
+            messages = self._chat_messages(user_message, chat_history, rag_context, memory)
+            for token in self._stream_chat_response(user_message, messages):
+                parts.append(token)
+                yield token
+            flight.finish(key, future, "".join(parts))
+        except Exception as e:
+            flight.finish(key, future, error=e)
+            yield f"죄송합니다. 응답 생성 중 오류가 발생했습니다: {str(e)}"
+            return
+        finally:
+            if not future.done():
+                # 소비자가 스트림을 중간에 닫은 경우
+                flight.finish(key, future, error=RuntimeError("응답 생성이 중단되었습니다."))
+        
+        # 장애 시 대체 응답은 캐시하지 않음
+        text = "".join(parts)
+        if not text.startswith(DEGRADED_NOTICE):
+            cache.put(user_message, rag_context, text)
+    
+    def achat_response_stream(self, user_message: str, chat_history: List[Dict],
+                              rag_context: str = "",
+                              memory: Optional[ConversationMemory] = None,
+                              shared: bool = True) -> AsyncIterator[str]:
+        """chat_response_stream의 비동기 이터레이터 버전"""
+        return _aiter_in_thread(
+            lambda: self.chat_response_stream(user_message, chat_history, rag_context, memory,
+                                              shared)
+        )
+    
+    def _stream_chat_response(self, user_message: str, messages: List[Dict]) -> Iterator[str]:
+        """AI 채팅 응답 토큰 스트림 (캐시 미적용)"""
+        # =================================================================
+        # 실제 OpenAI 연동 코드 (LLM_BACKEND가 openai/stub일 때)
+        # =================================================================
+        if self.client is not None:
+            route = self.router.route("chat", message_tokens(messages))
+            if route is not None:
+                started = False
+                try:
+                    for token in self._stream_completion(route, messages, max_tokens=1500):
+                        started = True
+                        yield token
+                    return
+                except Exception:
+                    if started:
+                        raise  # 이미 일부를 보낸 뒤에는 대체할 수 없음
+                    self.router.record_fallback("chat")
             
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                max_tokens=1500
-            )
+            # 첫 토큰 전에 지연/장애가 나면 키워드 응답으로 대체
+            yield from _iter_tokens(DEGRADED_NOTICE + self._local_chat_response(user_message))
+            return
+        
+        # =================================================================
+        # 개발용 목업 코드
+        # =================================================================
+        yield from _iter_tokens(self._local_chat_response(user_message))
+    
+    def _chat_messages(self, user_message: str, chat_history: List[Dict], rag_context: str,
+                       memory: Optional[ConversationMemory]) -> List[Dict]:
+        """LLM에 보낼 채팅 메시지 (누적 요약 + 최근 대화, 토큰 예산 적용)"""
+        system_prompt = f'''
+        당신은 K-Stay의 AI 상담사입니다.
+        외국인의 한국 체류, 비자, 출입국 관련 질문에 답변합니다.
+        
+        참고 자료:
+        {rag_context}
+        
+        원칙:
+        1. 정확하고 최신 정보 제공
+        2. 불확실한 경우 하이코리아 확인 권장
+        3. 친절하고 이해하기 쉬운 설명
+        4. 필요시 영어 병행 사용
+        '''
+        
+        # 현재 메시지가 아직 기록에 없으면 추가
+        if not chat_history or chat_history[-1].get("content") != user_message:
+            chat_history = list(chat_history) + [{"role": "user", "content": user_message}]
+        
+        memory = memory or create_conversation_memory()
+        return memory.build_messages(system_prompt, chat_history, self.summarize_conversation)
+    
+    def summarize_conversation(self, previous_summary: str, messages: List[Dict],
+                               max_tokens: int) -> str:
+        """
+        대화 누적 요약 갱신 (새로 접히는 메시지만 반영)
+        
+        Args:
+            previous_summary: 이전 요약
+            messages: 요약에 새로 반영할 메시지
+            max_tokens: 요약 최대 토큰 수
+        
+        Returns:
+            갱신된 요약
+        """
+        # =================================================================
+        # 실제 OpenAI 연동 코드 (LLM_BACKEND가 openai/stub일 때)
+        # =================================================================
+        if self.client is not None:
+            transcript = "\n".join(f"{m['role']}: {m['content']}" for m in messages)
+            summary_messages = [
+                {"role": "system", "content": (
+                    "이전 요약에 새 대화를 반영해 요약을 갱신하세요. "
+                    "이름, 날짜, 비자 종류, 계획 등 사실 정보는 빠짐없이 유지하세요."
+                )},
+                {"role": "user", "content": f"이전 요약:\n{previous_summary}\n\n새 대화:\n{transcript}"}
+            ]
             
-            return response.choices[0].message.content
-            """
-            # =================================================================
-            # 개발용 목업 코드
-            # =================================================================
-            # 간단한 키워드 기반 응답
-            user_lower = user_message.lower()
+            route = self.router.route("summary", message_tokens(summary_messages))
+            if route is not None:
+                try:
+                    return self._complete(
+                        route, summary_messages, max_tokens=max_tokens
+                    ).choices[0].message.content
+                except Exception:
+                    self.router.record_fallback("summary")
+        
+        # =================================================================
+        # 개발용 목업 코드 (지연/장애 시 대체 요약으로도 사용)
+        # =================================================================
+        return extractive_summary(previous_summary, messages, max_tokens)
+    
+    def _generate_chat_response(self, user_message: str, messages: List[Dict]) -> str:
+        """AI 채팅 응답 생성 (캐시 미적용)"""
+        # =================================================================
+        # 실제 OpenAI 연동 코드 (LLM_BACKEND가 openai/stub일 때)
+        # =================================================================
+        if self.client is not None:
+            route = self.router.route("chat", message_tokens(messages))
+            if route is not None:
+                try:
+                    return self._complete(route, messages, max_tokens=1500).choices[0].message.content
+                except Exception:
+                    self.router.record_fallback("chat")
             
-            if "d-10" in user_lower or "구직" in user_lower:
-                return """
+            # 지연/장애 시 키워드 응답으로 대체
+            return DEGRADED_NOTICE + self._local_chat_response(user_message)
+        
+        # =================================================================
+        # 개발용 목업 코드
+        # =================================================================
+        return self._local_chat_response(user_message)
+    
+    def _complete(self, route: Route, messages: List[Dict], max_tokens: int, **kwargs):
+        """
+        마감 시간 안의 LLM 호출 (대기열 대기 포함)
+        
+        Raises:
+            TimeoutError: 대기열/응답이 마감 시간을 넘긴 경우
+            Exception: 공급자 오류 (라우터에 실패로 기록됨)
+        """
+        with self.llm.slot(tokens=_request_tokens(messages, max_tokens), timeout=route.remaining()):
+            remaining = route.remaining()  # 대기열에서 마감 시간을 다 쓴 경우는 공급자 실패가 아님
+            try:
+                response = self.client.with_options(
+                    timeout=remaining, max_retries=0
+                ).chat.completions.create(
+                    model=route.model,
+                    messages=messages,
+                    max_tokens=max_tokens,
+                    **kwargs
+                )
+            except Exception as e:
+                self.router.record_failure(route, e)
+                raise
+        
+        self.router.record_success(route)
+        return response
+    
+    def _stream_completion(self, route: Route, messages: List[Dict], max_tokens: int) -> Iterator[str]:
+        """
+        마감 시간 안의 LLM 스트리밍 호출 (마감 시간은 첫 토큰까지, 이후 토큰 간 간격에도 적용)
+        
+        Raises:
+            TimeoutError: 대기열/첫 토큰이 마감 시간을 넘긴 경우
+            Exception: 공급자 오류 (라우터에 실패로 기록됨)
+        """
+        with self.llm.slot(tokens=_request_tokens(messages, max_tokens), timeout=route.remaining()):
+            remaining = route.remaining()
+            try:
+                stream = self.client.with_options(
+                    timeout=remaining, max_retries=0
+                ).chat.completions.create(
+                    model=route.model,
+                    messages=messages,
+                    max_tokens=max_tokens,
+                    stream=True
+                )
+                
+                for chunk in stream:
+                    delta = chunk.choices[0].delta.content if chunk.choices else None
+                    if delta:
+                        yield delta
+            except Exception as e:
+                self.router.record_failure(route, e)
+                raise
+        
+        self.router.record_success(route)
+    
+    @staticmethod
+    def _local_chat_response(user_message: str) -> str:
+        """키워드 기반 채팅 응답 (개발용 목업 / 장애 시 대체 응답)"""
+        # 간단한 키워드 기반 응답
+        user_lower = user_message.lower()
+        
+        if "d-10" in user_lower or "구직" in user_lower:
+            return """
 D-10 비자 (구직 비자)에 대해 안내드립니다.
 
 📋 **자격 요건**
@@ -234,10 +691,10 @@ D-10 비자 (구직 비자)에 대해 안내드립니다.
 - 최대 6개월 (1회 연장 가능, 총 1년)
 
 더 궁금한 점이 있으시면 언제든 물어보세요! 😊
-                """
-            
-            elif "시간제" in user_lower or "아르바이트" in user_lower:
-                return """
+            """
+        
+        elif "시간제" in user_lower or "아르바이트" in user_lower:
+            return """
 시간제 취업 (아르바이트)에 대해 안내드립니다.
 
 📋 **허가 조건**
@@ -254,10 +711,10 @@ D-10 비자 (구직 비자)에 대해 안내드립니다.
 - 단순 노무 (제조업 생산직 등)
 
 필요한 서류를 K-Stay에서 자동으로 생성해드릴 수 있습니다!
-                """
-            
-            elif "f-6" in user_lower or "결혼" in user_lower:
-                return """
+            """
+        
+        elif "f-6" in user_lower or "결혼" in user_lower:
+            return """
 F-6 결혼이민 비자에 대해 안내드립니다.
 
 💍 **자격 요건**
@@ -274,10 +731,10 @@ F-6 결혼이민 비자에 대해 안내드립니다.
 💡 **Tip**
 결혼배경 진술서는 진정성이 매우 중요합니다.
 K-Stay에서 AI가 도와드릴 수 있습니다!
-                """
-            
-            else:
-                return f"""
+            """
+        
+        else:
+            return f"""
 안녕하세요! K-Stay AI 상담사입니다. 😊
 
 "{user_message}"에 대해 답변드립니다.
@@ -292,20 +749,60 @@ K-Stay에서 AI가 도와드릴 수 있습니다!
 
 📞 긴급 문의: 하이코리아 1345
 🌐 공식 사이트: www.hikorea.go.kr
-                """
-            
-        except Exception as e:
-            return f"죄송합니다. 응답 생성 중 오류가 발생했습니다: {str(e)}"
+            """
 
 
 class RAGService:
     """RAG (Retrieval-Augmented Generation) 서비스"""
     
-    def __init__(self):
-        """RAG 초기화"""
-        # 실제 배포 시: Vector DB 연결
-        # self.vector_store = None
+    # 이 점수 미만의 검색 결과는 관련 없는 것으로 간주
+    MIN_SCORE = 0.1
+    
+    def __init__(self, embedder=None, extra_documents: Optional[List[Dict]] = None):
+        """
+        RAG 초기화
+        
+        Args:
+            embedder: 임베더 (embed(texts) -> 행렬, 기본값: HashedNgramEmbedder)
+            extra_documents: 추가 문서 (rag_documents 테이블 행)
+        """
         self.knowledge_base = self._load_knowledge_base()
+        
+        # 로컬 벡터 인덱스 (지식 베이스 + rag_documents 청크)
+        self.embedder = embedder or HashedNgramEmbedder()
+        self.chunks = chunk_knowledge_base(extra_documents)
+        
+        # 오프라인 빌드된 임베딩 저장소가 있으면 memory-map으로 사용
+        vectors = None
+        embedder_name = getattr(self.embedder, "name", None)
+        if embedder_name:
+            vectors = load_embedding_store(RAG_STORE_DIR, self.chunks, embedder_name)
+        self.vectors_mapped = vectors is not None
+        if vectors is None:
+            vectors = self.embedder.embed([c["text"] for c in self.chunks])
+            vectors.flags.writeable = False  # 세션 간 공유되는 읽기 전용 인덱스
+        self.index = VectorIndex(vectors)
+        self.lexical_index = BM25Index([c["text"] for c in self.chunks])
+    
+    def memory_usage(self) -> Dict[str, int]:
+        """인덱스 메모리 사용량 (바이트, 컨테이너 용량 산정용)"""
+        vector_bytes = int(self.index.vectors.nbytes)
+        text_bytes = sum(
+            sys.getsizeof(chunk["text"]) + sys.getsizeof(chunk["title"])
+            for chunk in self.chunks
+        )
+        postings_bytes = sum(
+            sys.getsizeof(term) + sys.getsizeof(docs) + len(docs) * 64
+            for term, docs in self.lexical_index.postings.items()
+        )
+        return {
+            "chunks": len(self.chunks),
+            "vectors_mapped": self.vectors_mapped,
+            "vector_bytes": vector_bytes,
+            "text_bytes": text_bytes,
+            "postings_bytes": postings_bytes,
+            "total_bytes": vector_bytes + text_bytes + postings_bytes,
+        }
     
     def _load_knowledge_base(self) -> Dict:
         """지식 베이스 로드"""
@@ -354,7 +851,7 @@ class RAGService:
         Args:
             query: 검색 쿼리
             top_k: 반환할 결과 수
-            
+        
         Returns:
             검색된 컨텍스트 텍스트
         """
@@ -376,7 +873,21 @@ class RAGService:
             return context
             """
             # =================================================================
-            # 개발용 목업 코드: 키워드 기반 검색
+            # 로컬 하이브리드 검색 (BM25 + 벡터, RRF 결합)
+            # =================================================================
+            candidates = top_k * 3
+            lexical_results = self.lexical_index.search(query, candidates)
+            query_vector = self.embedder.embed([query])[0]
+            vector_results = [
+                (i, score) for i, score in self.index.search(query_vector, candidates)
+                if score >= self.MIN_SCORE
+            ]
+            results = reciprocal_rank_fusion([lexical_results, vector_results], top_k)
+            if results:
+                return "\n\n".join(self.chunks[i]["text"] for i, _ in results)
+            
+            # =================================================================
+            # 검색 결과가 없을 때: 키워드 기반 검색
             # =================================================================
             context_parts = []
             query_lower = query.lower()
@@ -400,11 +911,57 @@ class RAGService:
                 """)
             
             return "\n".join(context_parts)
-            
+        
         except Exception as e:
             return f"컨텍스트 검색 중 오류: {str(e)}"
 
 
+def _knowledge_base_version() -> str:
+    """지식 베이스 소스와 rag_documents 내보내기 파일의 수정 시각 (바뀌면 인덱스를 다시 생성)"""
+    from rag_data import knowledge_base
+    
+    parts = []
+    for path in (knowledge_base.__file__, os.path.join(RAG_STORE_DIR, RAG_DOCUMENTS_FILE)):
+        try:
+            parts.append(str(os.stat(path).st_mtime_ns))
+        except OSError:
+            parts.append("static")
+    return ":".join(parts)
+
+
+@st.cache_resource(show_spinner=False, max_entries=1)
+def _build_rag_service(version: str) -> RAGService:
+    """버전별 RAG 서비스 생성 (프로세스당 1회, 모든 세션이 공유)"""
+    from rag_data import knowledge_base
+    
+    # 소스가 바뀐 경우 모듈 데이터를 다시 읽어 들임
+    importlib.reload(knowledge_base)
+    # rag_documents는 DB에서, 안 되면 저장소 내보내기 파일에서 읽어 함께 색인
+    return RAGService(extra_documents=load_rag_documents(RAG_STORE_DIR))
+
+
+def get_rag_service() -> RAGService:
+    """
+    프로세스 전역 RAG 서비스
+    
+    지식 베이스와 rag_documents 인덱스는 프로세스당 한 번만 만들어 모든
+    Streamlit 세션이 읽기 전용으로 공유하고, rag_data/knowledge_base.py나
+    rag_documents 내보내기 파일이 수정되면 다음 호출에서 다시 만듭니다.
+    """
+    return _build_rag_service(_knowledge_base_version())
+
+
+@st.cache_resource(show_spinner=False)
+def get_ai_service() -> AIService:
+    """
+    프로세스 전역 AI 서비스
+    
+    AIService는 세션 상태를 갖지 않으므로 하나를 모든 Streamlit 세션과
+    스레드가 공유하고, LLM 호출은 공유 커넥션 풀(services.llm_client)을 거칩니다.
+    """
+    return AIService()
+
+
 class NarrativeValidator:
     """사연 검증 헬퍼 클래스"""
     
@@ -437,3 +994,52 @@ class NarrativeValidator:
                     return result["improved_version"]
         
         return None
+
+
+def estimated_wait_message(tokens: int = 2000) -> Optional[str]:
+    """
+    LLM 대기열이 밀려 있을 때 보여줄 예상 대기 안내
+    
+    Args:
+        tokens: 이번 요청의 예상 토큰 수
+    
+    Returns:
+        안내 문구 (바로 처리될 예정이면 None)
+    """
+    scheduler = get_llm_scheduler()
+    ahead = scheduler.queue_position()
+    wait = scheduler.estimate_wait(tokens)
+    if wait < 1 and ahead == 0:
+        return None
+    return f"⏳ 요청이 많아 대기 중입니다 · 앞선 요청 {ahead}건 · 예상 대기 약 {math.ceil(wait)}초"
+
+
+def render_response_stream(token_stream: Iterator[str], min_interval: float = 0.05,
+                           waiting_message: Optional[str] = None) -> str:
+    """
+    스트리밍 응답을 도착하는 대로 화면에 표시
+    
+    Args:
+        token_stream: 텍스트 조각 이터레이터
+        min_interval: 화면 갱신 최소 간격 (초)
+        waiting_message: 첫 토큰이 도착할 때까지 보여줄 안내 (예: estimated_wait_message())
+    
+    Returns:
+        이어 붙인 전체 응답 텍스트
+    """
+    placeholder = st.empty()
+    if waiting_message:
+        placeholder.info(waiting_message)
+    parts = []
+    last_update = 0.0
+    
+    for token in token_stream:
+        parts.append(token)
+        now = time.monotonic()
+        if now - last_update >= min_interval:
+            placeholder.markdown("".join(parts) + "▌")
+            last_update = now
+    
+    text = "".join(parts)
+    placeholder.markdown(text)
+    return text
@@ -0,0 +1,187 @@
+"""
+K-Stay Conversation Memory
+토큰 예산 내 대화 기록 (누적 요약 + 최근 대화)
+"""
+
+from collections import deque
+from typing import Callable, Dict, List, Optional
+import math
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("o200k_base")
+except Exception:  # tiktoken 미설치/인코딩 다운로드 불가 시 근사치 사용
+    _ENCODING = None
+
+# 메시지마다 붙는 역할/구분자 토큰
+MESSAGE_OVERHEAD_TOKENS = 4
+
+Summarizer = Callable[[str, List[Dict], int], str]
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    텍스트 토큰 수
+    
+    tiktoken이 있으면 정확히 세고, 없으면 ASCII는 4글자당 1토큰,
+    한글 등 그 밖의 문자는 1글자당 1토큰으로 근사합니다.
+    """
+    if not text:
+        return 0
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text))
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    return math.ceil(ascii_chars / 4) + (len(text) - ascii_chars)
+
+
+def message_tokens(messages: List[Dict]) -> int:
+    """메시지 목록의 토큰 수"""
+    return sum(estimate_tokens(m.get("content", "")) + MESSAGE_OVERHEAD_TOKENS for m in messages)
+
+
+def extractive_summary(previous: str, messages: List[Dict], max_tokens: int) -> str:
+    """
+    LLM 없이 만드는 누적 요약 (개발용 기본 요약기)
+    
+    이전 요약 뒤에 새 메시지의 앞부분을 한 줄씩 덧붙이고, max_tokens를
+    넘으면 가장 오래된 줄부터 버립니다.
+    """
+    lines = previous.splitlines() if previous else []
+    for msg in messages:
+        speaker = "사용자" if msg.get("role") == "user" else "상담사"
+        content = " ".join(msg.get("content", "").split())
+        limit = 120 if speaker == "사용자" else 80
+        if len(content) > limit:
+            content = content[:limit] + "…"
+        if content:
+            lines.append(f"- {speaker}: {content}")
+    
+    while lines and estimate_tokens("\n".join(lines)) > max_tokens:
+        lines.pop(0)
+    return "\n".join(lines)
+
+
+class ConversationMemory:
+    """
+    대화 메모리
+    
+    오래된 대화는 누적 요약으로 접고 최근 대화만 원문으로 보내, 대화가
+    길어져도 프롬프트의 대화 부분이 token_budget을 넘지 않게 합니다.
+    요약은 접히지 않은 메시지가 summary_every 턴만큼 쌓였을 때(또는 예산을
+    넘었을 때) 새로 접히는 메시지만 이전 요약에 반영합니다.
+    세션마다 하나씩 만들어 st.session_state에 보관합니다.
+    """
+    
+    def __init__(self, token_budget: int = 1200, summary_every: int = 4,
+                 summary_tokens: int = 300, keep_recent: int = 2):
+        """
+        초기화
+        
+        Args:
+            token_budget: 요약 + 최근 대화에 쓸 최대 토큰 수
+            summary_every: 요약을 갱신하는 주기 (턴 = 사용자/AI 메시지 한 쌍)
+            summary_tokens: 요약 최대 토큰 수
+            keep_recent: 요약하지 않고 항상 원문으로 남길 최근 턴 수
+        """
+        self.token_budget = token_budget
+        self.summary_every = summary_every
+        self.summary_tokens = min(summary_tokens, token_budget // 2)
+        self.keep_recent = keep_recent
+        
+        self.summary = ""
+        self.summarized_count = 0  # 요약에 반영된 메시지 수
+        self.summary_updates = 0
+        self.last_prompt_tokens = 0
+        self.prompt_tokens_history: deque = deque(maxlen=100)
+    
+    def build_messages(self, system_prompt: str, chat_history: List[Dict],
+                       summarizer: Optional[Summarizer] = None) -> List[Dict]:
+        """
+        LLM에 보낼 메시지 구성
+        
+        Args:
+            system_prompt: 시스템 프롬프트
+            chat_history: 전체 대화 기록 (현재 사용자 메시지 포함)
+            summarizer: (이전 요약, 새 메시지, 최대 토큰) → 새 요약 (기본값: extractive_summary)
+        
+        Returns:
+            [system(+요약), 최근 대화...] 메시지 목록
+        """
+        summarizer = summarizer or extractive_summary
+        history = [
+            {"role": m["role"], "content": m["content"]}
+            for m in chat_history if m.get("role") in ("user", "assistant")
+        ]
+        
+        if len(history) < self.summarized_count:
+            # 대화가 초기화됨
+            self.reset()
+        
+        recent_floor = max(self.summarized_count, len(history) - self.keep_recent * 2)
+        pending = history[self.summarized_count:recent_floor]
+        if len(pending) >= self.summary_every * 2:
+            self._fold(history, recent_floor, summarizer)
+        
+        # 예산 초과 시 가장 오래된 메시지부터 요약으로 접음 (마지막 메시지는 유지)
+        recent_budget = self.token_budget - self.summary_tokens
+        while (len(history) - self.summarized_count > 1
+               and message_tokens(history[self.summarized_count:]) > recent_budget):
+            self._fold(history, self.summarized_count + 2, summarizer)
+        
+        recent = history[self.summarized_count:]
+        if recent and message_tokens(recent) > recent_budget:
+            recent[-1] = dict(recent[-1], content=self._truncate(recent[-1]["content"], recent_budget))
+        
+        content = system_prompt.strip()
+        if self.summary:
+            content += f"\n\n이전 대화 요약:\n{self.summary}"
+        messages = [{"role": "system", "content": content}] + recent
+        
+        self.last_prompt_tokens = message_tokens(messages)
+        self.prompt_tokens_history.append(self.last_prompt_tokens)
+        return messages
+    
+    def stats(self) -> Dict[str, int]:
+        """메모리 상태 (마지막 프롬프트 토큰 수 포함)"""
+        return {
+            "prompt_tokens": self.last_prompt_tokens,
+            "max_prompt_tokens": max(self.prompt_tokens_history, default=0),
+            "summary_tokens": estimate_tokens(self.summary),
+            "summarized_messages": self.summarized_count,
+            "summary_updates": self.summary_updates,
+        }
+    
+    def reset(self):
+        """요약 초기화"""
+        self.summary = ""
+        self.summarized_count = 0
+    
+    def _fold(self, history: List[Dict], upto: int, summarizer: Summarizer):
+        """history[summarized_count:upto]를 요약에 반영"""
+        upto = min(upto, len(history) - 1)
+        if upto <= self.summarized_count:
+            return
+        self.summary = summarizer(
+            self.summary, history[self.summarized_count:upto], self.summary_tokens
+        )
+        self.summarized_count = upto
+        self.summary_updates += 1
+    
+    @staticmethod
+    def _truncate(text: str, max_tokens: int) -> str:
+        """토큰 예산에 맞게 앞부분만 남김"""
+        while text and estimate_tokens(text) + MESSAGE_OVERHEAD_TOKENS > max_tokens:
+            text = text[:int(len(text) * 0.8)]
+        return text
+
+
+def create_conversation_memory() -> ConversationMemory:
+    """설정값으로 대화 메모리 생성"""
+    from config.settings import (
+        CHAT_MEMORY_TOKEN_BUDGET, CHAT_MEMORY_SUMMARY_EVERY, CHAT_MEMORY_SUMMARY_TOKENS
+    )
+    return ConversationMemory(
+        token_budget=CHAT_MEMORY_TOKEN_BUDGET,
+        summary_every=CHAT_MEMORY_SUMMARY_EVERY,
+        summary_tokens=CHAT_MEMORY_SUMMARY_TOKENS,
+    )
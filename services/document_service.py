@@ -4,30 +4,67 @@ Word 문서 생성 및 매핑
 """
 
 import streamlit as st
-from typing import Dict, List, Optional, Tuple
+from typing import BinaryIO, Callable, Dict, List, Optional, Tuple, Union
 from datetime import datetime
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+import hashlib
 import io
 import zipfile
 import os
 import json
+import time
+
+from services.docx_compiler import get_docx_compiler
+from services.label_matcher import LabelMatcher, get_label_matcher
+from services.package_store import PackageHandle, get_package_store
+from services.package_zip import (
+    MANIFEST_NAME, content_hash, open_previous_package, package_member, read_manifest
+)
+from services.render_cache import get_render_cache, render_key
+from services.template_cache import get_template_cache
 
 # python-docx (실제 배포 시 활성화)
 # from docx import Document
 # from docx.shared import Pt, Inches, Cm
 # from docx.enum.text import WD_ALIGN_PARAGRAPH
 
+# 기본 문서(_create_fallback_document)가 참조하는 사용자 정보 필드
+FALLBACK_USER_KEYS = (
+    "surname", "given_name", "birth_date", "nationality", "passport_no",
+    "alien_registration_no", "korea_address", "korea_phone", "email",
+)
+
 
 class DocumentService:
     """문서 서비스 클래스"""
     
-    def __init__(self):
-        """초기화"""
+    def __init__(self, max_workers: Optional[int] = None):
+        """
+        초기화
+        
+        Args:
+            max_workers: 패키지 생성 시 병렬 렌더링 워커 수 (기본값: 설정값)
+        """
+        from config.settings import DOCUMENT_RENDER_WORKERS
+        
         self.templates_dir = "templates"
+        self.max_workers = max(1, max_workers or DOCUMENT_RENDER_WORKERS)
+        self.last_render_report: Dict = {}
     
     def parse_document_structure(self, template_path: str) -> Dict:
-        """Word 템플릿의 구조를 파싱"""
+        """
+        Word 템플릿의 구조를 파싱
+        
+        실제 템플릿 파일이 있으면 프로세스 전역 구조 캐시에서 인덱스를
+        가져오므로, 템플릿 하나는 변경되기 전까지 한 번만 파싱됩니다.
+        """
         try:
-            # 개발용 목업
+            if os.path.exists(template_path):
+                return get_template_cache().get(template_path)
+            
+            # 개발용 목업 (템플릿 파일이 없는 경우)
             return {
                 "paragraphs": [
                     {"index": 0, "text": "통합신청서", "style": "Title"}
@@ -45,46 +82,51 @@ class DocumentService:
         except Exception as e:
             return {"error": str(e)}
     
-    def create_mapping_plan(self, structure: Dict, user_data: Dict) -> List[Dict]:
-        """AI 기반 문서 매핑 계획 생성"""
-        mappings = []
+    def create_mapping_plan(self, structure: Dict, user_data: Dict,
+                            doc_name: Optional[str] = None) -> List[Dict]:
+        """
+        AI 기반 문서 매핑 계획 생성
         
-        field_mapping = {
-            "surname": ["성", "Surname"],
-            "given_name": ["이름", "Given Name"],
-            "birth_date": ["생년월일", "Date of Birth"],
-            "gender": ["성별", "Gender"],
-            "nationality": ["국적", "Nationality"],
-            "passport_no": ["여권번호", "Passport No"],
-            "alien_registration_no": ["외국인등록번호", "Alien Registration"],
-            "korea_address": ["주소", "Address"],
-            "korea_phone": ["전화번호", "Phone"],
-            "email": ["이메일", "Email"]
-        }
+        라벨 해석(셀 → data_key)은 문서별로 컴파일된 LabelMatcher가 템플릿당
+        한 번만 수행하고, 여기서는 사용자 값만 채워 넣습니다.
         
-        for table in structure.get("tables", []):
-            for row_idx, row in enumerate(table.get("rows", [])):
-                if len(row) >= 2:
-                    label_text = row[0].get("text", "").strip()
-                    for data_key, label_variants in field_mapping.items():
-                        if any(v in label_text for v in label_variants):
-                            if data_key in user_data and user_data[data_key]:
-                                mappings.append({
-                                    "target_type": "table",
-                                    "table_index": table["index"],
-                                    "row": row_idx,
-                                    "cell": 1,
-                                    "value": str(user_data[data_key]),
-                                    "mode": "REPLACE"
-                                })
+        Args:
+            structure: parse_document_structure 결과
+            user_data: 사용자/폼/사연 통합 데이터
+            doc_name: 문서 이름 (매핑 가이드의 문서별 라벨 사용)
+            
+        Returns:
+            매핑 목록
+        """
+        mappings = []
+        
+        for target in get_label_matcher(doc_name).resolve(structure):
+            value = LabelMatcher.resolve_value(target["data_key"], user_data)
+            if value is not None:
+                mappings.append({
+                    "target_type": "table",
+                    "table_index": target["table_index"],
+                    "row": target["row"],
+                    "cell": target["cell"],
+                    "value": value,
+                    "mode": "REPLACE"
+                })
         
         return mappings
     
     def apply_mappings(self, template_path: str, mappings: List[Dict]) -> bytes:
-        """매핑을 적용하여 문서 생성"""
+        """
+        매핑을 적용하여 문서 생성
+        
+        실제 템플릿은 프로세스 전역 컴파일 캐시에서 한 번만 컴파일되고,
+        문서마다 document.xml 셀 슬롯만 채워 다시 조립합니다 (서식 유지,
+        나머지 ZIP 멤버는 재압축 없이 복사).
+        """
         try:
-            # 실제 배포 시 python-docx 사용
-            # 개발용 목업: 빈 바이트 반환
+            if os.path.exists(template_path):
+                return get_docx_compiler().render(template_path, mappings)
+            
+            # 개발용 목업 (템플릿 파일이 없는 경우)
             return self._create_mock_document(mappings)
         except Exception as e:
             st.error(f"문서 생성 오류: {str(e)}")
@@ -100,10 +142,38 @@ class DocumentService:
             content += f"{mapping.get('value', 'N/A')}\n"
         
         content += "\n" + "=" * 40
-        content += "\nGenerated at: " + datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         
         return content.encode('utf-8')
     
+    def document_key(self, doc_name: str, user_data: Dict,
+                     form_data: Dict, narrative_data: Dict) -> str:
+        """
+        문서 입력 키
+        
+        (문서, 템플릿 버전, 문서가 실제로 참조하는 데이터) 해시로, 렌더링
+        캐시와 증분 패키지 재생성에서 문서가 바뀌었는지 판단하는 데 씁니다.
+        """
+        from config.settings import DOCUMENT_TEMPLATES
+        
+        template_file = DOCUMENT_TEMPLATES.get(doc_name)
+        if not template_file:
+            return render_key(doc_name, "fallback", {
+                "user": {k: user_data.get(k) for k in FALLBACK_USER_KEYS},
+                "form": form_data,
+                "narrative": narrative_data,
+            })
+        
+        combined_data = {**user_data, **form_data, **narrative_data}
+        structure = self.parse_document_structure(os.path.join(self.templates_dir, template_file))
+        
+        # 템플릿이 실제로 참조하는 data_key만 키에 포함
+        referenced = {}
+        for target in get_label_matcher(doc_name).resolve(structure):
+            data_key = target["data_key"]
+            for k in (data_key if isinstance(data_key, tuple) else (data_key,)):
+                referenced[k] = combined_data.get(k)
+        return render_key(doc_name, structure.get("fingerprint", "mock"), referenced)
+    
     def generate_document(self, doc_name: str, user_data: Dict, 
                          form_data: Dict, narrative_data: Dict) -> bytes:
         """
@@ -117,21 +187,34 @@ class DocumentService:
             
         Returns:
             생성된 문서 바이트
+        
+        생성 결과는 document_key()로 렌더링 캐시에 저장되므로, 입력이
+        바뀌지 않은 문서는 재사용됩니다. 캐시된 바이트는 키만으로 정해져야
+        하므로 문서 본문에 생성 시각처럼 호출마다 달라지는 값을 넣지 않습니다
+        (생성 시각은 패키지 MANIFEST에 기록).
         """
         from config.settings import DOCUMENT_TEMPLATES
         
-        template_file = DOCUMENT_TEMPLATES.get(doc_name)
-        if not template_file:
-            return self._create_fallback_document(doc_name, user_data, form_data, narrative_data)
+        cache = get_render_cache()
+        key = self.document_key(doc_name, user_data, form_data, narrative_data)
         
-        template_path = os.path.join(self.templates_dir, template_file)
-        
-        combined_data = {**user_data, **form_data, **narrative_data}
+        doc_bytes = cache.get(key)
+        if doc_bytes is not None:
+            return doc_bytes
         
-        structure = self.parse_document_structure(template_path)
-        mappings = self.create_mapping_plan(structure, combined_data)
+        template_file = DOCUMENT_TEMPLATES.get(doc_name)
+        if not template_file:
+            doc_bytes = self._create_fallback_document(doc_name, user_data, form_data, narrative_data)
+        else:
+            template_path = os.path.join(self.templates_dir, template_file)
+            structure = self.parse_document_structure(template_path)
+            mappings = self.create_mapping_plan(
+                structure, {**user_data, **form_data, **narrative_data}, doc_name
+            )
+            doc_bytes = self.apply_mappings(template_path, mappings)
         
-        return self.apply_mappings(template_path, mappings)
+        cache.put(key, doc_bytes)
+        return doc_bytes
     
     def _create_fallback_document(self, doc_name: str, user_data: Dict,
                                   form_data: Dict, narrative_data: Dict) -> bytes:
@@ -169,14 +252,14 @@ class DocumentService:
             lines.append("")
         
         lines.append(f"{'='*60}")
-        lines.append(f"  생성일시: {datetime.now().strftime('%Y년 %m월 %d일 %H:%M')}")
         lines.append(f"  K-Stay - Korea Stay Assistant")
         lines.append(f"{'='*60}")
         
         return "\n".join(lines).encode('utf-8')
     
     def generate_full_package(self, scenario_id: str, user_data: Dict,
-                             form_data: Dict, narrative_data: Dict) -> bytes:
+                             form_data: Dict, narrative_data: Dict,
+                             previous: Optional[bytes] = None) -> bytes:
         """
         시나리오별 전체 문서 패키지 생성 (ZIP)
         
@@ -185,6 +268,7 @@ class DocumentService:
             user_data: 사용자 기본 정보
             form_data: 시나리오별 폼 데이터
             narrative_data: AI 검토된 사연 데이터
+            previous: 이전에 생성한 패키지 바이트 (바뀌지 않은 문서는 그대로 복사)
             
         Returns:
             ZIP 파일 바이트
@@ -197,38 +281,243 @@ class DocumentService:
             return b""
         
         zip_buffer = io.BytesIO()
+        self._write_package(zip_buffer, scenario, user_data, form_data, narrative_data,
+                            previous=io.BytesIO(previous) if previous else None)
+        return zip_buffer.getvalue()
+    
+    def write_package(self, target, scenario_id: str, user_data: Dict,
+                      form_data: Dict, narrative_data: Dict,
+                      previous: Union[None, str, BinaryIO] = None) -> Optional[str]:
+        """
+        시나리오별 전체 문서 패키지를 파일 객체에 기록 (일괄 생성 등 화면 밖 사용)
         
-        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-            for doc_name in scenario.required_docs:
-                try:
-                    doc_bytes = self.generate_document(
-                        doc_name, user_data, form_data, narrative_data
-                    )
-                    
-                    safe_name = doc_name.replace(' ', '_').replace('/', '_')
-                    filename = f"{safe_name}.txt"
-                    
-                    zip_file.writestr(filename, doc_bytes)
+        Args:
+            target: ZIP을 기록할 파일 객체 (읽기/쓰기 가능, seek 가능)
+            scenario_id: 시나리오 ID
+            user_data: 사용자 기본 정보
+            form_data: 시나리오별 폼 데이터
+            narrative_data: AI 검토된 사연 데이터
+            previous: 이전 패키지 경로/파일 객체 (바뀌지 않은 문서는 그대로 복사)
+            
+        Returns:
+            패키지 콘텐츠 해시 (유효하지 않은 시나리오면 None)
+        """
+        from config.settings import SCENARIOS
+        
+        scenario = SCENARIOS.get(scenario_id)
+        if not scenario:
+            return None
+        
+        return self._write_package(target, scenario, user_data, form_data, narrative_data,
+                                   previous=previous)
+    
+    def build_package(self, scenario_id: str, user_data: Dict,
+                      form_data: Dict, narrative_data: Dict,
+                      progress: Optional[Callable[[str, str, int, float], None]] = None,
+                      previous: Optional[PackageHandle] = None) -> Optional[PackageHandle]:
+        """
+        시나리오별 전체 문서 패키지를 패키지 저장소에 생성
+        
+        ZIP은 임시 파일에 문서 단위로 기록되므로, 세션에는 전체 바이트 대신
+        핸들만 보관하면 됩니다.
+        
+        Args:
+            scenario_id: 시나리오 ID
+            user_data: 사용자 기본 정보
+            form_data: 시나리오별 폼 데이터
+            narrative_data: AI 검토된 사연 데이터
+            progress: 문서가 ZIP에 기록될 때마다 호출
+                (문서 이름, ZIP 내 파일명, 바이트 수, 렌더링 소요 시간)
+            previous: 이전에 생성한 패키지 (입력이 같은 문서는 재렌더링/재압축 없이 복사)
+            
+        Returns:
+            패키지 핸들 (실패 시 None)
+        """
+        from config.settings import SCENARIOS
+        
+        scenario = SCENARIOS.get(scenario_id)
+        if not scenario:
+            st.error("유효하지 않은 시나리오입니다.")
+            return None
+        
+        # 저장소 키는 콘텐츠 해시: 입력이 같은 패키지는 파일 하나를 공유
+        with get_package_store().spool(scenario_id) as spool:
+            spool.digest = self._write_package(
+                spool.file, scenario, user_data, form_data, narrative_data, progress=progress,
+                previous=previous.path if previous is not None and previous.exists() else None
+            )
+        
+        return spool.handle
+    
+    def _write_package(self, target, scenario, user_data: Dict,
+                       form_data: Dict, narrative_data: Dict,
+                       progress: Optional[Callable[[str, str, int, float], None]] = None,
+                       previous: Union[None, str, BinaryIO] = None) -> str:
+        """
+        패키지 ZIP을 파일 객체에 문서 단위로 기록
+        
+        멤버마다 입력 키(document_key)를 ZipInfo 주석에 남기고, 이전 패키지
+        (previous)에 키가 같은 멤버가 있으면 다시 렌더링/압축하지 않고 압축된
+        바이트를 그대로 복사합니다. 재생성 시간은 바뀐 문서 수에 비례합니다.
+        
+        멤버는 시나리오 문서 순서 → README → MANIFEST 순으로, 고정 시각
+        (PACKAGE_EPOCH)으로 기록됩니다. 생성 시각은 MANIFEST에만 들어가므로
+        입력이 같으면 MANIFEST 앞까지의 바이트가 같습니다.
+        
+        Returns:
+            콘텐츠 해시 (MANIFEST를 제외한 멤버 바이트의 SHA-256)
+        """
+        started = time.perf_counter()
+        generated_at = datetime.now()
+        start = target.tell()
+        entries = []
+        timings: Dict[str, float] = {}
+        doc_names = scenario.required_docs
+        
+        keys = {doc_name: self._safe_document_key(doc_name, user_data, form_data, narrative_data)
+                for doc_name in doc_names}
+        readme_key = render_key("README.txt", "package", {"scenario": scenario.id, "docs": doc_names})
+        
+        source = open_previous_package(previous)
+        try:
+            reusable = {doc_name: source.find(keys[doc_name]) if source else None
+                        for doc_name in doc_names}
+            
+            rendered = self._render_documents(
+                [doc_name for doc_name in doc_names if reusable[doc_name] is None],
+                user_data, form_data, narrative_data
+            )
+            
+            with zipfile.ZipFile(target, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+                for doc_name in doc_names:
+                    member = reusable[doc_name]
+                    if member is not None:
+                        source.copy_to(zip_file, member)
+                        filename, size, elapsed = member.filename, member.file_size, 0.0
+                    else:
+                        _, filename, doc_bytes, elapsed = next(rendered)
+                        # 오류 문서는 키를 남기지 않아 다음에 다시 렌더링
+                        key = None if filename.startswith("ERROR_") else keys[doc_name]
+                        zip_file.writestr(package_member(filename, key), doc_bytes)
+                        size = len(doc_bytes)
                     
-                except Exception as e:
-                    error_content = f"문서 생성 오류: {str(e)}"
-                    zip_file.writestr(f"ERROR_{doc_name}.txt", error_content.encode('utf-8'))
+                    timings[doc_name] = elapsed
+                    entries.append({"document": doc_name, "filename": filename, "size": size,
+                                    "reused": member is not None})
+                    if progress is not None:
+                        progress(doc_name, filename, size, elapsed)
+                
+                readme = source.find(readme_key) if source else None
+                if readme is not None:
+                    source.copy_to(zip_file, readme)
+                else:
+                    readme_content = self._create_readme(scenario)
+                    zip_file.writestr(package_member("README.txt", readme_key),
+                                      readme_content.encode('utf-8'))
+                
+                digest = content_hash(target, start, target.tell())
+                manifest = {
+                    "scenario_id": scenario.id,
+                    "content_hash": digest,
+                    "generated_at": generated_at.isoformat(timespec="seconds"),
+                    "documents": entries,
+                }
+                zip_file.writestr(package_member(MANIFEST_NAME),
+                                  json.dumps(manifest, ensure_ascii=False, indent=2).encode('utf-8'))
+        finally:
+            if source is not None:
+                source.close()
+        
+        reused = [doc_name for doc_name, member in reusable.items() if member is not None]
+        self.last_render_report = {
+            "scenario_id": scenario.id,
+            "workers": min(self.max_workers, max(1, len(doc_names) - len(reused))),
+            "documents": timings,
+            "reused": reused,
+            "content_hash": digest,
+            "total_seconds": time.perf_counter() - started,
+            "render_cache": get_render_cache().stats(),
+        }
+        return digest
+    
+    def _safe_document_key(self, doc_name: str, user_data: Dict,
+                           form_data: Dict, narrative_data: Dict) -> Optional[str]:
+        """document_key (키를 만들 수 없으면 None → 항상 렌더링, 오류는 ERROR 문서로 기록)"""
+        try:
+            return self.document_key(doc_name, user_data, form_data, narrative_data)
+        except Exception:
+            return None
+    
+    def _render_documents(self, doc_names: List[str], user_data: Dict,
+                          form_data: Dict, narrative_data: Dict):
+        """
+        문서들을 렌더링하여 ZIP 기록 순서대로 반환 (제너레이터)
+        
+        워커 풀에서 병렬로 렌더링하되, 결과는 doc_names 순서대로 내보내므로
+        순차 생성과 동일한 ZIP이 만들어집니다. 동시에 진행 중인 문서는
+        워커 수만큼으로 제한되어, 메모리에 머무는 문서 수도 제한됩니다.
+        
+        Yields:
+            (문서 이름, ZIP 내 파일명, 문서 바이트, 렌더링 소요 시간(초))
+        """
+        workers = min(self.max_workers, len(doc_names))
+        
+        if workers <= 1:
+            for doc_name in doc_names:
+                yield (doc_name,) + self._render_package_entry(
+                    doc_name, user_data, form_data, narrative_data
+                )
+            return
+        
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="kstay-render") as pool:
+            pending = deque()
+            queued = iter(doc_names)
+            
+            for doc_name in islice(queued, workers):
+                pending.append((doc_name, pool.submit(
+                    self._render_package_entry, doc_name, user_data, form_data, narrative_data
+                )))
             
-            readme_content = self._create_readme(scenario, datetime.now())
-            zip_file.writestr("README.txt", readme_content.encode('utf-8'))
+            while pending:
+                doc_name, future = pending.popleft()
+                result = future.result()
+                
+                for next_name in islice(queued, 1):
+                    pending.append((next_name, pool.submit(
+                        self._render_package_entry, next_name, user_data, form_data, narrative_data
+                    )))
+                
+                yield (doc_name,) + result
+    
+    def _render_package_entry(self, doc_name: str, user_data: Dict,
+                              form_data: Dict, narrative_data: Dict) -> Tuple[str, bytes, float]:
+        """패키지에 들어갈 단일 문서 렌더링 (오류 시 ERROR 문서로 대체)"""
+        started = time.perf_counter()
+        try:
+            doc_bytes = self.generate_document(
+                doc_name, user_data, form_data, narrative_data
+            )
+            
+            safe_name = doc_name.replace(' ', '_').replace('/', '_')
+            extension = "docx" if doc_bytes[:4] == b"PK\x03\x04" else "txt"
+            filename = f"{safe_name}.{extension}"
         
-        zip_buffer.seek(0)
-        return zip_buffer.getvalue()
+        except Exception as e:
+            error_content = f"문서 생성 오류: {str(e)}"
+            filename = f"ERROR_{doc_name}.txt"
+            doc_bytes = error_content.encode('utf-8')
+        
+        return filename, doc_bytes, time.perf_counter() - started
     
-    def _create_readme(self, scenario, generated_at: datetime) -> str:
-        """README 파일 생성"""
+    def _create_readme(self, scenario) -> str:
+        """README 파일 생성 (생성 시각은 MANIFEST.json에 기록)"""
         lines = [
             "=" * 60,
             "K-Stay Document Package",
             "=" * 60,
             "",
             f"시나리오: {scenario.name} ({scenario.visa_type})",
-            f"생성일시: {generated_at.strftime('%Y년 %m월 %d일 %H:%M:%S')}",
+            f"생성 정보: {MANIFEST_NAME}",
             "",
             "포함된 문서:",
             "-" * 40,
@@ -306,8 +595,10 @@ class DocumentPreviewService:
             </div>
         """, unsafe_allow_html=True)
         
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"KStay_{scenario_name}_{timestamp}.zip"
+        # 콘텐츠 해시 기반 파일명: 같은 패키지는 다시 받아도 같은 이름
+        manifest = read_manifest(io.BytesIO(zip_bytes)) or {}
+        digest = manifest.get("content_hash") or hashlib.sha256(zip_bytes).hexdigest()
+        filename = f"KStay_{scenario_name}_{digest[:12]}.zip"
         
         col1, col2, col3 = st.columns([1, 2, 1])
         with col2:
@@ -0,0 +1,302 @@
+"""
+K-Stay Docx Template Compiler
+Word 템플릿 컴파일 (document.xml을 정적 바이트 조각 + 셀 슬롯으로 미리 분해)
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from xml.sax.saxutils import escape
+import io
+import os
+import re
+import threading
+import zipfile
+
+
+DOCUMENT_PART = "word/document.xml"
+
+# 태그 토큰 (주석/처리 명령/CDATA는 이름이 문자로 시작하지 않아 제외됨)
+_TAG = re.compile(rb"<(/?)([\w:.-]+)([^>]*?)(/?)>")
+_VAL = re.compile(rb'w:val="([^"]*)"')
+
+# XML 1.0에서 허용되지 않는 제어 문자 (탭/줄바꿈은 w:tab/w:br로 변환)
+_INVALID_XML = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+
+CellKey = Tuple[int, int, int]  # (table_index, row, cell)
+
+
+@dataclass
+class _Slot:
+    """값이 들어갈 셀 하나 (셀의 첫 문단부터 </w:tc> 직전까지를 대체)"""
+    head: bytes      # 첫 문단 여는 태그 + w:pPr (문단 서식 유지)
+    run_props: bytes  # 첫 런의 w:rPr (글자 서식 유지)
+    default: bytes   # 값이 없을 때 그대로 쓰는 원본 바이트
+    
+    def fill(self, value) -> bytes:
+        """값을 서식이 유지된 문단 하나로 렌더링"""
+        text = _INVALID_XML.sub("", str(value)).replace("\r\n", "\n").replace("\r", "\n")
+        parts = [self.head, b"<w:r>", self.run_props]
+        for i, line in enumerate(text.split("\n")):
+            if i:
+                parts.append(b"<w:br/>")
+            for j, chunk in enumerate(line.split("\t")):
+                if j:
+                    parts.append(b"<w:tab/>")
+                if chunk:
+                    parts.append(b'<w:t xml:space="preserve">')
+                    parts.append(escape(chunk).encode("utf-8"))
+                    parts.append(b"</w:t>")
+        parts.append(b"</w:r></w:p>")
+        return b"".join(parts)
+
+
+@dataclass
+class CompiledTemplate:
+    """
+    컴파일된 템플릿
+    
+    document.xml은 segments[0] + slot[0] + segments[1] + ... + segments[-1]
+    순서로 이어 붙이면 원본과 같아지고, 값이 있는 슬롯만 바뀝니다.
+    나머지 ZIP 멤버는 base에 압축된 상태로 들어 있어 렌더링 시 다시
+    압축하지 않고 그대로 복사됩니다.
+    """
+    signature: Tuple[int, int]
+    segments: List[bytes]
+    slots: List[_Slot]
+    cells: Dict[CellKey, int]  # (table, row, cell) → 슬롯 번호 (병합 셀은 같은 슬롯)
+    base: bytes                # document.xml을 제외한 템플릿 ZIP
+    document_info: zipfile.ZipInfo
+    
+    def render(self, mappings: List[Dict]) -> bytes:
+        """
+        매핑을 적용한 .docx 바이트 생성
+        
+        Args:
+            mappings: DocumentService.create_mapping_plan 결과 (table 대상만 적용)
+        
+        Returns:
+            .docx 바이트
+        """
+        values: Dict[int, object] = {}
+        for mapping in mappings:
+            if mapping.get("target_type") != "table":
+                continue
+            slot = self.cells.get((mapping["table_index"], mapping["row"], mapping["cell"]))
+            if slot is not None:
+                values[slot] = mapping.get("value", "")
+        
+        parts = [self.segments[0]]
+        for i, slot in enumerate(self.slots):
+            parts.append(slot.fill(values[i]) if i in values else slot.default)
+            parts.append(self.segments[i + 1])
+        
+        info = zipfile.ZipInfo(DOCUMENT_PART, date_time=self.document_info.date_time)
+        info.compress_type = zipfile.ZIP_DEFLATED
+        info.external_attr = self.document_info.external_attr
+        
+        # 추가 모드: 기존 멤버는 압축된 바이트 그대로 두고 document.xml과 중앙 디렉터리만 기록
+        buffer = io.BytesIO(self.base)
+        with zipfile.ZipFile(buffer, "a") as package:
+            package.writestr(info, b"".join(parts))
+        return buffer.getvalue()
+
+
+def compile_template(template_path: str) -> CompiledTemplate:
+    """
+    .docx 템플릿 컴파일
+    
+    본문 최상위 표의 셀 번호는 python-docx(document.tables, row.cells)와
+    같게 매깁니다: 가로 병합(gridSpan) 셀은 차지하는 칸 수만큼 반복되고,
+    세로 병합의 이어지는 셀(vMerge)은 위쪽 셀을 가리킵니다.
+    """
+    stat = os.stat(template_path)
+    
+    with zipfile.ZipFile(template_path) as source:
+        document_info = source.getinfo(DOCUMENT_PART)
+        xml = source.read(DOCUMENT_PART)
+        
+        base = io.BytesIO()
+        with zipfile.ZipFile(base, "w") as target:
+            for item in source.infolist():
+                if item.filename != DOCUMENT_PART:
+                    target.writestr(item, source.read(item.filename))
+    
+    ranges, cells = _scan(xml)
+    
+    segments = []
+    slots = []
+    position = 0
+    for start, end, head, run_props in ranges:
+        segments.append(xml[position:start])
+        slots.append(_Slot(head=head, run_props=run_props, default=xml[start:end]))
+        position = end
+    segments.append(xml[position:])
+    
+    return CompiledTemplate(
+        signature=(stat.st_mtime_ns, stat.st_size),
+        segments=segments,
+        slots=slots,
+        cells=cells,
+        base=base.getvalue(),
+        document_info=document_info,
+    )
+
+
+def _scan(xml: bytes):
+    """
+    document.xml에서 최상위 표 셀의 대체 범위 찾기
+    
+    Returns:
+        ([(시작, 끝, 문단 머리, 런 서식)], {(table, row, cell): 범위 번호})
+    """
+    ranges: List[Tuple[int, int, bytes, bytes]] = []
+    cells: Dict[CellKey, int] = {}
+    
+    stack: List[Tuple[bytes, int]] = []  # (요소 이름, 여는 태그 시작 위치)
+    tbl_depth = tr_depth = tc_depth = p_depth = r_depth = None
+    table_index = row_index = cell_index = -1
+    offset = 0  # 행 안에서의 격자 열 위치
+    prev_grid: Dict[int, Optional[int]] = {}
+    grid: Dict[int, Optional[int]] = {}
+    tc: Dict = {}
+    
+    for match in _TAG.finditer(xml):
+        closing, name, attrs, self_closing = match.groups()
+        
+        if not closing:
+            depth = len(stack)
+            parent = stack[-1][0] if stack else b""
+            
+            if name == b"w:tbl" and parent == b"w:body":
+                tbl_depth = depth
+                table_index += 1
+                row_index = -1
+                prev_grid = {}
+            elif name == b"w:tr" and tbl_depth is not None and depth == tbl_depth + 1:
+                tr_depth = depth
+                row_index += 1
+                cell_index = 0
+                offset = 0
+                grid = {}
+            elif name == b"w:gridBefore" and tr_depth is not None and depth == tr_depth + 2:
+                offset = _int_val(attrs)
+            elif name == b"w:tc" and tr_depth is not None and depth == tr_depth + 1:
+                tc_depth = depth
+                tc = {"span": 1, "continue": False, "start": None, "head": b"",
+                      "pPr": b"", "rPr": b"", "first_run": True}
+            elif tc_depth is not None and depth == tc_depth + 2 and parent == b"w:tcPr":
+                if name == b"w:gridSpan":
+                    tc["span"] = max(1, _int_val(attrs))
+                elif name == b"w:vMerge":
+                    value = _VAL.search(attrs)
+                    tc["continue"] = value is None or value.group(1) == b"continue"
+            elif name == b"w:p" and tc_depth is not None and depth == tc_depth + 1 \
+                    and tc["start"] is None:
+                tc["start"] = match.start()
+                tc["head"] = match.group(0)[:-2] + b">" if self_closing else match.group(0)
+                p_depth = None if self_closing else depth
+            elif name == b"w:r" and p_depth is not None and depth == p_depth + 1 \
+                    and tc["first_run"]:
+                tc["first_run"] = False
+                r_depth = None if self_closing else depth
+            
+            if not self_closing:
+                stack.append((name, match.start()))
+            continue
+        
+        # 닫는 태그: 이름이 맞는 요소까지 꺼냄
+        start = match.start()
+        while stack:
+            top, start = stack.pop()
+            if top == name:
+                break
+        depth = len(stack)
+        
+        if name == b"w:pPr" and p_depth is not None and depth == p_depth + 1:
+            tc["pPr"] = xml[start:match.end()]
+        elif name == b"w:rPr" and r_depth is not None and depth == r_depth + 1:
+            tc["rPr"] = xml[start:match.end()]
+        elif name == b"w:r" and depth == r_depth:
+            r_depth = None
+        elif name == b"w:p" and depth == p_depth:
+            p_depth = None
+        elif name == b"w:tc" and depth == tc_depth:
+            tc_depth = None
+            if tc["continue"]:
+                slot = prev_grid.get(offset)
+            elif tc["start"] is not None:
+                slot = len(ranges)
+                ranges.append((tc["start"], match.start(), tc["head"] + tc["pPr"], tc["rPr"]))
+            else:
+                slot = None
+            for _ in range(tc["span"]):
+                grid[offset] = slot
+                if slot is not None:
+                    cells[(table_index, row_index, cell_index)] = slot
+                offset += 1
+                cell_index += 1
+        elif name == b"w:tr" and depth == tr_depth:
+            tr_depth = None
+            prev_grid = grid
+        elif name == b"w:tbl" and depth == tbl_depth:
+            tbl_depth = None
+    
+    return ranges, cells
+
+
+def _int_val(attrs: bytes) -> int:
+    value = _VAL.search(attrs)
+    try:
+        return int(value.group(1)) if value else 0
+    except ValueError:
+        return 0
+
+
+class DocxTemplateCompiler:
+    """
+    템플릿 컴파일 캐시
+    
+    DOCUMENT_TEMPLATES의 템플릿마다 한 번만 컴파일하고, 사용자별 렌더링은
+    슬롯 값 치환 + 조각 이어 붙이기 + 나머지 멤버 원본 복사만 수행합니다.
+    템플릿 파일의 (mtime, size)가 바뀌면 다시 컴파일합니다.
+    """
+    
+    def __init__(self):
+        self._compiled: Dict[str, CompiledTemplate] = {}
+        self._lock = threading.Lock()
+        self.compiles = 0
+    
+    def get(self, template_path: str) -> CompiledTemplate:
+        """컴파일된 템플릿 조회 (없거나 파일이 바뀌었으면 컴파일)"""
+        path = os.path.abspath(template_path)
+        stat = os.stat(path)
+        
+        with self._lock:
+            compiled = self._compiled.get(path)
+        if compiled is not None and compiled.signature == (stat.st_mtime_ns, stat.st_size):
+            return compiled
+        
+        compiled = compile_template(path)
+        with self._lock:
+            self._compiled[path] = compiled
+            self.compiles += 1
+        return compiled
+    
+    def render(self, template_path: str, mappings: List[Dict]) -> bytes:
+        """템플릿에 매핑을 적용한 .docx 바이트"""
+        return self.get(template_path).render(mappings)
+
+
+_docx_compiler: Optional[DocxTemplateCompiler] = None
+_docx_compiler_lock = threading.Lock()
+
+
+def get_docx_compiler() -> DocxTemplateCompiler:
+    """프로세스 전역 템플릿 컴파일 캐시"""
+    global _docx_compiler
+    
+    if _docx_compiler is None:
+        with _docx_compiler_lock:
+            if _docx_compiler is None:
+                _docx_compiler = DocxTemplateCompiler()
+    return _docx_compiler
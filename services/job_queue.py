@@ -0,0 +1,453 @@
+"""
+K-Stay Job Queue
+문서 패키지 생성 백그라운드 작업 (SQLite 상태 저장 + 프로세스 풀 렌더링)
+"""
+
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import closing
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+import contextvars
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+
+from services.llm_scheduler import llm_priority
+from services.package_store import PackageHandle, get_package_store
+
+
+# 작업 상태 (scenario_submissions.status와 같은 방식의 문자열)
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+# 작업 단계
+STAGE_NARRATIVE = "narrative"   # 사연 생성/검증 (LLM)
+STAGE_DOCUMENTS = "documents"   # 문서 렌더링 + ZIP 기록
+
+# database/schema.sql의 scenario_submissions / generated_documents를 본뜬 로컬 테이블
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS package_jobs (
+    id TEXT PRIMARY KEY,
+    user_id TEXT,
+    
+    scenario_id TEXT NOT NULL,
+    scenario_name TEXT,
+    visa_type TEXT,
+    
+    form_data TEXT DEFAULT '{}',
+    narrative_data TEXT DEFAULT '{}',
+    
+    status TEXT DEFAULT 'queued', -- 'queued', 'running', 'done', 'failed'
+    stage TEXT,                   -- 'narrative', 'documents'
+    progress_done INTEGER DEFAULT 0,
+    progress_total INTEGER DEFAULT 0,
+    
+    package_digest TEXT,          -- 패키지 저장소 다이제스트
+    file_size INTEGER,
+    error TEXT,
+    
+    owner TEXT,                   -- 작업을 실행하는 프로세스 (호스트:pid:부팅 ID)
+    heartbeat_at REAL,            -- 소유 프로세스가 마지막으로 살아 있음을 알린 시각
+    
+    created_at REAL,
+    updated_at REAL,
+    started_at REAL,
+    completed_at REAL
+);
+
+CREATE TABLE IF NOT EXISTS job_documents (
+    job_id TEXT REFERENCES package_jobs(id) ON DELETE CASCADE,
+    document_name TEXT NOT NULL,
+    document_type TEXT,           -- 'docx', 'txt'
+    file_size INTEGER,
+    elapsed REAL,
+    created_at REAL,
+    PRIMARY KEY (job_id, document_name)
+);
+
+CREATE INDEX IF NOT EXISTS idx_package_jobs_status ON package_jobs(status);
+CREATE INDEX IF NOT EXISTS idx_package_jobs_user_id ON package_jobs(user_id);
+"""
+
+_JSON_COLUMNS = ("form_data", "narrative_data")
+
+# 이전 버전 DB에 없는 열 (시작 시 ALTER TABLE로 추가)
+_ADDED_COLUMNS = {"owner": "TEXT", "heartbeat_at": "REAL"}
+
+INTERRUPTED_ERROR = "서버가 다시 시작되어 작업이 중단되었습니다. 문서를 다시 생성해주세요."
+
+
+class JobStore:
+    """
+    작업 상태 저장소 (SQLite)
+    
+    Streamlit 프로세스와 렌더링 프로세스가 같은 파일을 공유하므로 WAL 모드로
+    열고, 호출마다 짧은 연결을 사용합니다. 사용자 기본 정보(여권번호 등)는
+    저장하지 않고 작업 실행 시 메모리로만 전달합니다.
+    """
+    
+    def __init__(self, path: str):
+        """
+        초기화
+        
+        Args:
+            path: SQLite 파일 경로
+        """
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            existing = {row["name"] for row in conn.execute("PRAGMA table_info(package_jobs)")}
+            for column, column_type in _ADDED_COLUMNS.items():
+                if column not in existing:
+                    conn.execute(f"ALTER TABLE package_jobs ADD COLUMN {column} {column_type}")
+            conn.commit()
+    
+    def create(self, job_id: str, scenario, form_data: Dict, user_id: Optional[str] = None,
+               owner: Optional[str] = None):
+        """대기 상태의 작업 등록 (owner: 작업을 실행할 프로세스)"""
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT INTO package_jobs (id, user_id, scenario_id, scenario_name, visa_type, "
+                "form_data, status, progress_total, owner, heartbeat_at, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, user_id, scenario.id, scenario.name, scenario.visa_type,
+                 json.dumps(form_data, ensure_ascii=False, default=str), JOB_QUEUED,
+                 len(scenario.required_docs), owner, now, now, now),
+            )
+    
+    def update(self, job_id: str, **fields):
+        """작업 필드 갱신 (form_data/narrative_data는 딕셔너리로 전달)"""
+        for column in _JSON_COLUMNS:
+            if column in fields:
+                fields[column] = json.dumps(fields[column], ensure_ascii=False, default=str)
+        fields["updated_at"] = time.time()
+        
+        assignments = ", ".join(f"{column} = ?" for column in fields)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                f"UPDATE package_jobs SET {assignments} WHERE id = ?",
+                (*fields.values(), job_id),
+            )
+    
+    def add_document(self, job_id: str, document_name: str, document_type: str,
+                     file_size: int, elapsed: float):
+        """문서 하나가 패키지에 기록됨 (진행률 갱신)"""
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO job_documents "
+                "(job_id, document_name, document_type, file_size, elapsed, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, document_name, document_type, file_size, elapsed, now),
+            )
+            conn.execute(
+                "UPDATE package_jobs SET updated_at = ?, progress_done = "
+                "(SELECT COUNT(*) FROM job_documents WHERE job_id = ?) WHERE id = ?",
+                (now, job_id, job_id),
+            )
+    
+    def get(self, job_id: str) -> Optional[Dict]:
+        """
+        작업 조회
+        
+        Returns:
+            package_jobs 행 딕셔너리 + documents(기록된 문서 목록, 기록 순). 없으면 None
+        """
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT * FROM package_jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return None
+            documents = conn.execute(
+                "SELECT document_name, document_type, file_size, elapsed FROM job_documents "
+                "WHERE job_id = ? ORDER BY created_at", (job_id,)
+            ).fetchall()
+        
+        job = dict(row)
+        for column in _JSON_COLUMNS:
+            job[column] = json.loads(job[column] or "{}")
+        job["documents"] = [dict(d) for d in documents]
+        return job
+    
+    def heartbeat(self, owner: str) -> int:
+        """owner가 실행 중인 작업이 살아 있음을 기록"""
+        with closing(self._connect()) as conn, conn:
+            cursor = conn.execute(
+                "UPDATE package_jobs SET heartbeat_at = ? WHERE owner = ? AND status IN (?, ?)",
+                (time.time(), owner, JOB_QUEUED, JOB_RUNNING),
+            )
+            return cursor.rowcount
+    
+    def fail_stale(self, stale_after: float, job_id: Optional[str] = None) -> int:
+        """
+        소유 프로세스가 사라진 작업을 실패로 표시
+        
+        같은 DB를 여러 레플리카/Streamlit 워커가 공유하므로, 시작한 프로세스와
+        상관없이 heartbeat가 stale_after초 넘게 갱신되지 않은 작업만 대상으로
+        합니다. job_id를 주면 그 작업만 확인합니다.
+        
+        Returns:
+            실패로 표시한 작업 수
+        """
+        now = time.time()
+        query = ("UPDATE package_jobs SET status = ?, error = ?, updated_at = ?, completed_at = ? "
+                 "WHERE status IN (?, ?) AND COALESCE(heartbeat_at, updated_at) < ?")
+        params = [JOB_FAILED, INTERRUPTED_ERROR, now, now, JOB_QUEUED, JOB_RUNNING, now - stale_after]
+        if job_id is not None:
+            query += " AND id = ?"
+            params.append(job_id)
+        with closing(self._connect()) as conn, conn:
+            return conn.execute(query, params).rowcount
+    
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+
+@lru_cache(maxsize=None)
+def _store_for(path: str) -> JobStore:
+    """렌더링 프로세스용 저장소 (프로세스마다 한 번 생성)"""
+    return JobStore(path)
+
+
+def render_package(store_path: str, job_id: str, scenario_id: str, user_data: Dict,
+                   form_data: Dict, narrative_data: Dict,
+                   previous: Optional[PackageHandle] = None) -> Tuple[str, int]:
+    """
+    패키지 렌더링 (렌더링 프로세스에서 실행)
+    
+    문서가 ZIP에 기록될 때마다 job_documents에 진행 상황을 남깁니다.
+    previous가 있으면 입력이 바뀐 문서만 다시 렌더링합니다.
+    
+    Returns:
+        (패키지 다이제스트, 크기)
+    """
+    from services.document_service import DocumentService
+    
+    store = _store_for(store_path)
+    
+    def progress(doc_name: str, filename: str, size: int, elapsed: float):
+        store.add_document(job_id, doc_name, filename.rsplit(".", 1)[-1], size, elapsed)
+    
+    handle = DocumentService().build_package(
+        scenario_id, user_data, form_data, narrative_data, progress=progress, previous=previous
+    )
+    if handle is None:
+        raise ValueError("유효하지 않은 시나리오입니다.")
+    return handle.digest, handle.size
+
+
+class PackageJobQueue:
+    """
+    패키지 생성 작업 대기열
+    
+    "인터뷰 종료 및 문서 생성"은 작업을 등록만 하고 바로 반환되며, 작업은
+    workers개의 작업 스레드에서 실행됩니다. 사연 생성/검증(LLM 대기)은
+    프로세스 전역 LLM 스케줄러를 공유하도록 작업 스레드에서, CPU를 쓰는
+    문서 렌더링과 ZIP 기록은 render_processes개의 별도 프로세스에서
+    실행됩니다. 상태와 문서별 진행 상황은 JobStore에 기록되어 미리보기
+    페이지가 작업 ID로 조회합니다.
+    """
+    
+    def __init__(self, store: JobStore, workers: int = 2, render_processes: int = 2,
+                 heartbeat_seconds: float = 10, stale_seconds: float = 60):
+        """
+        초기화
+        
+        Args:
+            store: 작업 상태 저장소
+            workers: 동시에 실행할 작업 수
+            render_processes: 렌더링 프로세스 수 (0이면 작업 스레드에서 렌더링)
+            heartbeat_seconds: 실행 중인 작업의 heartbeat 기록 간격 (초)
+            stale_seconds: heartbeat가 이 시간 넘게 없으면 중단된 작업으로 처리 (초)
+        """
+        self.store = store
+        self.workers = max(1, workers)
+        self.render_processes = render_processes
+        self.heartbeat_seconds = heartbeat_seconds
+        self.stale_seconds = max(stale_seconds, heartbeat_seconds * 3)
+        # 이 대기열 인스턴스 ID (같은 pid가 재사용되어도 구분되도록 부팅 ID 포함)
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        
+        self._threads = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="kstay-job")
+        self._processes: Optional[ProcessPoolExecutor] = None
+        self._futures: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        
+        self._heartbeat_thread = threading.Thread(
+            target=self._heartbeat_loop, name="kstay-job-heartbeat", daemon=True
+        )
+        self._heartbeat_thread.start()
+    
+    def submit(self, scenario, user_data: Dict, form_data: Dict,
+               drafts: Optional[Dict[str, str]] = None,
+               chat_history: Optional[List[Dict]] = None,
+               ai_service=None, user_id: Optional[str] = None,
+               is_paid: bool = False, previous: Optional[PackageHandle] = None) -> str:
+        """
+        패키지 생성 작업 등록
+        
+        Args:
+            scenario: 시나리오 객체
+            user_data: 사용자 기본 정보 (저장하지 않음)
+            form_data: 시나리오별 폼 데이터
+            drafts: 사용자 사연 초안 (field_name → 텍스트)
+            chat_history: 인터뷰 대화 기록
+            ai_service: 사연 생성에 사용할 AIService (기본값: 프로세스 전역 서비스)
+            user_id: 사용자 ID
+            is_paid: 결제 사용자 여부 (LLM 대기열 우선순위)
+            previous: 이 사용자가 이전에 생성한 패키지 (증분 재생성)
+        
+        Returns:
+            작업 ID
+        """
+        job_id = uuid.uuid4().hex
+        self.store.create(job_id, scenario, form_data, user_id, owner=self.owner)
+        
+        context = contextvars.copy_context()
+        future = self._threads.submit(
+            context.run, self._run, job_id, scenario, dict(user_data), dict(form_data),
+            dict(drafts or {}), list(chat_history or []), ai_service, is_paid, previous
+        )
+        with self._lock:
+            self._futures[job_id] = future
+        future.add_done_callback(lambda _: self._forget(job_id))
+        return job_id
+    
+    def status(self, job_id: str) -> Optional[Dict]:
+        """작업 상태 조회 (JobStore.get 참고, 소유 프로세스가 사라진 작업은 실패로 표시)"""
+        job = self.store.get(job_id)
+        if job and job["status"] in (JOB_QUEUED, JOB_RUNNING) \
+                and self.store.fail_stale(self.stale_seconds, job_id):
+            job = self.store.get(job_id)
+        return job
+    
+    def handle(self, job_id: str) -> Optional[PackageHandle]:
+        """완료된 작업의 패키지 핸들 (미완료/실패/만료 시 None)"""
+        job = self.store.get(job_id)
+        if not job or job["status"] != JOB_DONE or not job["package_digest"]:
+            return None
+        return get_package_store().get(job["package_digest"], job["scenario_id"])
+    
+    def metrics(self) -> Dict[str, int]:
+        """실행 중/대기 중인 작업 수 (이 프로세스 기준)"""
+        with self._lock:
+            active = len(self._futures)
+        return {"active": active, "workers": self.workers, "render_processes": self.render_processes}
+    
+    def _run(self, job_id: str, scenario, user_data: Dict, form_data: Dict,
+             drafts: Dict[str, str], chat_history: List[Dict], ai_service, is_paid: bool,
+             previous: Optional[PackageHandle]):
+        """작업 실행 (작업 스레드)"""
+        from services.narrative_batch import prepare_narrative_bundle_sync
+        
+        try:
+            self.store.update(job_id, status=JOB_RUNNING, stage=STAGE_NARRATIVE, started_at=time.time())
+            
+            with llm_priority(is_paid):
+                bundle = prepare_narrative_bundle_sync(
+                    scenario, {**user_data, **form_data}, drafts, ai_service=ai_service
+                )
+            if bundle.errors:
+                # 생성/검증에 실패한 사연으로는 패키지를 만들지 않음
+                raise RuntimeError("; ".join(bundle.errors.values()))
+            self.store.update(job_id, stage=STAGE_DOCUMENTS, narrative_data=bundle.narrative_data)
+            
+            digest, size = self._render(
+                job_id, scenario.id, user_data, form_data,
+                {'chat_history': chat_history, **bundle.narrative_data}, previous
+            )
+            self.store.update(
+                job_id, status=JOB_DONE, stage=None, package_digest=digest,
+                file_size=size, completed_at=time.time()
+            )
+        except Exception as e:
+            self.store.update(job_id, status=JOB_FAILED, error=str(e) or type(e).__name__,
+                              completed_at=time.time())
+    
+    def _render(self, job_id: str, scenario_id: str, user_data: Dict, form_data: Dict,
+                narrative_data: Dict, previous: Optional[PackageHandle]) -> Tuple[str, int]:
+        """렌더링 프로세스에서 패키지 생성 (프로세스를 쓸 수 없으면 현재 스레드에서)"""
+        args = (self.store.path, job_id, scenario_id, user_data, form_data, narrative_data, previous)
+        
+        pool = self._get_processes()
+        if pool is None:
+            return render_package(*args)
+        
+        try:
+            return pool.submit(render_package, *args).result()
+        except BrokenProcessPool:
+            # 렌더링 프로세스가 비정상 종료되면 다음 작업을 위해 풀을 새로 만듦
+            with self._lock:
+                if self._processes is pool:
+                    self._processes = None
+            raise
+    
+    def _get_processes(self) -> Optional[ProcessPoolExecutor]:
+        if self.render_processes <= 0:
+            return None
+        with self._lock:
+            if self._processes is None:
+                try:
+                    # Streamlit 프로세스는 스레드가 많으므로 fork 대신 spawn 사용
+                    self._processes = ProcessPoolExecutor(
+                        max_workers=self.render_processes,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+                except (OSError, NotImplementedError):
+                    # 프로세스를 만들 수 없는 환경: 작업 스레드에서 렌더링
+                    self.render_processes = 0
+                    return None
+            return self._processes
+    
+    def _forget(self, job_id: str):
+        with self._lock:
+            self._futures.pop(job_id, None)
+    
+    def _heartbeat_loop(self):
+        """이 프로세스가 실행 중인 작업의 heartbeat 기록 (데몬 스레드)"""
+        while True:
+            time.sleep(self.heartbeat_seconds)
+            with self._lock:
+                active = bool(self._futures)
+            if active:
+                try:
+                    self.store.heartbeat(self.owner)
+                except sqlite3.Error:
+                    pass  # 다음 주기에 다시 기록
+
+
+_job_queue: Optional[PackageJobQueue] = None
+_job_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> PackageJobQueue:
+    """프로세스 전역 패키지 생성 작업 대기열"""
+    global _job_queue
+    
+    if _job_queue is None:
+        with _job_queue_lock:
+            if _job_queue is None:
+                from config.settings import (
+                    JOB_STORE_PATH, JOB_WORKERS, JOB_RENDER_PROCESSES,
+                    JOB_HEARTBEAT_SECONDS, JOB_STALE_SECONDS
+                )
+                _job_queue = PackageJobQueue(
+                    JobStore(JOB_STORE_PATH), JOB_WORKERS, JOB_RENDER_PROCESSES,
+                    JOB_HEARTBEAT_SECONDS, JOB_STALE_SECONDS
+                )
+                # 다른 프로세스가 실행 중인 작업은 heartbeat가 끊긴 경우에만 실패 처리
+                _job_queue.store.fail_stale(_job_queue.stale_seconds)
+    return _job_queue
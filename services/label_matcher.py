@@ -0,0 +1,226 @@
+"""
+K-Stay Label Matcher
+템플릿 라벨 셀 → 데이터 필드 매칭 (Aho-Corasick)
+"""
+
+from bisect import bisect_right
+from collections import deque
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple, Union
+import threading
+
+
+# 모든 문서에 공통으로 적용되는 라벨 (data_key → 라벨 변형)
+GENERIC_FIELD_LABELS = {
+    "surname": ["성", "Surname"],
+    "given_name": ["이름", "Given Name"],
+    "birth_date": ["생년월일", "Date of Birth"],
+    "gender": ["성별", "Gender"],
+    "nationality": ["국적", "Nationality"],
+    "passport_no": ["여권번호", "Passport No"],
+    "alien_registration_no": ["외국인등록번호", "Alien Registration"],
+    "korea_address": ["주소", "Address"],
+    "korea_phone": ["전화번호", "Phone"],
+    "email": ["이메일", "Email"]
+}
+
+# 라벨 셀 결합 시 구분자 (라벨 텍스트에 나오지 않는 문자)
+_SEPARATOR = "\x00"
+
+DataKey = Union[str, Tuple[str, ...]]
+
+
+def _normalize(text: str) -> str:
+    """공백 차이("성명 (한글)" / "성명(한글)")를 무시하도록 정규화"""
+    return "".join(text.split())
+
+
+class AhoCorasick:
+    """다중 패턴 부분 문자열 검색 오토마톤"""
+    
+    def __init__(self, patterns: Dict[str, List[int]]):
+        """
+        오토마톤 컴파일
+        
+        Args:
+            patterns: 패턴 문자열 → 매칭 시 보고할 값 목록
+        """
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, int]]] = [[]]
+        
+        for pattern, payloads in patterns.items():
+            if not pattern:
+                continue
+            node = 0
+            for ch in pattern:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                node = nxt
+            self._out[node].extend((len(pattern), p) for p in payloads)
+        
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+    
+    def iter_matches(self, text: str):
+        """
+        텍스트 전체를 한 번 훑으며 모든(겹치는) 매칭을 반환
+        
+        Yields:
+            (매칭 시작 위치, 값)
+        """
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+            for length, payload in self._out[node]:
+                yield i - length + 1, payload
+
+
+class LabelMatcher:
+    """
+    문서별 라벨 매처
+    
+    공통 라벨(GENERIC_FIELD_LABELS)과 매핑 가이드의 문서별 라벨을 하나의
+    Aho-Corasick 오토마톤으로 컴파일하고, 템플릿의 모든 라벨 셀을 한 번에
+    훑어 (table, row, cell) → data_key 계획을 만듭니다. 계획은 템플릿
+    지문(fingerprint)별로 캐시되어, 사용자별 작업은 값 치환만 남습니다.
+    """
+    
+    def __init__(self, fields: List[Tuple[DataKey, List[str]]]):
+        """
+        초기화
+        
+        Args:
+            fields: (data_key, 라벨 변형 목록) 우선순위 순서 목록.
+                data_key가 튜플이면 여러 값을 공백으로 이어 붙입니다.
+        """
+        self.data_keys: List[DataKey] = []
+        patterns: Dict[str, List[int]] = {}
+        
+        for data_key, labels in fields:
+            if data_key in self.data_keys:
+                priority = self.data_keys.index(data_key)
+            else:
+                priority = len(self.data_keys)
+                self.data_keys.append(data_key)
+            for label in labels:
+                key = _normalize(label)
+                if key and priority not in patterns.setdefault(key, []):
+                    patterns[key].append(priority)
+        
+        self._automaton = AhoCorasick(patterns)
+        self._plans: Dict[str, List[Dict]] = {}
+        self._lock = threading.Lock()
+    
+    def resolve(self, structure: Dict) -> List[Dict]:
+        """
+        템플릿 구조의 라벨 셀을 data_key로 해석 (사용자 데이터 무관)
+        
+        Args:
+            structure: parse_document_structure 결과
+        
+        Returns:
+            [{"table_index", "row", "cell", "data_key"}, ...]
+        """
+        fingerprint = structure.get("fingerprint")
+        if fingerprint:
+            with self._lock:
+                plan = self._plans.get(fingerprint)
+            if plan is not None:
+                return plan
+        
+        cells = list(self._label_cells(structure))
+        text_parts = []
+        starts = []
+        offset = 0
+        for _, _, _, label in cells:
+            starts.append(offset)
+            normalized = _normalize(label)
+            text_parts.append(normalized)
+            offset += len(normalized) + 1
+        
+        matched: Dict[int, set] = {}
+        for position, priority in self._automaton.iter_matches(_SEPARATOR.join(text_parts)):
+            matched.setdefault(bisect_right(starts, position) - 1, set()).add(priority)
+        
+        plan = []
+        for cell_idx, (table_index, row, cell, _) in enumerate(cells):
+            for priority in sorted(matched.get(cell_idx, ())):
+                plan.append({
+                    "table_index": table_index,
+                    "row": row,
+                    "cell": cell,
+                    "data_key": self.data_keys[priority],
+                })
+        
+        if fingerprint:
+            with self._lock:
+                self._plans[fingerprint] = plan
+        return plan
+    
+    @staticmethod
+    def _label_cells(structure: Dict):
+        """
+        라벨 셀 목록 (table_index, row, 입력 셀 index, 라벨 텍스트)
+        
+        각 행의 첫 셀은 항상 라벨로 보고, 그 밖의 셀은 오른쪽 셀이 비어 있을 때
+        라벨로 봅니다 (예: "성명(한글) | _ | 성명(영문) | _").
+        """
+        for table in structure.get("tables", []):
+            for row_idx, row in enumerate(table.get("rows", [])):
+                if len(row) < 2:
+                    continue
+                for cell_idx in range(len(row) - 1):
+                    label_text = row[cell_idx].get("text", "").strip()
+                    if cell_idx > 0 and (not label_text or row[cell_idx + 1].get("text", "").strip()):
+                        continue
+                    yield table["index"], row_idx, cell_idx + 1, label_text
+    
+    @staticmethod
+    def resolve_value(data_key: DataKey, data: Dict) -> Optional[str]:
+        """data_key에 해당하는 값 (없으면 None)"""
+        if isinstance(data_key, tuple):
+            parts = [str(data[k]) for k in data_key if data.get(k)]
+            return " ".join(parts) if parts else None
+        if data.get(data_key):
+            return str(data[data_key])
+        return None
+
+
+@lru_cache(maxsize=None)
+def get_label_matcher(doc_name: Optional[str] = None) -> LabelMatcher:
+    """
+    문서별 라벨 매처 (프로세스 전역, 문서당 1회 컴파일)
+    
+    Args:
+        doc_name: 문서 이름 (매핑 가이드에 있으면 문서별 라벨 추가)
+    """
+    from templates.mapping_guide import ALL_DOCUMENT_MAPPINGS
+    
+    fields: List[Tuple[DataKey, List[str]]] = list(GENERIC_FIELD_LABELS.items())
+    
+    mapping = ALL_DOCUMENT_MAPPINGS.get(doc_name) if doc_name else None
+    if mapping:
+        for section in mapping.get("sections", {}).values():
+            for field in section.get("fields", []):
+                data_key = field["data_key"]
+                if isinstance(data_key, list):
+                    data_key = tuple(data_key)
+                fields.append((data_key, [field["label"]]))
+    
+    return LabelMatcher(fields)
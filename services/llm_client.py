@@ -0,0 +1,227 @@
+"""
+K-Stay LLM Client
+프로세스 전역 LLM 클라이언트 (커넥션 풀 + keep-alive + 동시 요청 제한)
+"""
+
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+import threading
+import time
+
+from services.llm_scheduler import LLMScheduler, get_llm_scheduler
+
+try:
+    import httpx
+    from openai import OpenAI
+except ImportError:  # 개발 환경에서는 openai 없이도 동작 (목업 응답 사용)
+    httpx = None
+    OpenAI = None
+
+
+# scripts/llm_stub_server.py 기본 주소
+STUB_BASE_URL = "http://127.0.0.1:8765/v1"
+
+
+class LLMClientManager:
+    """
+    LLM 클라이언트 관리자
+    
+    하나의 OpenAI 클라이언트와 httpx 커넥션 풀을 모든 Streamlit 세션과
+    스레드가 공유하므로, 대화마다 TCP/TLS 연결을 새로 맺지 않습니다.
+    slot()은 스케줄러의 분당 요청/토큰 한도를 통과한 뒤 동시 요청 수를
+    제한하고, 풀 사용률/대기 시간 지표를 모읍니다.
+    """
+    
+    def __init__(self, api_key: str, max_connections: int = 20,
+                 max_keepalive_connections: int = 10, keepalive_expiry: float = 30.0,
+                 connect_timeout: float = 5.0, read_timeout: float = 60.0,
+                 max_concurrency: int = 16, max_retries: int = 2,
+                 base_url: Optional[str] = None, backend: str = "openai",
+                 scheduler: Optional[LLMScheduler] = None):
+        """
+        초기화
+        
+        Args:
+            api_key: OpenAI API 키
+            max_connections: 커넥션 풀 최대 연결 수
+            max_keepalive_connections: 유휴 상태로 유지할 최대 연결 수
+            keepalive_expiry: 유휴 연결 유지 시간 (초)
+            connect_timeout: 연결 타임아웃 (초)
+            read_timeout: 응답 대기 타임아웃 (초, 스트리밍은 토큰 간 간격)
+            max_concurrency: 동시 LLM 요청 수 상한
+            max_retries: SDK 재시도 횟수
+            base_url: OpenAI 호환 API 주소 (None이면 기본값)
+            backend: mock(목업 응답) | openai | stub(로컬 스텁 서버)
+            scheduler: 분당 요청/토큰 한도 스케줄러 (None이면 한도 없음)
+        """
+        self.api_key = api_key
+        self.base_url = base_url
+        self.backend = backend
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.scheduler = scheduler
+        
+        self._client = None
+        self._http_client = None
+        self._client_lock = threading.Lock()
+        
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        self._metrics_lock = threading.Lock()
+        self._in_flight = 0
+        self._waiting = 0
+        self._peak_in_flight = 0
+        self._requests = 0
+        self._errors = 0
+        self._wait_seconds = 0.0
+        self._max_wait_seconds = 0.0
+    
+    @property
+    def client(self):
+        """공유 OpenAI 클라이언트 (mock 백엔드이거나 openai 미설치 시 None)"""
+        if self.backend == "mock" or OpenAI is None:
+            return None
+        
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._http_client = httpx.Client(
+                        limits=httpx.Limits(
+                            max_connections=self.max_connections,
+                            max_keepalive_connections=self.max_keepalive_connections,
+                            keepalive_expiry=self.keepalive_expiry,
+                        ),
+                        timeout=httpx.Timeout(
+                            self.read_timeout,
+                            connect=self.connect_timeout,
+                            pool=self.connect_timeout,
+                        ),
+                    )
+                    self._client = OpenAI(
+                        api_key=self.api_key,
+                        base_url=self.base_url,
+                        http_client=self._http_client,
+                        max_retries=self.max_retries,
+                    )
+        return self._client
+    
+    @contextmanager
+    def slot(self, tokens: int = 0, timeout: Optional[float] = None) -> Iterator[None]:
+        """
+        LLM 요청 슬롯 (한도/동시 요청 수가 상한에 도달하면 대기)
+        
+        스트리밍 응답은 마지막 토큰을 받을 때까지 슬롯을 유지해야 합니다.
+        우선순위는 llm_priority() 블록에서 지정한 값을 따릅니다.
+        
+        Args:
+            tokens: 예상 토큰 수 (프롬프트 + max_tokens)
+            timeout: 최대 대기 시간 (초과 시 TimeoutError)
+        
+        Example:
+            with manager.slot(tokens=estimated):
+                response = manager.client.chat.completions.create(...)
+        """
+        started = time.monotonic()
+        with self._metrics_lock:
+            self._waiting += 1
+        
+        try:
+            if self.scheduler is not None:
+                self.scheduler.acquire(tokens, timeout=timeout)
+            remaining = None if timeout is None else max(0.0, timeout - (time.monotonic() - started))
+            if not self._semaphore.acquire(timeout=remaining):
+                raise TimeoutError("LLM 동시 요청 슬롯을 기다리는 시간이 초과되었습니다.")
+        except BaseException:
+            with self._metrics_lock:
+                self._waiting -= 1
+            raise
+        waited = time.monotonic() - started
+        with self._metrics_lock:
+            self._waiting -= 1
+            self._in_flight += 1
+            self._requests += 1
+            self._wait_seconds += waited
+            self._max_wait_seconds = max(self._max_wait_seconds, waited)
+            self._peak_in_flight = max(self._peak_in_flight, self._in_flight)
+        
+        try:
+            yield
+        except Exception:
+            with self._metrics_lock:
+                self._errors += 1
+            raise
+        finally:
+            with self._metrics_lock:
+                self._in_flight -= 1
+            self._semaphore.release()
+    
+    def metrics(self) -> Dict[str, float]:
+        """
+        풀 사용률 지표
+        
+        Returns:
+            in_flight, waiting, peak_in_flight, utilization(in_flight / 동시 상한),
+            requests, errors, avg_wait_seconds, max_wait_seconds, 설정값
+        """
+        with self._metrics_lock:
+            metrics = {
+                "in_flight": self._in_flight,
+                "waiting": self._waiting,
+                "peak_in_flight": self._peak_in_flight,
+                "requests": self._requests,
+                "errors": self._errors,
+                "avg_wait_seconds": self._wait_seconds / self._requests if self._requests else 0.0,
+                "max_wait_seconds": self._max_wait_seconds,
+            }
+        metrics["utilization"] = metrics["in_flight"] / self.max_concurrency
+        metrics["max_concurrency"] = self.max_concurrency
+        metrics["max_connections"] = self.max_connections
+        metrics["backend"] = self.backend
+        metrics["client_ready"] = self._client is not None
+        return metrics
+    
+    def close(self):
+        """커넥션 풀 종료"""
+        with self._client_lock:
+            if self._http_client is not None:
+                self._http_client.close()
+            self._client = None
+            self._http_client = None
+
+
+_llm_client_manager: Optional[LLMClientManager] = None
+_llm_client_manager_lock = threading.Lock()
+
+
+def get_llm_client_manager() -> LLMClientManager:
+    """프로세스 전역 LLM 클라이언트 관리자"""
+    global _llm_client_manager
+    
+    if _llm_client_manager is None:
+        with _llm_client_manager_lock:
+            if _llm_client_manager is None:
+                from config.settings import (
+                    OPENAI_API_KEY, LLM_BACKEND, LLM_BASE_URL, LLM_MAX_CONNECTIONS,
+                    LLM_MAX_KEEPALIVE_CONNECTIONS, LLM_KEEPALIVE_EXPIRY, LLM_CONNECT_TIMEOUT,
+                    LLM_READ_TIMEOUT, LLM_MAX_CONCURRENCY
+                )
+                base_url = LLM_BASE_URL or None
+                if LLM_BACKEND == "stub" and base_url is None:
+                    base_url = STUB_BASE_URL
+                _llm_client_manager = LLMClientManager(
+                    api_key=OPENAI_API_KEY,
+                    base_url=base_url,
+                    backend=LLM_BACKEND,
+                    max_connections=LLM_MAX_CONNECTIONS,
+                    max_keepalive_connections=LLM_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=LLM_KEEPALIVE_EXPIRY,
+                    connect_timeout=LLM_CONNECT_TIMEOUT,
+                    read_timeout=LLM_READ_TIMEOUT,
+                    max_concurrency=LLM_MAX_CONCURRENCY,
+                    scheduler=get_llm_scheduler(),
+                )
+    return _llm_client_manager
@@ -0,0 +1,295 @@
+"""
+K-Stay LLM Scheduler
+프로세스 전역 LLM 요청 스케줄러 (분당 요청/토큰 한도 + 우선순위 대기열)
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional
+import itertools
+import threading
+import time
+
+
+# 우선순위 (작을수록 먼저 처리)
+PRIORITY_PAID = 0   # 결제 사용자 (서류 생성 등)
+PRIORITY_FREE = 1   # 무료 사용자 (FAQ 채팅 등)
+
+PRIORITY_NAMES = {PRIORITY_PAID: "paid", PRIORITY_FREE: "free"}
+
+# 현재 요청의 우선순위 (Streamlit 스크립트 스레드 → asyncio.to_thread 워커로 전달됨)
+_current_priority: ContextVar[int] = ContextVar("llm_priority", default=PRIORITY_FREE)
+
+
+def priority_for(is_paid: bool) -> int:
+    """결제 여부 → 우선순위"""
+    return PRIORITY_PAID if is_paid else PRIORITY_FREE
+
+
+def current_priority() -> int:
+    """현재 요청의 우선순위 (설정되지 않았으면 무료)"""
+    return _current_priority.get()
+
+
+@contextmanager
+def llm_priority(is_paid: bool) -> Iterator[int]:
+    """
+    블록 안에서 발생하는 LLM 요청의 우선순위 지정
+    
+    Example:
+        with llm_priority(st.session_state.get('is_paid', False)):
+            render_response_stream(ai_service.chat_response_stream(...))
+    """
+    token = _current_priority.set(priority_for(is_paid))
+    try:
+        yield _current_priority.get()
+    finally:
+        _current_priority.reset(token)
+
+
+class TokenBucket:
+    """
+    토큰 버킷
+    
+    분당 한도(rate_per_minute)만큼 채워진 상태로 시작해 초당
+    rate_per_minute / 60씩 다시 채워집니다. rate_per_minute가 0이면 제한이 없습니다.
+    스레드 안전하지 않으므로 LLMScheduler의 잠금 안에서만 사용합니다.
+    """
+    
+    def __init__(self, rate_per_minute: float):
+        self.rate_per_minute = rate_per_minute
+        self.capacity = float(rate_per_minute)
+        self.refill_per_second = rate_per_minute / 60.0
+        self.level = self.capacity
+        self._updated = time.monotonic()
+    
+    @property
+    def unlimited(self) -> bool:
+        return self.rate_per_minute <= 0
+    
+    def refill(self, now: float):
+        """경과 시간만큼 채움"""
+        if self.unlimited:
+            return
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.refill_per_second)
+        self._updated = now
+    
+    def delay(self, amount: float, now: float) -> float:
+        """amount를 꺼낼 수 있을 때까지 남은 시간 (초)"""
+        if self.unlimited:
+            return 0.0
+        self.refill(now)
+        amount = min(amount, self.capacity)  # 한도보다 큰 요청도 버킷이 가득 차면 허용
+        return max(0.0, (amount - self.level) / self.refill_per_second)
+    
+    def take(self, amount: float):
+        """amount 차감"""
+        if not self.unlimited:
+            self.level -= min(amount, self.capacity)
+
+
+@dataclass
+class _Ticket:
+    priority: int
+    tokens: int
+    seq: int
+    enqueued: float = field(default_factory=time.monotonic)
+
+
+class LLMScheduler:
+    """
+    LLM 요청 스케줄러
+    
+    모든 세션의 LLM 요청이 분당 요청 수(RPM)와 분당 예상 토큰 수(TPM)
+    토큰 버킷을 함께 통과해야 전송되므로, 요청이 몰려도 공급자 한도를
+    넘겨 429를 받는 대신 대기열에서 기다립니다. 대기열은 우선순위 순
+    (같은 우선순위는 도착 순)이며, 무료 요청이 계속 밀리지 않도록
+    aging_seconds만큼 기다릴 때마다 우선순위가 한 단계씩 올라갑니다.
+    
+    예상 토큰 수는 프롬프트 토큰 + max_tokens입니다 (공급자도 한도 계산에
+    max_tokens를 사용).
+    """
+    
+    def __init__(self, rpm: int = 0, tpm: int = 0, queue_timeout: Optional[float] = 120.0,
+                 aging_seconds: float = 30.0):
+        """
+        초기화
+        
+        Args:
+            rpm: 분당 요청 한도 (0이면 제한 없음)
+            tpm: 분당 토큰 한도 (0이면 제한 없음)
+            queue_timeout: 대기열 최대 대기 시간 (초, 0이면 대기 없이 실패, None이면 무제한)
+            aging_seconds: 대기 시간이 이만큼 늘 때마다 우선순위를 한 단계 올림 (0이면 사용 안 함)
+        """
+        self.rpm = rpm
+        self.tpm = tpm
+        self.queue_timeout = queue_timeout
+        self.aging_seconds = aging_seconds
+        
+        self._requests = TokenBucket(rpm)
+        self._tokens = TokenBucket(tpm)
+        self._waiting: List[_Ticket] = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        
+        self._admitted = 0
+        self._throttled = 0
+        self._timeouts = 0
+        self._wait_seconds = {p: 0.0 for p in PRIORITY_NAMES}
+        self._max_wait_seconds = {p: 0.0 for p in PRIORITY_NAMES}
+        self._admitted_by_priority = {p: 0 for p in PRIORITY_NAMES}
+    
+    def acquire(self, tokens: int = 0, priority: Optional[int] = None,
+                timeout: Optional[float] = None) -> float:
+        """
+        요청 전송 허가 (한도/대기열 순서에 따라 대기)
+        
+        Args:
+            tokens: 예상 토큰 수 (프롬프트 + max_tokens)
+            priority: 우선순위 (기본값: current_priority())
+            timeout: 이번 요청의 최대 대기 시간 (queue_timeout보다 짧을 때만 적용)
+        
+        Returns:
+            대기한 시간 (초)
+        
+        Raises:
+            TimeoutError: 최대 대기 시간 안에 허가받지 못한 경우
+        """
+        if priority is None:
+            priority = current_priority()
+        if priority not in PRIORITY_NAMES:
+            raise ValueError(f"알 수 없는 우선순위입니다: {priority}")
+        ticket = _Ticket(priority, max(0, int(tokens)), next(self._seq))
+        limits = [t for t in (self.queue_timeout, timeout) if t is not None]
+        deadline = ticket.enqueued + min(limits) if limits else None
+        
+        throttled = False
+        with self._cond:
+            self._waiting.append(ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    if self._head(now) is ticket:
+                        delay = max(self._requests.delay(1, now), self._tokens.delay(ticket.tokens, now))
+                        if delay <= 0:
+                            break
+                        if not throttled:
+                            self._throttled += 1
+                            throttled = True
+                    else:
+                        # 앞선 요청이 처리되면 깨어남 (aging으로 순서가 바뀔 수 있어 주기적으로 재확인)
+                        delay = 1.0
+                    
+                    if deadline is not None:
+                        remaining = deadline - now
+                        if remaining <= 0:
+                            self._timeouts += 1
+                            raise TimeoutError("요청이 많아 AI 응답 대기 시간이 초과되었습니다. 잠시 후 다시 시도해주세요.")
+                        delay = min(delay, remaining)
+                    self._cond.wait(delay)
+                
+                self._requests.take(1)
+                self._tokens.take(ticket.tokens)
+                waited = time.monotonic() - ticket.enqueued
+                self._admitted += 1
+                self._admitted_by_priority[priority] += 1
+                self._wait_seconds[priority] += waited
+                self._max_wait_seconds[priority] = max(self._max_wait_seconds[priority], waited)
+                return waited
+            finally:
+                self._waiting.remove(ticket)
+                self._cond.notify_all()
+    
+    def estimate_wait(self, tokens: int = 0, priority: Optional[int] = None) -> float:
+        """
+        지금 요청하면 예상되는 대기 시간 (초)
+        
+        대기열에서 앞서게 될 요청들과 이번 요청이 모두 버킷을 통과하는 데
+        걸리는 시간입니다 (동시 요청 상한에 의한 대기는 포함하지 않음).
+        """
+        if priority is None:
+            priority = current_priority()
+        with self._cond:
+            now = time.monotonic()
+            ahead = [t for t in self._waiting if self._rank(t, now) <= (priority, float("inf"))]
+            request_delay = self._requests.delay(len(ahead) + 1, now)
+            token_delay = self._tokens.delay(sum(t.tokens for t in ahead) + tokens, now)
+            return max(request_delay, token_delay)
+    
+    def queue_position(self, priority: Optional[int] = None) -> int:
+        """지금 요청하면 대기열에서 앞서 있을 요청 수"""
+        if priority is None:
+            priority = current_priority()
+        with self._cond:
+            now = time.monotonic()
+            return sum(1 for t in self._waiting if self._rank(t, now) <= (priority, float("inf")))
+    
+    def metrics(self) -> Dict:
+        """
+        대기열/한도 지표
+        
+        Returns:
+            queue_depth, queue_depth_by_priority, admitted, throttled(한도 때문에 대기한 요청 수),
+            timeouts, avg_wait_seconds/max_wait_seconds(우선순위별), 남은 요청/토큰 한도, 설정값
+        """
+        with self._cond:
+            now = time.monotonic()
+            self._requests.refill(now)
+            self._tokens.refill(now)
+            depth = {name: 0 for name in PRIORITY_NAMES.values()}
+            for ticket in self._waiting:
+                depth[PRIORITY_NAMES[ticket.priority]] += 1
+            return {
+                "queue_depth": len(self._waiting),
+                "queue_depth_by_priority": depth,
+                "oldest_wait_seconds": max((now - t.enqueued for t in self._waiting), default=0.0),
+                "admitted": self._admitted,
+                "throttled": self._throttled,
+                "timeouts": self._timeouts,
+                "avg_wait_seconds": {
+                    PRIORITY_NAMES[p]: (self._wait_seconds[p] / self._admitted_by_priority[p]
+                                        if self._admitted_by_priority[p] else 0.0)
+                    for p in PRIORITY_NAMES
+                },
+                "max_wait_seconds": {PRIORITY_NAMES[p]: self._max_wait_seconds[p] for p in PRIORITY_NAMES},
+                "requests_available": None if self._requests.unlimited else int(self._requests.level),
+                "tokens_available": None if self._tokens.unlimited else int(self._tokens.level),
+                "rpm": self.rpm,
+                "tpm": self.tpm,
+            }
+    
+    def _rank(self, ticket: _Ticket, now: float):
+        """대기열 순서 키 (우선순위 - 대기 시간에 따른 가산, 도착 순)"""
+        priority = ticket.priority
+        if self.aging_seconds > 0:
+            priority -= int((now - ticket.enqueued) // self.aging_seconds)
+        return (priority, ticket.seq)
+    
+    def _head(self, now: float) -> Optional[_Ticket]:
+        """다음에 허가받을 요청"""
+        return min(self._waiting, key=lambda t: self._rank(t, now), default=None)
+
+
+_llm_scheduler: Optional[LLMScheduler] = None
+_llm_scheduler_lock = threading.Lock()
+
+
+def get_llm_scheduler() -> LLMScheduler:
+    """프로세스 전역 LLM 요청 스케줄러"""
+    global _llm_scheduler
+    
+    if _llm_scheduler is None:
+        with _llm_scheduler_lock:
+            if _llm_scheduler is None:
+                from config.settings import (
+                    LLM_RATE_LIMIT_RPM, LLM_RATE_LIMIT_TPM, LLM_QUEUE_TIMEOUT,
+                    LLM_PRIORITY_AGING_SECONDS
+                )
+                _llm_scheduler = LLMScheduler(
+                    rpm=LLM_RATE_LIMIT_RPM,
+                    tpm=LLM_RATE_LIMIT_TPM,
+                    queue_timeout=LLM_QUEUE_TIMEOUT,
+                    aging_seconds=LLM_PRIORITY_AGING_SECONDS,
+                )
+    return _llm_scheduler
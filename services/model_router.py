@@ -0,0 +1,232 @@
+"""
+K-Stay Model Router
+호출 유형별 모델 선택 + 호출 마감 시간 + 장애 시 로컬 응답 전환 (서킷 브레이커)
+"""
+
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+import threading
+import time
+
+
+# 호출 유형 → 기본 모델 등급
+CALL_TIERS = {
+    "chat": "mini",         # FAQ 채팅 (긴 대화/컨텍스트는 full)
+    "validation": "mini",   # 사연 검증 (JSON)
+    "summary": "mini",      # 대화 요약
+    "narrative": "full",    # 사연 생성
+}
+
+
+class DeadlineExceeded(TimeoutError):
+    """호출 마감 시간 초과"""
+
+
+@dataclass
+class Route:
+    """한 번의 LLM 호출 경로"""
+    call_type: str
+    tier: str
+    model: str
+    deadline: float  # time.monotonic() 기준 마감 시각
+    started: float = field(default_factory=time.monotonic)
+    
+    def remaining(self) -> float:
+        """
+        마감까지 남은 시간 (초)
+        
+        Raises:
+            DeadlineExceeded: 이미 마감 시간이 지난 경우
+        """
+        remaining = self.deadline - time.monotonic()
+        if remaining <= 0:
+            raise DeadlineExceeded(f"{self.call_type} 호출 마감 시간을 초과했습니다.")
+        return remaining
+
+
+class CircuitBreaker:
+    """
+    모델별 서킷 브레이커
+    
+    연속 실패(오류/마감 초과)가 failure_threshold에 도달하면 cooldown 동안
+    열림 상태가 되어 호출을 보내지 않고, cooldown이 지나면 한 번의 시험 호출을
+    허용합니다 (반열림). 시험 호출이 성공하면 닫히고, 실패하면 다시 열립니다.
+    시험 호출 결과가 cooldown 안에 기록되지 않으면 다음 시험 호출을 허용합니다.
+    """
+    
+    def __init__(self, failure_threshold: int = 3, cooldown: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_started: Optional[float] = None
+    
+    def allow(self, now: float) -> bool:
+        """호출 허용 여부 (잠금 안에서 호출)"""
+        if self.state == "closed":
+            return True
+        if self.state == "open" and now - self.opened_at >= self.cooldown:
+            self.state = "half_open"
+            self._trial_started = None
+        if self.state == "half_open" and (
+            self._trial_started is None or now - self._trial_started >= self.cooldown
+        ):
+            self._trial_started = now
+            return True
+        return False
+    
+    def success(self):
+        self.state = "closed"
+        self.failures = 0
+        self._trial_started = None
+    
+    def failure(self, now: float):
+        self.failures += 1
+        self._trial_started = None
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            self.state = "open"
+            self.opened_at = now
+
+
+class ModelRouter:
+    """
+    모델 라우터
+    
+    호출 유형과 프롬프트 크기로 모델 등급(mini/full)을 고르고, 유형별 마감
+    시간을 붙여 Route를 돌려줍니다. 모델의 서킷 브레이커가 열려 있으면 다른
+    등급으로 보내고, 둘 다 열려 있으면 None을 돌려주어 호출 측이 로컬 규칙/
+    키워드 응답(목업 분기)을 사용하게 합니다. 대기열 대기와 응답 시간이 모두
+    마감 시간 안에 들어가므로 꼬리 지연은 공급자가 아니라 설정값으로 제한됩니다.
+    """
+    
+    def __init__(self, models: Dict[str, str], deadlines: Dict[str, float],
+                 complex_chat_tokens: int = 2000, failure_threshold: int = 3,
+                 cooldown: float = 30.0):
+        """
+        초기화
+        
+        Args:
+            models: 등급 → 모델 이름 ({"mini": ..., "full": ...})
+            deadlines: 호출 유형 → 마감 시간 (초, 스트리밍은 첫 토큰까지)
+            complex_chat_tokens: 채팅 프롬프트가 이 토큰 수를 넘으면 full 모델 사용
+            failure_threshold: 서킷 브레이커를 여는 연속 실패 수
+            cooldown: 서킷 브레이커 열림 유지 시간 (초)
+        """
+        self.models = models
+        self.deadlines = deadlines
+        self.complex_chat_tokens = complex_chat_tokens
+        
+        self._breakers = {
+            tier: CircuitBreaker(failure_threshold, cooldown) for tier in models
+        }
+        self._lock = threading.Lock()
+        self._latencies = {tier: deque(maxlen=200) for tier in models}
+        self._counters = {
+            tier: {"requests": 0, "successes": 0, "failures": 0, "timeouts": 0}
+            for tier in models
+        }
+        self._fallbacks: Dict[str, int] = {call_type: 0 for call_type in CALL_TIERS}
+    
+    def route(self, call_type: str, prompt_tokens: int = 0) -> Optional[Route]:
+        """
+        호출 경로 선택
+        
+        Args:
+            call_type: chat | validation | summary | narrative
+            prompt_tokens: 프롬프트 토큰 수 (채팅 복잡도 판단)
+        
+        Returns:
+            Route (모든 모델이 장애 상태면 None → 로컬 응답 사용)
+        """
+        tier = CALL_TIERS.get(call_type, "full")
+        if call_type == "chat" and prompt_tokens > self.complex_chat_tokens:
+            tier = "full"
+        
+        now = time.monotonic()
+        with self._lock:
+            for candidate in (tier, "mini" if tier == "full" else "full"):
+                if self._breakers[candidate].allow(now):
+                    self._counters[candidate]["requests"] += 1
+                    return Route(
+                        call_type=call_type,
+                        tier=candidate,
+                        model=self.models[candidate],
+                        deadline=now + self.deadlines.get(call_type, 30.0),
+                    )
+            self._fallbacks[call_type] = self._fallbacks.get(call_type, 0) + 1
+            return None
+    
+    def record_success(self, route: Route):
+        """호출 성공 기록"""
+        with self._lock:
+            self._breakers[route.tier].success()
+            self._counters[route.tier]["successes"] += 1
+            self._latencies[route.tier].append(time.monotonic() - route.started)
+    
+    def record_failure(self, route: Route, error: BaseException):
+        """호출 실패 기록 (오류 또는 마감 초과)"""
+        with self._lock:
+            self._breakers[route.tier].failure(time.monotonic())
+            self._counters[route.tier]["failures"] += 1
+            if isinstance(error, TimeoutError) or "timeout" in type(error).__name__.lower():
+                self._counters[route.tier]["timeouts"] += 1
+    
+    def record_fallback(self, call_type: str):
+        """로컬 응답으로 대체한 호출 기록"""
+        with self._lock:
+            self._fallbacks[call_type] = self._fallbacks.get(call_type, 0) + 1
+    
+    def metrics(self) -> Dict:
+        """
+        모델별 지표
+        
+        Returns:
+            {"models": {등급: requests, successes, failures, timeouts, state, p50/p99(초)},
+             "fallbacks": {호출 유형: 로컬 응답 수}}
+        """
+        with self._lock:
+            models = {}
+            for tier, counters in self._counters.items():
+                latencies = sorted(self._latencies[tier])
+                models[tier] = dict(
+                    counters,
+                    model=self.models[tier],
+                    state=self._breakers[tier].state,
+                    p50_seconds=latencies[len(latencies) // 2] if latencies else 0.0,
+                    p99_seconds=latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+                    if latencies else 0.0,
+                )
+            return {"models": models, "fallbacks": dict(self._fallbacks)}
+
+
+_model_router: Optional[ModelRouter] = None
+_model_router_lock = threading.Lock()
+
+
+def get_model_router() -> ModelRouter:
+    """프로세스 전역 모델 라우터"""
+    global _model_router
+    
+    if _model_router is None:
+        with _model_router_lock:
+            if _model_router is None:
+                from config.settings import (
+                    LLM_MODEL_FULL, LLM_MODEL_MINI, LLM_DEADLINE_CHAT, LLM_DEADLINE_VALIDATION,
+                    LLM_DEADLINE_SUMMARY, LLM_DEADLINE_NARRATIVE, LLM_COMPLEX_CHAT_TOKENS,
+                    LLM_BREAKER_FAILURES, LLM_BREAKER_COOLDOWN
+                )
+                _model_router = ModelRouter(
+                    models={"mini": LLM_MODEL_MINI, "full": LLM_MODEL_FULL},
+                    deadlines={
+                        "chat": LLM_DEADLINE_CHAT,
+                        "validation": LLM_DEADLINE_VALIDATION,
+                        "summary": LLM_DEADLINE_SUMMARY,
+                        "narrative": LLM_DEADLINE_NARRATIVE,
+                    },
+                    complex_chat_tokens=LLM_COMPLEX_CHAT_TOKENS,
+                    failure_threshold=LLM_BREAKER_FAILURES,
+                    cooldown=LLM_BREAKER_COOLDOWN,
+                )
+    return _model_router
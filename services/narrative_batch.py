@@ -0,0 +1,241 @@
+"""
+K-Stay Narrative Batch
+패키지 단위 사연 일괄 생성/검증 (asyncio 동시 실행)
+"""
+
+from dataclasses import dataclass, field
+from string import Formatter
+from typing import Dict, List, Optional
+import asyncio
+import time
+
+from services.narrative_prefetch import get_narrative_prefetcher
+
+
+@dataclass
+class NarrativeSection:
+    """패키지에 필요한 사연 항목"""
+    field_name: str
+    label: str
+    generation_prompt: str = ""
+    validation_prompt: str = ""
+    doc_name: Optional[str] = None
+    draft: str = ""  # 사용자가 작성한 초안 (비어 있으면 AI 생성)
+
+
+@dataclass
+class NarrativeResult:
+    """사연 항목별 처리 결과"""
+    field_name: str
+    text: str
+    validation: Dict
+    generated: bool = False
+    error: Optional[str] = None
+    elapsed: float = 0.0
+
+
+@dataclass
+class NarrativeBundle:
+    """패키지 전체 사연 처리 결과"""
+    scenario_id: str
+    results: Dict[str, NarrativeResult] = field(default_factory=dict)
+    total_seconds: float = 0.0
+    
+    @property
+    def narrative_data(self) -> Dict[str, str]:
+        """
+        문서 생성에 넘길 사연 데이터 (field_name → 텍스트, 검증 실패 항목 포함)
+        
+        생성에 실패한 항목은 텍스트가 비어 있어 포함되지 않으므로, 문서를
+        만들기 전에 errors를 확인해야 합니다.
+        """
+        return {name: r.text for name, r in self.results.items() if r.text}
+    
+    @property
+    def is_valid(self) -> bool:
+        """모든 사연이 오류 없이 검증을 통과했는지 여부"""
+        return all(not r.error and r.validation.get("is_valid") for r in self.results.values())
+    
+    @property
+    def errors(self) -> Dict[str, str]:
+        """오류가 발생한 항목 (field_name → 오류 메시지)"""
+        return {name: r.error for name, r in self.results.items() if r.error}
+
+
+def narrative_sections(scenario, drafts: Optional[Dict[str, str]] = None) -> List[NarrativeSection]:
+    """
+    시나리오 패키지에 필요한 사연 항목 목록
+    
+    시나리오의 ai_prompts 사연과, 필수 서류 중 매핑 가이드에 narrative_section이
+    있는 문서의 사연을 field_name 기준으로 합칩니다.
+    
+    Args:
+        scenario: 시나리오 객체
+        drafts: 사용자 초안 (field_name → 텍스트)
+    """
+    from templates.mapping_guide import ALL_DOCUMENT_MAPPINGS
+    
+    drafts = drafts or {}
+    sections: Dict[str, NarrativeSection] = {}
+    
+    prompts = scenario.ai_prompts or {}
+    if prompts.get("narrative_field"):
+        name = prompts["narrative_field"]
+        sections[name] = NarrativeSection(
+            field_name=name,
+            label=prompts.get("narrative_label", name),
+            generation_prompt=prompts.get("generation_prompt", ""),
+            validation_prompt=prompts.get("validation_prompt", ""),
+        )
+    
+    for doc_name in scenario.required_docs:
+        narrative = ALL_DOCUMENT_MAPPINGS.get(doc_name, {}).get("narrative_section")
+        if not narrative:
+            continue
+        name = narrative["field_name"]
+        section = sections.get(name)
+        if section is None:
+            rules = "\n".join(f"- {rule}" for rule in narrative.get("ai_validation_rules", []))
+            section = sections[name] = NarrativeSection(
+                field_name=name,
+                label=doc_name,
+                validation_prompt=f"{doc_name} 검토 기준:\n{rules}",
+            )
+        section.doc_name = section.doc_name or doc_name
+    
+    for section in sections.values():
+        section.draft = (drafts.get(section.field_name) or "").strip()
+    
+    return list(sections.values())
+
+
+def _prompt_data(prompt: str, data: Dict) -> Dict:
+    """프롬프트 자리표시자가 모두 채워지도록 누락 필드를 빈 값으로 보충"""
+    filled = dict(data)
+    for _, name, _, _ in Formatter().parse(prompt):
+        if name and name not in filled:
+            filled[name] = ""
+    return filled
+
+
+async def _process_section(ai_service, section: NarrativeSection, user_data: Dict,
+                           scenario_context: Dict, semaphore: asyncio.Semaphore,
+                           timeout: float) -> NarrativeResult:
+    """사연 항목 하나를 생성(초안이 없을 때) 후 검증"""
+    started = time.perf_counter()
+    text = section.draft
+    generated = False
+    
+    if not text and not section.generation_prompt:
+        # 만들 수 없는 항목은 비워 두고 검증 지적 사항으로만 알림 (오류로 작업을 멈추지 않음)
+        return NarrativeResult(
+            field_name=section.field_name,
+            text="",
+            validation={"is_valid": False, "score": 0,
+                        "issues": [f"'{section.label}' 초안이 없고 생성 프롬프트도 없습니다."],
+                        "suggestions": [], "improved_version": None},
+        )
+    
+    try:
+        if not text:
+            # Phase 1 제출 후 미리 생성해 둔 초안이 있으면 사용
+            prefetched = get_narrative_prefetcher().lookup(section.generation_prompt, user_data)
+            if prefetched is not None:
+                try:
+                    text = await asyncio.wait_for(
+                        asyncio.shield(asyncio.wrap_future(prefetched)), timeout
+                    )
+                except Exception:
+                    text = ""  # 선행 생성 실패/지연 시 지금 생성
+            
+            if not text:
+                async with semaphore:
+                    text, degraded = await asyncio.wait_for(
+                        ai_service.agenerate_narrative_draft(
+                            section.generation_prompt,
+                            _prompt_data(section.generation_prompt, user_data)
+                        ),
+                        timeout
+                    )
+                if degraded:
+                    # 로컬 대체 초안은 서류에 넣지 않음 (작업이 오류로 끝나 다시 시도하게 함)
+                    text = ""
+                    raise RuntimeError("AI 응답이 지연되어 초안을 생성하지 못했습니다. 잠시 후 다시 시도해주세요.")
+            generated = True
+        
+        async with semaphore:
+            validation = await asyncio.wait_for(
+                ai_service.avalidate_narrative(text, section.validation_prompt, scenario_context),
+                timeout
+            )
+        error = None
+    except asyncio.TimeoutError:
+        validation = {"is_valid": False, "score": 0, "issues": [], "suggestions": [], "improved_version": None}
+        error = f"'{section.label}' 처리 시간이 {timeout:g}초를 초과했습니다."
+    except Exception as e:
+        validation = {"is_valid": False, "score": 0, "issues": [], "suggestions": [], "improved_version": None}
+        error = f"'{section.label}' 처리 중 오류 발생: {str(e)}"
+    
+    return NarrativeResult(
+        field_name=section.field_name,
+        text=text,
+        validation=validation,
+        generated=generated,
+        error=error,
+        elapsed=time.perf_counter() - started,
+    )
+
+
+async def prepare_narrative_bundle(scenario, user_data: Dict,
+                                   drafts: Optional[Dict[str, str]] = None,
+                                   ai_service=None,
+                                   max_concurrency: Optional[int] = None,
+                                   timeout: Optional[float] = None) -> NarrativeBundle:
+    """
+    패키지의 모든 사연을 동시에 생성/검증
+    
+    항목별 생성 → 검증은 순서대로, 항목 간에는 asyncio.gather로 동시에
+    실행하므로 전체 소요 시간은 가장 느린 항목에 맞춰집니다. 한 사용자의
+    동시 호출 수는 max_concurrency로, 각 호출은 timeout으로 제한됩니다.
+    
+    Args:
+        scenario: 시나리오 객체
+        user_data: 생성 프롬프트에 넣을 데이터 (사용자 정보 + 폼 데이터)
+        drafts: 사용자 초안 (field_name → 텍스트)
+        ai_service: AIService (기본값: 프로세스 전역 서비스)
+        max_concurrency: 동시 LLM 호출 수 (기본값: NARRATIVE_MAX_CONCURRENCY)
+        timeout: 호출당 제한 시간 (기본값: NARRATIVE_CALL_TIMEOUT)
+    
+    Returns:
+        사연 처리 결과 묶음
+    """
+    from config.settings import NARRATIVE_MAX_CONCURRENCY, NARRATIVE_CALL_TIMEOUT
+    
+    if ai_service is None:
+        from services.ai_service import get_ai_service
+        ai_service = get_ai_service()
+    
+    started = time.perf_counter()
+    semaphore = asyncio.Semaphore(max_concurrency or NARRATIVE_MAX_CONCURRENCY)
+    if timeout is None:
+        timeout = NARRATIVE_CALL_TIMEOUT
+    scenario_context = {"scenario_id": scenario.id, "visa_type": scenario.visa_type}
+    
+    sections = narrative_sections(scenario, drafts)
+    results = await asyncio.gather(*(
+        _process_section(ai_service, section, user_data, scenario_context, semaphore, timeout)
+        for section in sections
+    ))
+    
+    return NarrativeBundle(
+        scenario_id=scenario.id,
+        results={r.field_name: r for r in results},
+        total_seconds=time.perf_counter() - started,
+    )
+
+
+def prepare_narrative_bundle_sync(scenario, user_data: Dict,
+                                  drafts: Optional[Dict[str, str]] = None,
+                                  **kwargs) -> NarrativeBundle:
+    """prepare_narrative_bundle의 동기 진입점 (Streamlit 스크립트용)"""
+    return asyncio.run(prepare_narrative_bundle(scenario, user_data, drafts, **kwargs))
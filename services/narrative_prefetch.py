@@ -0,0 +1,239 @@
+"""
+K-Stay Narrative Prefetch
+사연 초안 선행 생성 (생성 프롬프트 입력이 채워지는 즉시 백그라운드에서 생성)
+"""
+
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from string import Formatter
+from typing import Dict, List, Optional
+import contextvars
+import hashlib
+import json
+import threading
+import time
+
+from services.ai_service import LOCAL_NARRATIVE_FIELDS
+from services.llm_scheduler import llm_priority
+
+
+def prompt_fields(prompt: str) -> List[str]:
+    """생성 프롬프트가 참조하는 필드 이름 (등장 순서, 중복 제거)"""
+    names = []
+    for _, name, _, _ in Formatter().parse(prompt or ""):
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def prefetch_key(prompt: str, data: Dict) -> Optional[str]:
+    """
+    선행 생성 키
+    
+    초안은 같은 키를 가진 세션끼리 공유되므로, 생성기가 읽는 모든 필드
+    (프롬프트 참조 필드 + 로컬 초안이 쓰는 이름/국적 등)를 키에 넣어
+    다른 사용자의 개인 정보가 담긴 초안을 받지 않게 합니다.
+    
+    Args:
+        prompt: 생성 프롬프트 템플릿
+        data: 사용자 정보 + 폼 데이터
+    
+    Returns:
+        (프롬프트, 생성기가 읽는 필드 값) SHA-256 키. 프롬프트 참조 필드가
+        하나라도 비어 있으면 None
+    """
+    fields = prompt_fields(prompt)
+    if not fields:
+        return None
+    
+    values = {}
+    for name in fields:
+        value = data.get(name)
+        if value is None or not str(value).strip():
+            return None
+        values[name] = str(value)
+    for name in LOCAL_NARRATIVE_FIELDS:
+        if name not in values:
+            values[name] = None if data.get(name) is None else str(data.get(name))
+    
+    payload = json.dumps([prompt, values], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class _Prefetch:
+    future: Future
+    refs: int = 1  # 이 초안을 기다리는 세션 수
+    created: float = field(default_factory=time.monotonic)
+
+
+class NarrativePrefetcher:
+    """
+    사연 초안 선행 생성기
+    
+    Phase 1 폼 제출 시 생성 프롬프트의 입력이 모두 채워져 있으면,
+    인터뷰가 진행되는 동안 백그라운드 스레드에서 generate_narrative를
+    미리 호출합니다. 결과는 (프롬프트, 입력값) 해시로 보관되어 인터뷰
+    종료 시 사연 일괄 처리에서 바로 사용됩니다.
+    
+    입력이 바뀌면 이전 키를 release()하며, 아직 시작하지 않은 생성은
+    취소됩니다. 이미 끝난 초안은 키가 달라 더 이상 사용되지 않고 LRU/TTL로
+    정리됩니다. 선행 생성은 추측 작업이므로 LLM 대기열에서 무료 우선순위로
+    실행됩니다.
+    """
+    
+    def __init__(self, max_workers: int = 2, max_entries: int = 256,
+                 ttl_seconds: float = 1800.0):
+        """
+        초기화
+        
+        Args:
+            max_workers: 동시 선행 생성 수 (0이면 비활성화)
+            max_entries: 보관할 초안 최대 개수
+            ttl_seconds: 초안 보관 시간 (초)
+        """
+        self.max_workers = max_workers
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        
+        self._entries: "OrderedDict[str, _Prefetch]" = OrderedDict()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._counters = {"submitted": 0, "hits": 0, "misses": 0, "cancelled": 0, "failed": 0}
+    
+    def prefetch(self, prompt: str, data: Dict, ai_service,
+                 previous_key: Optional[str] = None) -> Optional[str]:
+        """
+        입력이 준비되었으면 선행 생성 시작 (같은 키는 한 번만 생성)
+        
+        Args:
+            prompt: 생성 프롬프트 템플릿
+            data: 사용자 정보 + 폼 데이터
+            ai_service: 생성에 사용할 AIService
+            previous_key: 이 세션이 이전에 받은 키 (입력이 바뀌었으면 해제)
+        
+        Returns:
+            이 세션의 새 키 (입력이 아직 채워지지 않았거나 비활성화 상태면 None)
+        """
+        key = prefetch_key(prompt, data) if self.max_workers > 0 else None
+        
+        with self._lock:
+            if key is not None:
+                entry = self._live_entry(key)
+                if entry is None:
+                    context = contextvars.copy_context()
+                    future = self._get_executor().submit(
+                        context.run, self._generate, ai_service, prompt, dict(data)
+                    )
+                    self._entries[key] = _Prefetch(future)
+                    self._counters["submitted"] += 1
+                    self._evict()
+                elif key != previous_key:
+                    entry.refs += 1
+            
+            if previous_key and previous_key != key:
+                self._release(previous_key)
+        
+        return key
+    
+    def lookup(self, prompt: str, data: Dict) -> Optional[Future]:
+        """
+        입력에 맞는 초안 조회
+        
+        Returns:
+            생성 중이거나 완료된 초안의 Future (없으면 None)
+        """
+        key = prefetch_key(prompt, data)
+        with self._lock:
+            entry = self._live_entry(key) if key is not None else None
+            self._counters["hits" if entry is not None else "misses"] += 1
+            return entry.future if entry is not None else None
+    
+    def release(self, key: Optional[str]):
+        """세션이 키를 더 이상 기다리지 않음 (기다리는 세션이 없으면 시작 전 생성 취소)"""
+        if not key:
+            return
+        with self._lock:
+            self._release(key)
+    
+    def stats(self) -> Dict[str, int]:
+        """선행 생성 통계"""
+        with self._lock:
+            pending = sum(1 for e in self._entries.values() if not e.future.done())
+            return dict(self._counters, entries=len(self._entries), pending=pending)
+    
+    @staticmethod
+    def _generate(ai_service, prompt: str, data: Dict) -> str:
+        """백그라운드 생성 (실패/로컬 대체 시 예외로 전달해 조회 측이 직접 생성하게 함)"""
+        with llm_priority(False):
+            text, degraded = ai_service.generate_narrative_draft(prompt, data)
+        if degraded:
+            raise RuntimeError("AI 응답 지연으로 로컬 초안으로 대체되었습니다.")
+        return text
+    
+    def _live_entry(self, key: str) -> Optional[_Prefetch]:
+        """사용 가능한 항목 (만료/취소/실패 항목은 제거)"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        
+        future = entry.future
+        expired = time.monotonic() - entry.created > self.ttl_seconds
+        failed = future.done() and (future.cancelled() or future.exception() is not None)
+        if expired or failed:
+            if failed and not future.cancelled():
+                self._counters["failed"] += 1
+            del self._entries[key]
+            return None
+        
+        self._entries.move_to_end(key)
+        return entry
+    
+    def _release(self, key: str):
+        entry = self._entries.get(key)
+        if entry is None:
+            return
+        entry.refs -= 1
+        if entry.refs <= 0 and entry.future.cancel():
+            # 시작 전이면 취소 (이미 실행 중이거나 끝난 초안은 같은 입력으로 돌아올 때 재사용)
+            self._counters["cancelled"] += 1
+            del self._entries[key]
+    
+    def _evict(self):
+        """최대 개수 초과 시 오래된 항목부터 제거 (생성 중인 항목은 유지)"""
+        for key in list(self._entries):
+            if len(self._entries) <= self.max_entries:
+                break
+            if self._entries[key].future.done():
+                del self._entries[key]
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="narrative-prefetch"
+            )
+        return self._executor
+
+
+_narrative_prefetcher: Optional[NarrativePrefetcher] = None
+_narrative_prefetcher_lock = threading.Lock()
+
+
+def get_narrative_prefetcher() -> NarrativePrefetcher:
+    """프로세스 전역 사연 선행 생성기"""
+    global _narrative_prefetcher
+    
+    if _narrative_prefetcher is None:
+        with _narrative_prefetcher_lock:
+            if _narrative_prefetcher is None:
+                from config.settings import (
+                    NARRATIVE_PREFETCH_WORKERS, NARRATIVE_PREFETCH_MAX_ENTRIES,
+                    NARRATIVE_PREFETCH_TTL_SECONDS
+                )
+                _narrative_prefetcher = NarrativePrefetcher(
+                    max_workers=NARRATIVE_PREFETCH_WORKERS,
+                    max_entries=NARRATIVE_PREFETCH_MAX_ENTRIES,
+                    ttl_seconds=NARRATIVE_PREFETCH_TTL_SECONDS,
+                )
+    return _narrative_prefetcher
@@ -0,0 +1,210 @@
+"""
+K-Stay Narrative Rules
+사연 검증 규칙 엔진 (LLM 호출 전 로컬 검사)
+"""
+
+from functools import lru_cache
+from typing import Dict, List, Optional, Pattern, Tuple
+import re
+
+from services.label_matcher import AhoCorasick
+
+
+# 매핑 가이드가 없는 시나리오의 최소 길이
+DEFAULT_MIN_LENGTH = 100
+
+# 구조 규칙 (ai_validation_rules 키워드 → 본문에 있어야 하는 패턴)
+STRUCTURE_CHECKS: Dict[str, Tuple[str, str, str]] = {
+    "월별": (
+        r"\d{1,2}\s*(?:월|개월)|[첫둘셋넷]째\s*달",
+        "월별 계획이 보이지 않습니다.",
+        "'1개월 차', '3월' 처럼 월 단위 일정을 포함하세요.",
+    ),
+    "시간순": (
+        r"\d{2,4}\s*년|\d{1,2}\s*월|처음|이후|그 후",
+        "시간 흐름을 알 수 있는 표현이 없습니다.",
+        "날짜나 시점을 넣어 시간순으로 서술하세요.",
+    ),
+}
+
+_SINGLE_QUOTED = re.compile(r"'([^']+)'")
+_DOUBLE_QUOTED = re.compile(r'"([^"]+)"')
+
+
+def _normalize(text: str) -> str:
+    """공백 차이("위장 결혼" / "위장결혼")를 무시하도록 정규화"""
+    return "".join(text.split())
+
+
+def _forbidden_rules(validation_prompt: str,
+                     narrative_section: Optional[Dict]) -> List[Tuple[str, List[str], bool]]:
+    """
+    금지 표현 규칙 추출
+    
+    Returns:
+        [(규칙 설명, 금지 표현 목록, 중대 여부), ...]
+    """
+    rules = []
+    
+    for rule in (narrative_section or {}).get("ai_validation_rules", []):
+        if "금지" not in rule:
+            continue
+        phrases = _SINGLE_QUOTED.findall(rule)
+        if not phrases and "표현 금지" in rule:
+            phrases = [rule.split("표현 금지")[0].strip()]
+        if phrases:
+            rules.append((rule, phrases, "절대" in rule))
+    
+    for line in (validation_prompt or "").splitlines():
+        if "표현" not in line:
+            continue
+        phrases = _DOUBLE_QUOTED.findall(line)
+        known = {p for _, existing, _ in rules for p in existing}
+        phrases = [p for p in phrases if p not in known]
+        if phrases:
+            rules.append((line.strip().lstrip("0123456789. "), phrases, "의심" in line))
+    
+    return rules
+
+
+class NarrativeRuleEngine:
+    """
+    사연 규칙 엔진
+    
+    금지 표현은 시나리오마다 하나의 Aho-Corasick 오토마톤으로 컴파일되어
+    본문을 한 번 훑어 검사하고, 길이/구조 규칙은 정규식으로 확인합니다.
+    금지 표현 또는 길이 위반은 하드 규칙으로, 위반 시 LLM 검증을 생략합니다.
+    결과는 validate_narrative와 같은 스키마입니다.
+    """
+    
+    def __init__(self, forbidden: List[Tuple[str, List[str], bool]],
+                 min_length: int = DEFAULT_MIN_LENGTH, max_length: Optional[int] = None,
+                 structure: Optional[List[Tuple[Pattern, str, str]]] = None,
+                 visa_type: str = ""):
+        """
+        초기화
+        
+        Args:
+            forbidden: (규칙 설명, 금지 표현 목록, 중대 여부) 목록
+            min_length: 최소 글자 수
+            max_length: 최대 글자 수 (None이면 제한 없음)
+            structure: (패턴, 문제점, 개선점) 구조 규칙 목록
+            visa_type: 안내 문구에 쓰는 비자 유형
+        """
+        self.forbidden = forbidden
+        self.min_length = min_length
+        self.max_length = max_length
+        self.structure = structure or []
+        self.visa_type = visa_type
+        
+        patterns: Dict[str, List[int]] = {}
+        for rule_idx, (_, phrases, _) in enumerate(forbidden):
+            for phrase in phrases:
+                patterns.setdefault(_normalize(phrase), []).append(rule_idx)
+        self._automaton = AhoCorasick(patterns)
+    
+    def check(self, narrative: str) -> Tuple[Dict, bool]:
+        """
+        규칙 검사
+        
+        Args:
+            narrative: 사용자가 작성한 사연
+        
+        Returns:
+            (validate_narrative와 같은 스키마의 결과, 하드 규칙 통과 여부)
+        """
+        issues = []
+        suggestions = []
+        score = 8
+        hard_passed = True
+        
+        length = len(narrative.strip())
+        if length < self.min_length:
+            issues.append(f"내용이 너무 짧습니다. ({length}자)")
+            suggestions.append(f"최소 {self.min_length}자 이상 작성해주세요.")
+            score -= 2
+            hard_passed = False
+        elif self.max_length and length > self.max_length:
+            issues.append(f"내용이 너무 깁니다. ({length}자)")
+            suggestions.append(f"{self.max_length}자 이내로 줄여주세요.")
+            score -= 1
+            hard_passed = False
+        
+        matched = sorted({rule_idx for _, rule_idx in self._automaton.iter_matches(_normalize(narrative))})
+        for rule_idx in matched:
+            _, phrases, severe = self.forbidden[rule_idx]
+            quoted = ", ".join(f"'{p}'" for p in phrases)
+            if severe:
+                issues.append(f"{quoted} 등 의심을 살 수 있는 표현이 감지되었습니다.")
+                suggestions.append("해당 표현을 삭제하고 실제 경위를 구체적으로 설명하세요.")
+                score -= 5
+            else:
+                target = f"{self.visa_type} 비자" if self.visa_type else "이 서류"
+                issues.append(f"{quoted} 등의 표현은 {target}에 부적합합니다.")
+                suggestions.append("해당 표현을 삭제하거나 사실에 맞게 수정하세요.")
+                score -= 3
+            hard_passed = False
+        
+        for pattern, issue, suggestion in self.structure:
+            if not pattern.search(narrative):
+                issues.append(issue)
+                suggestions.append(suggestion)
+                score -= 1
+        
+        result = {
+            "is_valid": len(issues) == 0,
+            "score": max(1, score),
+            "issues": issues,
+            "suggestions": suggestions,
+            "improved_version": None if len(issues) == 0 else "AI가 개선된 버전을 제안할 수 있습니다."
+        }
+        return result, hard_passed
+
+
+@lru_cache(maxsize=None)
+def get_narrative_rule_engine(scenario_id: Optional[str] = None) -> NarrativeRuleEngine:
+    """
+    시나리오별 규칙 엔진 (프로세스 전역, 시나리오당 1회 컴파일)
+    
+    시나리오의 validation_prompt와, 사연 필드가 같은 매핑 가이드
+    narrative_section에서 규칙을 모읍니다. 시나리오가 없으면 모든
+    시나리오의 금지 표현을 적용합니다.
+    
+    Args:
+        scenario_id: 시나리오 ID
+    """
+    from config.settings import SCENARIOS
+    from templates.mapping_guide import ALL_DOCUMENT_MAPPINGS
+    
+    sections = {
+        mapping["narrative_section"]["field_name"]: mapping["narrative_section"]
+        for mapping in ALL_DOCUMENT_MAPPINGS.values()
+        if mapping.get("narrative_section")
+    }
+    
+    scenario = SCENARIOS.get(scenario_id) if scenario_id else None
+    if scenario is None:
+        forbidden = []
+        for other in SCENARIOS.values():
+            prompts = other.ai_prompts or {}
+            forbidden.extend(_forbidden_rules(
+                prompts.get("validation_prompt", ""), sections.get(prompts.get("narrative_field"))
+            ))
+        return NarrativeRuleEngine(forbidden)
+    
+    prompts = scenario.ai_prompts or {}
+    section = sections.get(prompts.get("narrative_field"))
+    
+    structure = []
+    for rule in (section or {}).get("ai_validation_rules", []):
+        for keyword, (pattern, issue, suggestion) in STRUCTURE_CHECKS.items():
+            if keyword in rule:
+                structure.append((re.compile(pattern), issue, suggestion))
+    
+    return NarrativeRuleEngine(
+        _forbidden_rules(prompts.get("validation_prompt", ""), section),
+        min_length=(section or {}).get("min_length", DEFAULT_MIN_LENGTH),
+        max_length=(section or {}).get("max_length"),
+        structure=structure,
+        visa_type=scenario.visa_type,
+    )
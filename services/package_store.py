@@ -0,0 +1,166 @@
+"""
+K-Stay Package Store
+생성된 ZIP 패키지의 디스크 저장소 (콘텐츠 주소 기반)
+"""
+
+from dataclasses import dataclass
+from typing import BinaryIO, Iterator, Optional
+from contextlib import contextmanager
+import hashlib
+import os
+import tempfile
+import threading
+
+
+@dataclass(frozen=True)
+class PackageHandle:
+    """세션에 보관하는 패키지 핸들 (바이트 대신 경로만 보관)"""
+    digest: str
+    path: str
+    size: int
+    scenario_id: str = ""
+    
+    def open(self) -> BinaryIO:
+        """패키지 파일 열기 (읽기 전용)"""
+        return open(self.path, "rb")
+    
+    def exists(self) -> bool:
+        """저장소에 파일이 남아 있는지 확인"""
+        return os.path.exists(self.path)
+    
+    @property
+    def etag(self) -> str:
+        """HTTP ETag 값 (다이제스트가 콘텐츠 해시이므로 같은 패키지면 같은 값)"""
+        return f'"{self.digest}"'
+
+
+class PackageStore:
+    """
+    패키지 저장소
+    
+    ZIP은 임시 파일에 점진적으로 기록된 뒤 다이제스트 이름으로 옮겨집니다.
+    다이제스트는 기록한 쪽이 spool.digest에 넣은 콘텐츠 해시이며, 없으면
+    파일 전체의 SHA-256입니다. 같은 내용의 패키지는 한 파일을 공유하며,
+    전체 용량이 max_bytes를 넘으면 오래된 패키지부터 정리합니다.
+    """
+    
+    def __init__(self, root_dir: str, max_bytes: int = 0):
+        """
+        초기화
+        
+        Args:
+            root_dir: 패키지 저장 디렉터리
+            max_bytes: 저장소 최대 용량 (0이면 제한 없음)
+        """
+        self.root_dir = root_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+    
+    @contextmanager
+    def spool(self, scenario_id: str = "") -> Iterator["_Spool"]:
+        """
+        패키지 기록용 임시 파일 (with 블록이 정상 종료되면 저장소에 등록)
+        
+        Example:
+            with store.spool("A") as spool:
+                spool.digest = write_zip(spool.file)
+            handle = spool.handle
+        """
+        os.makedirs(self.root_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.root_dir, suffix=".part")
+        spool = _Spool(os.fdopen(fd, "w+b"), tmp_path)
+        try:
+            yield spool
+            spool.file.close()
+            spool.handle = self._commit(tmp_path, scenario_id, spool.digest)
+        finally:
+            if not spool.file.closed:
+                spool.file.close()
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    
+    def get(self, digest: str, scenario_id: str = "") -> Optional[PackageHandle]:
+        """다이제스트로 패키지 핸들 조회"""
+        path = self._path_for(digest)
+        if not os.path.exists(path):
+            return None
+        return PackageHandle(digest, path, os.path.getsize(path), scenario_id)
+    
+    def _commit(self, tmp_path: str, scenario_id: str,
+                digest: Optional[str] = None) -> PackageHandle:
+        """임시 파일을 다이제스트 이름으로 등록 (digest가 없으면 파일 전체 해시)"""
+        if digest is None:
+            h = hashlib.sha256()
+            with open(tmp_path, "rb") as f:
+                for block in iter(lambda: f.read(65536), b""):
+                    h.update(block)
+            digest = h.hexdigest()
+        path = self._path_for(digest)
+        
+        with self._lock:
+            if os.path.exists(path):
+                # 동일한 패키지가 이미 있으면 재사용
+                os.utime(path)
+            else:
+                os.replace(tmp_path, path)
+            self._prune(keep=path)
+        
+        return PackageHandle(digest, path, os.path.getsize(path), scenario_id)
+    
+    def _prune(self, keep: str):
+        """용량 초과 시 오래된 패키지부터 삭제"""
+        if not self.max_bytes:
+            return
+        
+        entries = []
+        for name in os.listdir(self.root_dir):
+            if not name.endswith(".zip"):
+                continue
+            path = os.path.join(self.root_dir, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+                total -= size
+            except FileNotFoundError:
+                pass
+    
+    def _path_for(self, digest: str) -> str:
+        """다이제스트에 대응하는 파일 경로"""
+        return os.path.join(self.root_dir, f"{digest}.zip")
+
+
+class _Spool:
+    """PackageStore.spool()이 돌려주는 기록 대상"""
+    
+    def __init__(self, file: BinaryIO, path: str):
+        self.file = file
+        self.path = path
+        self.digest: Optional[str] = None  # 콘텐츠 해시 (기록한 쪽이 지정)
+        self.handle: Optional[PackageHandle] = None
+
+
+_package_store: Optional[PackageStore] = None
+_package_store_lock = threading.Lock()
+
+
+def get_package_store() -> PackageStore:
+    """프로세스 전역 패키지 저장소"""
+    global _package_store
+    
+    if _package_store is None:
+        with _package_store_lock:
+            if _package_store is None:
+                from config.settings import PACKAGE_STORE_DIR, PACKAGE_STORE_MAX_BYTES
+                _package_store = PackageStore(PACKAGE_STORE_DIR, PACKAGE_STORE_MAX_BYTES)
+    return _package_store
@@ -0,0 +1,209 @@
+"""
+K-Stay Package ZIP
+패키지 ZIP 멤버 기록 도구 (멤버별 입력 키 + 이전 패키지 멤버의 압축 바이트 복사)
+"""
+
+from typing import BinaryIO, Dict, Optional, Tuple, Union
+import hashlib
+import json
+import struct
+import sys
+import zipfile
+
+
+# 멤버 시각 고정값 (ZIP이 표현할 수 있는 가장 이른 시각) → 같은 입력이면 같은 바이트
+PACKAGE_EPOCH = (1980, 1, 1, 0, 0, 0)
+
+# 생성 시각 등 빌드마다 달라지는 정보를 담는 멤버 (콘텐츠 해시에서 제외, 항상 마지막)
+MANIFEST_NAME = "MANIFEST.json"
+
+# write_raw_member가 따르는 ZipFile 내부 절차(_open_to_write)를 확인한 Python 버전 범위와
+# 사용하는 내부 속성. 범위 밖이거나 속성이 없으면 압축 해제 후 다시 압축해 기록
+_RAW_COPY_VERSIONS = ((3, 8), (3, 13))
+_RAW_COPY_ATTRS = ("_lock", "_writing", "_seekable", "_writecheck", "_didModify",
+                   "start_dir", "fp", "filelist", "NameToInfo")
+
+# 압축 방식 옵션 비트 (deflate 수준/LZMA EOS 표시)만 복사하고 나머지는 다시 계산
+_COPY_FLAG_BITS = 0x06
+_ENCRYPTED = 0x01
+
+
+def package_member(filename: str, key: Optional[str] = None,
+                   date_time: Optional[Tuple[int, int, int, int, int, int]] = None) -> zipfile.ZipInfo:
+    """
+    새로 기록할 패키지 멤버 정보
+    
+    Args:
+        filename: ZIP 내 파일명
+        key: 멤버 입력 키 (ZipInfo 주석에 저장, 다음 재생성 때 비교)
+        date_time: 멤버 시각 (기본값: PACKAGE_EPOCH)
+    """
+    info = zipfile.ZipInfo(filename, date_time=date_time or PACKAGE_EPOCH)
+    info.compress_type = zipfile.ZIP_DEFLATED
+    info.external_attr = 0o600 << 16
+    if key:
+        info.comment = key.encode("ascii")
+    return info
+
+
+class PreviousPackage:
+    """
+    이전 패키지 ZIP
+    
+    멤버 주석에 저장된 입력 키로 멤버를 찾고, 압축을 풀지 않은 바이트를
+    꺼내 새 패키지에 그대로 복사할 수 있게 합니다. 원본 바이트 복사를
+    지원하지 않는 Python에서는 압축을 풀어 다시 압축합니다.
+    """
+    
+    def __init__(self, file: Union[str, BinaryIO]):
+        """
+        Args:
+            file: 이전 패키지 경로 또는 읽기용 바이너리 파일 객체
+        
+        Raises:
+            OSError, zipfile.BadZipFile: 파일을 열 수 없거나 ZIP이 아닌 경우
+        """
+        self._owns_file = isinstance(file, str)
+        self._file = open(file, "rb") if self._owns_file else file
+        self._archive: Optional[zipfile.ZipFile] = None
+        try:
+            self._archive = zipfile.ZipFile(self._file)
+        except Exception:
+            self.close()
+            raise
+        
+        self.members: Dict[str, zipfile.ZipInfo] = {
+            info.comment.decode("ascii", "replace"): info
+            for info in self._archive.infolist()
+            if info.comment and not info.flag_bits & _ENCRYPTED
+        }
+    
+    def find(self, key: Optional[str]) -> Optional[zipfile.ZipInfo]:
+        """입력 키가 같은 멤버 (없으면 None)"""
+        return self.members.get(key) if key else None
+    
+    def read_raw(self, info: zipfile.ZipInfo) -> bytes:
+        """멤버의 압축된 데이터 (로컬 헤더 다음 compress_size 바이트)"""
+        self._file.seek(info.header_offset)
+        header = self._file.read(zipfile.sizeFileHeader)
+        fields = struct.unpack(zipfile.structFileHeader, header)
+        if fields[0] != zipfile.stringFileHeader:
+            raise zipfile.BadZipFile(f"로컬 헤더가 올바르지 않습니다: {info.filename}")
+        name_length, extra_length = fields[10], fields[11]
+        self._file.seek(name_length + extra_length, 1)
+        return self._file.read(info.compress_size)
+    
+    def copy_to(self, target: zipfile.ZipFile, info: zipfile.ZipInfo):
+        """멤버를 target에 복사 (가능하면 다시 압축하지 않고 CRC/크기/주석 재사용)"""
+        if raw_copy_supported(target):
+            write_raw_member(target, info, self.read_raw(info))
+        else:
+            # 압축 해제 시 CRC가 검증됨
+            target.writestr(_copy_info(info), self._archive.read(info))
+    
+    def close(self):
+        if self._archive is not None:
+            self._archive.close()
+        if self._owns_file and not self._file.closed:
+            self._file.close()
+    
+    def __enter__(self) -> "PreviousPackage":
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_previous_package(file: Union[None, str, BinaryIO]) -> Optional[PreviousPackage]:
+    """이전 패키지 열기 (없거나 손상되었으면 None → 전체 재생성)"""
+    if file is None:
+        return None
+    try:
+        return PreviousPackage(file)
+    except (OSError, zipfile.BadZipFile):
+        return None
+
+
+def content_hash(file: BinaryIO, start: int, end: int) -> str:
+    """
+    패키지 콘텐츠 해시 (file의 [start, end) 구간 SHA-256)
+    
+    MANIFEST 앞까지의 멤버(로컬 헤더 + 압축 데이터)만 해시하므로, 생성
+    시각이 달라도 입력이 같은 패키지는 같은 값이 됩니다. 읽은 뒤 파일
+    위치는 end로 돌려놓습니다.
+    """
+    h = hashlib.sha256()
+    file.seek(start)
+    remaining = end - start
+    while remaining > 0:
+        block = file.read(min(65536, remaining))
+        if not block:
+            break
+        h.update(block)
+        remaining -= len(block)
+    file.seek(end)
+    return h.hexdigest()
+
+
+def read_manifest(file: Union[str, BinaryIO]) -> Optional[Dict]:
+    """패키지의 MANIFEST 내용 (없거나 읽을 수 없으면 None)"""
+    try:
+        with zipfile.ZipFile(file) as archive:
+            return json.loads(archive.read(MANIFEST_NAME).decode("utf-8"))
+    except (OSError, KeyError, ValueError, zipfile.BadZipFile):
+        return None
+
+
+def raw_copy_supported(target: zipfile.ZipFile) -> bool:
+    """write_raw_member를 쓸 수 있는지 (확인된 Python 버전 + 내부 속성 존재)"""
+    low, high = _RAW_COPY_VERSIONS
+    return low <= sys.version_info[:2] <= high and all(
+        hasattr(target, name) for name in _RAW_COPY_ATTRS
+    )
+
+
+def _copy_info(source: zipfile.ZipInfo,
+               date_time: Tuple[int, int, int, int, int, int] = PACKAGE_EPOCH) -> zipfile.ZipInfo:
+    """복사할 멤버의 새 ZipInfo (이름/압축 방식/주석/권한 유지, 시각은 date_time)"""
+    info = zipfile.ZipInfo(source.filename, date_time=date_time)
+    info.compress_type = source.compress_type
+    info.comment = source.comment
+    info.external_attr = source.external_attr
+    info.create_system = source.create_system
+    return info
+
+
+def write_raw_member(target: zipfile.ZipFile, source: zipfile.ZipInfo, raw: bytes,
+                     date_time: Tuple[int, int, int, int, int, int] = PACKAGE_EPOCH):
+    """
+    압축된 멤버 바이트를 그대로 기록
+    
+    zipfile에는 압축 데이터를 직접 쓰는 공개 API가 없어, ZipFile.writestr가
+    헤더를 기록하는 절차(_open_to_write)를 그대로 따릅니다. CRC와 크기는
+    원본 ZipInfo 값을 사용하므로 압축 해제/재압축이 일어나지 않습니다.
+    멤버 시각은 원본 대신 date_time으로 맞춥니다.
+    
+    내부 절차에 의존하므로 raw_copy_supported(target)가 참일 때만 호출합니다.
+    """
+    info = _copy_info(source, date_time)
+    info.flag_bits = source.flag_bits & _COPY_FLAG_BITS
+    info.CRC = source.CRC
+    info.compress_size = source.compress_size
+    info.file_size = source.file_size
+    zip64 = max(info.file_size, info.compress_size) > zipfile.ZIP64_LIMIT
+    
+    with target._lock:
+        if target._writing:
+            raise ValueError("다른 멤버를 기록하는 중에는 복사할 수 없습니다.")
+        if target._seekable:
+            target.fp.seek(target.start_dir)
+        info.header_offset = target.fp.tell()
+        target._writecheck(info)
+        target._didModify = True
+        
+        target.fp.write(info.FileHeader(zip64))
+        target.fp.write(raw)
+        target.start_dir = target.fp.tell()
+        
+        target.filelist.append(info)
+        target.NameToInfo[info.filename] = info
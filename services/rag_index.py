@@ -0,0 +1,497 @@
+"""
+K-Stay RAG Index
+지식 베이스 청킹, 임베딩, 벡터/BM25 검색 (로컬/오프라인)
+"""
+
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+import hashlib
+import heapq
+import json
+import math
+import os
+import re
+import zlib
+
+import numpy as np
+
+
+# =============================================================================
+# 청킹
+# =============================================================================
+
+def _format_value(value) -> str:
+    """지식 베이스 값(문자열/리스트/딕셔너리)을 텍스트로 변환"""
+    if isinstance(value, dict):
+        return "\n".join(f"- {k}: {_format_value(v)}" for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return "\n".join(f"- {_format_value(v)}" for v in value)
+    return str(value)
+
+
+def _split_text(text: str, max_chars: int) -> List[str]:
+    """긴 본문을 문단 단위로 max_chars 이하 청크로 분할"""
+    chunks = []
+    current = ""
+    for paragraph in re.split(r"\n\s*\n", text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if current and len(current) + len(paragraph) + 2 > max_chars:
+            chunks.append(current)
+            current = ""
+        while len(paragraph) > max_chars:
+            chunks.append(paragraph[:max_chars])
+            paragraph = paragraph[max_chars:]
+        current = f"{current}\n\n{paragraph}" if current else paragraph
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def chunk_knowledge_base(extra_documents: Optional[Sequence[Dict]] = None,
+                         max_chars: int = 500) -> List[Dict]:
+    """
+    지식 베이스를 검색 단위 청크로 분할
+    
+    각 청크 본문은 "[제목]" 머리줄로 시작하므로 그대로 컨텍스트로 사용할 수 있습니다.
+    
+    Args:
+        extra_documents: rag_documents 테이블 행 목록 (title, content, source, category)
+        max_chars: rag_documents 본문 청크 최대 길이
+    
+    Returns:
+        [{"id", "title", "category", "source", "text"}, ...]
+    """
+    from rag_data.knowledge_base import (
+        VISA_GUIDES, PART_TIME_WORK_GUIDE, NATURALIZATION_GUIDE, GLOSSARY
+    )
+    
+    chunks: List[Dict] = []
+    
+    def add(title: str, category: str, source: str, text: str):
+        chunks.append({
+            "id": len(chunks),
+            "title": title,
+            "category": category,
+            "source": source,
+            "text": text,
+        })
+    
+    section_labels = {
+        "requirements": "자격 요건",
+        "required_documents": "필요 서류",
+        "prohibited_activities": "금지 활동",
+        "income_requirements": "소득 요건",
+        "eligible_occupations": "허용 직종",
+        "tips": "작성 팁",
+        "common_rejection_reasons": "주요 거절 사유",
+    }
+    
+    for visa_code, guide in VISA_GUIDES.items():
+        title = f"{visa_code} {guide['name']} ({guide['name_en']})"
+        add(title, "visa_guide", "VISA_GUIDES",
+            f"[{title}]\n{guide['description']}\n체류 기간: {guide['duration']}")
+        for key, label in section_labels.items():
+            if key in guide:
+                add(f"{visa_code} {guide['name']} - {label}", "visa_guide", "VISA_GUIDES",
+                    f"[{visa_code} {guide['name']} {label}]\n{_format_value(guide[key])}")
+    
+    part_time_labels = {
+        "eligible_visas": "대상 비자",
+        "conditions": "허가 조건",
+        "prohibited_industries": "금지 업종",
+        "required_documents": "필요 서류",
+        "wage_requirements": "임금 요건",
+    }
+    for key, value in PART_TIME_WORK_GUIDE.items():
+        label = part_time_labels.get(key, key)
+        add(f"시간제 취업(아르바이트) - {label}", "part_time_work", "PART_TIME_WORK_GUIDE",
+            f"[시간제 취업 아르바이트 part time {label}]\n{_format_value(value)}")
+    
+    for type_name, info in NATURALIZATION_GUIDE.get("types", {}).items():
+        add(f"귀화 - {type_name}", "naturalization", "NATURALIZATION_GUIDE",
+            f"[귀화 {type_name}]\n{_format_value(info)}")
+    for key, value in NATURALIZATION_GUIDE.items():
+        if key == "types":
+            continue
+        label = {"required_documents": "필요 서류", "tests": "시험"}.get(key, key)
+        add(f"귀화 - {label}", "naturalization", "NATURALIZATION_GUIDE",
+            f"[귀화 {label}]\n{_format_value(value)}")
+    
+    for term, definition in GLOSSARY.items():
+        add(f"용어: {term}", "glossary", "GLOSSARY", f"[용어: {term}]\n{definition}")
+    
+    for row in extra_documents or []:
+        if row.get("is_active") is False:
+            continue
+        title = row.get("title", "")
+        for text in _split_text(row.get("content", ""), max_chars):
+            add(title, row.get("category") or "rag_documents",
+                row.get("source") or "rag_documents", f"[{title}]\n{text}")
+    
+    return chunks
+
+
+# =============================================================================
+# rag_documents 로드
+# =============================================================================
+
+# 저장소 디렉터리에 두는 rag_documents 내보내기 파일 (DB 없이 시작할 때 사용)
+RAG_DOCUMENTS_FILE = "rag_documents.json"
+
+_RAG_DOCUMENT_FIELDS = ("title", "source", "category", "content", "is_active")
+
+
+def _fetch_rag_documents() -> Optional[List[Dict]]:
+    """Supabase rag_documents 테이블에서 활성 문서 조회 (미설정/실패 시 None)"""
+    try:
+        from supabase import create_client
+    except ImportError:
+        return None
+    from config.settings import SUPABASE_URL, SUPABASE_KEY
+    
+    if not SUPABASE_URL or "your-project" in SUPABASE_URL:
+        return None
+    try:
+        client = create_client(SUPABASE_URL, SUPABASE_KEY)
+        response = (
+            client.table("rag_documents")
+            .select(", ".join(_RAG_DOCUMENT_FIELDS))
+            .eq("is_active", True)
+            .order("title")
+            .execute()
+        )
+        return list(response.data or [])
+    except Exception:
+        return None
+
+
+def save_rag_documents(store_dir: str, rows: Sequence[Dict]) -> str:
+    """rag_documents 행을 저장소 디렉터리에 JSON으로 내보내기 (원자적 교체)"""
+    os.makedirs(store_dir, exist_ok=True)
+    path = os.path.join(store_dir, RAG_DOCUMENTS_FILE)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump([{k: row.get(k) for k in _RAG_DOCUMENT_FIELDS} for row in rows],
+                  f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_rag_documents(store_dir: str, fetch=_fetch_rag_documents) -> List[Dict]:
+    """
+    인덱스에 넣을 rag_documents 행 로드
+    
+    DB 조회가 되면 그 결과를, 안 되면 저장소의 내보내기 파일을 사용하고,
+    둘 다 없으면 빈 목록을 반환합니다 (정적 지식 베이스만 색인).
+    
+    Args:
+        store_dir: 저장소 디렉터리 (RAG_STORE_DIR)
+        fetch: DB 조회 함수 (실패 시 None 반환)
+    """
+    rows = fetch() if fetch is not None else None
+    if rows is None:
+        try:
+            with open(os.path.join(store_dir, RAG_DOCUMENTS_FILE), "r", encoding="utf-8") as f:
+                rows = json.load(f)
+        except (OSError, ValueError):
+            rows = []
+    return [row for row in rows if isinstance(row, dict) and row.get("is_active") is not False]
+
+
+# =============================================================================
+# 임베딩
+# =============================================================================
+
+class HashedNgramEmbedder:
+    """
+    문자 n-gram 해싱 임베더 (모델/네트워크 불필요)
+    
+    한글은 형태소 분석 없이도 문자 n-gram으로 충분히 매칭되며, 해시 값은
+    zlib.crc32를 사용하므로 프로세스가 달라도 같은 벡터가 나옵니다.
+    embed(texts) -> (n, dim) float32 행렬을 제공하면 다른 임베더로 교체할 수 있습니다.
+    """
+    
+    def __init__(self, dim: int = 1024, ngram_range: Tuple[int, int] = (2, 3)):
+        """
+        초기화
+        
+        Args:
+            dim: 벡터 차원
+            ngram_range: 사용할 n-gram 길이 범위 (최소, 최대)
+        """
+        self.dim = dim
+        self.ngram_range = ngram_range
+    
+    @property
+    def name(self) -> str:
+        """임베더 식별자 (저장된 벡터와의 호환성 확인용)"""
+        return f"hashed-ngram-{self.dim}-{self.ngram_range[0]}-{self.ngram_range[1]}"
+    
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """텍스트 목록을 L2 정규화된 벡터 행렬로 변환"""
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        
+        for row, text in enumerate(texts):
+            normalized = " ".join(text.lower().split())
+            for token in normalized.split(" "):
+                padded = f" {token} "
+                for n in range(self.ngram_range[0], self.ngram_range[1] + 1):
+                    for i in range(max(1, len(padded) - n + 1)):
+                        h = zlib.crc32(padded[i:i + n].encode("utf-8"))
+                        matrix[row, h % self.dim] += 1.0 if h & 0x80000000 else -1.0
+        
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+
+# =============================================================================
+# 벡터 인덱스
+# =============================================================================
+
+class VectorIndex:
+    """
+    NumPy 행렬 기반 벡터 인덱스
+    
+    모든 청크 벡터를 (n, dim) 행렬 하나에 보관하고, 질의는 행렬-벡터 곱
+    한 번과 argpartition으로 top_k를 구합니다. 수천 개 청크에서도
+    밀리초 이하로 응답합니다.
+    """
+    
+    def __init__(self, vectors: np.ndarray):
+        """
+        초기화
+        
+        Args:
+            vectors: L2 정규화된 (n, dim) 행렬 (float16/float32, memmap 가능)
+        """
+        self.vectors = vectors
+    
+    def __len__(self) -> int:
+        return self.vectors.shape[0]
+    
+    def search(self, query_vector: np.ndarray, top_k: int = 3) -> List[Tuple[int, float]]:
+        """
+        코사인 유사도 상위 top_k 검색
+        
+        Returns:
+            [(청크 인덱스, 점수), ...] 점수 내림차순
+        """
+        if len(self) == 0 or top_k <= 0:
+            return []
+        
+        scores = self.vectors @ query_vector.astype(self.vectors.dtype, copy=False)
+        k = min(top_k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(i), float(scores[i])) for i in top]
+
+
+# =============================================================================
+# 임베딩 저장소 (오프라인 빌드 → 런타임 memory-map)
+# =============================================================================
+
+STORE_FORMAT_VERSION = 1
+
+
+def corpus_fingerprint(chunks: Sequence[Dict], embedder_name: str) -> str:
+    """청크 본문/메타데이터와 임베더 조합의 지문"""
+    payload = json.dumps(
+        [STORE_FORMAT_VERSION, embedder_name, list(chunks)],
+        ensure_ascii=False, sort_keys=True
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _store_base(store_dir: str, fingerprint: str) -> str:
+    """저장소 파일 경로 (확장자 제외)"""
+    return os.path.join(store_dir, f"kb-v{STORE_FORMAT_VERSION}-{fingerprint[:16]}")
+
+
+def save_embedding_store(store_dir: str, chunks: Sequence[Dict], vectors: np.ndarray,
+                         embedder_name: str, dtype: str = "float32") -> str:
+    """
+    청크와 임베딩 행렬을 버전이 붙은 .npy + JSON 사이드카로 저장
+    
+    파일 이름에 지문이 들어가므로 지식 베이스나 임베더가 바뀌면 새 파일이
+    만들어지고, 런타임은 현재 지식 베이스와 일치하는 파일만 사용합니다.
+    
+    Args:
+        store_dir: 저장 디렉터리
+        chunks: chunk_knowledge_base 결과
+        vectors: (n, dim) 임베딩 행렬
+        embedder_name: 임베더 식별자
+        dtype: 저장 형식 ("float32" 또는 "float16")
+    
+    Returns:
+        사이드카(JSON) 파일 경로
+    """
+    fingerprint = corpus_fingerprint(chunks, embedder_name)
+    base = _store_base(store_dir, fingerprint)
+    os.makedirs(store_dir, exist_ok=True)
+    
+    # .npy를 먼저 쓰고 사이드카를 마지막에 교체 (사이드카가 있으면 완성된 저장소)
+    tmp_npy = f"{base}.npy.tmp"
+    with open(tmp_npy, "wb") as f:
+        np.save(f, np.ascontiguousarray(vectors, dtype=dtype))
+    os.replace(tmp_npy, f"{base}.npy")
+    
+    sidecar = {
+        "format_version": STORE_FORMAT_VERSION,
+        "fingerprint": fingerprint,
+        "embedder": embedder_name,
+        "count": int(vectors.shape[0]),
+        "dim": int(vectors.shape[1]) if vectors.ndim == 2 else 0,
+        "dtype": dtype,
+        "vectors_file": os.path.basename(f"{base}.npy"),
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "chunks": list(chunks),
+    }
+    tmp_json = f"{base}.json.tmp"
+    with open(tmp_json, "w", encoding="utf-8") as f:
+        json.dump(sidecar, f, ensure_ascii=False)
+    os.replace(tmp_json, f"{base}.json")
+    
+    return f"{base}.json"
+
+
+def load_embedding_store(store_dir: str, chunks: Sequence[Dict],
+                         embedder_name: str) -> Optional[np.ndarray]:
+    """
+    현재 청크와 일치하는 임베딩 행렬을 memory-map으로 열기
+    
+    같은 호스트의 여러 레플리카가 같은 파일 페이지를 공유하므로,
+    재임베딩 없이 밀리초 단위로 시작할 수 있습니다.
+    
+    Returns:
+        읽기 전용 memmap 행렬 (일치하는 저장소가 없으면 None)
+    """
+    base = _store_base(store_dir, corpus_fingerprint(chunks, embedder_name))
+    try:
+        with open(f"{base}.json", "r", encoding="utf-8") as f:
+            sidecar = json.load(f)
+        if (sidecar.get("format_version") != STORE_FORMAT_VERSION
+                or sidecar.get("embedder") != embedder_name
+                or sidecar.get("count") != len(chunks)):
+            return None
+        vectors = np.load(f"{base}.npy", mmap_mode="r")
+    except (OSError, ValueError):
+        return None
+    
+    if vectors.shape[0] != len(chunks):
+        return None
+    return vectors
+
+
+# =============================================================================
+# 어휘 검색 (BM25)
+# =============================================================================
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:-[a-z0-9]+)*|[가-힣]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    한/영 혼용 토큰화
+    
+    영문/숫자는 단어 단위("d-10", "part", "20"), 한글은 형태소 분석기 없이
+    문자 bigram("시간제" → "시간", "간제")으로 나눕니다. 한 글자 한글은 그대로 둡니다.
+    """
+    tokens = []
+    for match in _TOKEN_PATTERN.finditer(text.lower()):
+        word = match.group()
+        if "가" <= word[0] <= "힣":
+            if len(word) == 1:
+                tokens.append(word)
+            else:
+                tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+        else:
+            tokens.append(word)
+            if "-" in word:
+                tokens.extend(word.split("-"))
+    return tokens
+
+
+class BM25Index:
+    """
+    역색인 기반 BM25 검색
+    
+    색인 시 용어별 포스팅 목록(문서, tf)과 IDF를 미리 계산해 두므로,
+    질의 비용은 전체 문서 수가 아니라 질의 용어의 포스팅 길이에 비례합니다.
+    """
+    
+    def __init__(self, texts: Sequence[str], k1: float = 1.5, b: float = 0.75):
+        """
+        초기화
+        
+        Args:
+            texts: 색인할 문서 본문 목록
+            k1: 용어 빈도 포화 계수
+            b: 문서 길이 정규화 계수
+        """
+        self.k1 = k1
+        self.b = b
+        self.doc_count = len(texts)
+        self.postings: Dict[str, List[Tuple[int, int]]] = {}
+        
+        doc_lengths = []
+        for doc_id, text in enumerate(texts):
+            counts: Dict[str, int] = {}
+            for token in tokenize(text):
+                counts[token] = counts.get(token, 0) + 1
+            doc_lengths.append(sum(counts.values()))
+            for token, tf in counts.items():
+                self.postings.setdefault(token, []).append((doc_id, tf))
+        
+        avg_length = (sum(doc_lengths) / len(doc_lengths)) if doc_lengths else 0.0
+        self._length_norm = [
+            k1 * (1 - b + b * (length / avg_length if avg_length else 0.0))
+            for length in doc_lengths
+        ]
+        self.idf = {
+            term: math.log(1 + (self.doc_count - len(docs) + 0.5) / (len(docs) + 0.5))
+            for term, docs in self.postings.items()
+        }
+    
+    def search(self, query: str, top_k: int = 3) -> List[Tuple[int, float]]:
+        """
+        BM25 상위 top_k 검색
+        
+        Returns:
+            [(문서 인덱스, 점수), ...] 점수 내림차순 (점수 0인 문서 제외)
+        """
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for doc_id, tf in self.postings[term]:
+                scores[doc_id] = scores.get(doc_id, 0.0) + (
+                    idf * tf * (self.k1 + 1) / (tf + self._length_norm[doc_id])
+                )
+        
+        return heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[Tuple[int, float]]],
+                           top_k: int = 3, k: int = 60) -> List[Tuple[int, float]]:
+    """
+    여러 검색기의 순위를 RRF(Reciprocal Rank Fusion)로 결합
+    
+    점수 척도가 다른 검색기(BM25, 벡터 등)도 순위만으로 합칠 수 있습니다.
+    
+    Args:
+        rankings: 검색기별 [(문서 인덱스, 점수), ...] (점수 내림차순)
+        top_k: 반환할 결과 수
+        k: 순위 완화 상수
+    
+    Returns:
+        [(문서 인덱스, 결합 점수), ...] 결합 점수 내림차순
+    """
+    fused: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, (doc_id, _) in enumerate(ranking):
+            fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (k + rank + 1)
+    return heapq.nlargest(top_k, fused.items(), key=lambda item: item[1])
@@ -0,0 +1,113 @@
+"""
+K-Stay Render Cache
+생성된 문서 바이트의 콘텐츠 주소 기반 LRU 캐시
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+import hashlib
+import json
+import threading
+
+
+def render_key(doc_name: str, template_version: str, inputs: Dict[str, Any]) -> str:
+    """
+    렌더링 캐시 키 생성
+    
+    Args:
+        doc_name: 문서 이름
+        template_version: 템플릿 버전 (템플릿 지문 등)
+        inputs: 문서가 실제로 참조하는 데이터만 담은 딕셔너리
+    
+    Returns:
+        SHA-256 hex 키
+    """
+    payload = json.dumps(
+        [doc_name, template_version, inputs],
+        ensure_ascii=False, sort_keys=True, default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class RenderCache:
+    """
+    렌더링 캐시
+    
+    키는 (문서, 템플릿 버전, 참조 데이터) 해시이므로 입력이 바뀌지 않은
+    문서는 다시 렌더링하지 않고 재사용합니다. 총 바이트 수가 max_bytes를
+    넘으면 가장 오래 사용되지 않은 항목부터 제거합니다.
+    """
+    
+    def __init__(self, max_bytes: int):
+        """
+        초기화
+        
+        Args:
+            max_bytes: 캐시 최대 용량 (0이면 캐시 비활성화)
+        """
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, key: str) -> Optional[bytes]:
+        """캐시 조회 (적중 시 최근 사용으로 갱신)"""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+    
+    def put(self, key: str, value: bytes):
+        """캐시 저장 (용량 초과 시 LRU 제거)"""
+        if not self.max_bytes or not value or len(value) > self.max_bytes:
+            return
+        
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old)
+            
+            self._entries[key] = value
+            self._size += len(value)
+            
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+    
+    def clear(self):
+        """캐시 비우기"""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+    
+    def stats(self) -> Dict[str, int]:
+        """캐시 통계"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+_render_cache: Optional[RenderCache] = None
+_render_cache_lock = threading.Lock()
+
+
+def get_render_cache() -> RenderCache:
+    """프로세스 전역 렌더링 캐시"""
+    global _render_cache
+    
+    if _render_cache is None:
+        with _render_cache_lock:
+            if _render_cache is None:
+                from config.settings import RENDER_CACHE_MAX_BYTES
+                _render_cache = RenderCache(RENDER_CACHE_MAX_BYTES)
+    return _render_cache
@@ -0,0 +1,198 @@
+"""
+K-Stay Response Cache
+AI 응답 캐시 (정규화 질의 + 검색 컨텍스트 지문, 유사 질의 매칭)
+"""
+
+from collections import OrderedDict
+from typing import Dict, Optional, Set
+import hashlib
+import re
+import threading
+import time
+
+import numpy as np
+
+_PUNCTUATION = re.compile(r"[^\w\s-]")
+
+# 답을 바꾸는 식별 토큰 (비자 코드 d-2/f-1-5/e7, 숫자) - 유사 질의도 이 값이 같아야 적중
+_KEY_TOKEN = re.compile(r"[a-z]+-?\d+(?:-\d+)*|\d+(?:[.,]\d+)*")
+
+
+def normalize_query(query: str) -> str:
+    """대소문자/문장부호/공백 차이를 제거한 질의"""
+    return " ".join(_PUNCTUATION.sub(" ", query.lower()).split())
+
+
+def key_tokens(normalized: str) -> frozenset:
+    """정규화된 질의의 비자 코드/숫자 토큰"""
+    return frozenset(_KEY_TOKEN.findall(normalized))
+
+
+def context_fingerprint(context: str) -> str:
+    """검색 컨텍스트 지문 (같은 자료를 근거로 한 답변만 재사용)"""
+    return hashlib.sha256(context.encode("utf-8")).hexdigest()[:16]
+
+
+class _Entry:
+    """캐시 항목"""
+    __slots__ = ("context_fp", "response", "expires_at", "vector", "tokens")
+    
+    def __init__(self, context_fp: str, response: str, expires_at: float,
+                 vector: Optional[np.ndarray], tokens: frozenset):
+        self.context_fp = context_fp
+        self.response = response
+        self.expires_at = expires_at
+        self.vector = vector
+        self.tokens = tokens
+
+
+class ResponseCache:
+    """
+    AI 응답 캐시
+    
+    키는 (정규화된 질의, 검색 컨텍스트 지문)입니다. similarity_threshold가
+    설정되면 같은 컨텍스트를 가진 항목 중 임베딩 코사인 유사도가 임계값
+    이상인 질의도 적중으로 처리합니다. 문자 n-gram 유사도는 "D-2"와 "D-4",
+    "20시간"과 "30시간"을 구분하지 못하므로, 비자 코드/숫자 토큰이 정확히
+    같은 항목만 유사 질의 후보가 됩니다. TTL이 지난 항목은 무시되고,
+    max_entries를 넘으면 가장 오래 사용되지 않은 항목부터 제거합니다.
+    """
+    
+    def __init__(self, max_entries: int = 512, ttl_seconds: float = 3600,
+                 similarity_threshold: float = 0.0, embedder=None):
+        """
+        초기화
+        
+        Args:
+            max_entries: 최대 항목 수 (0이면 캐시 비활성화)
+            ttl_seconds: 항목 유효 시간 (초)
+            similarity_threshold: 유사 질의 매칭 임계값 (0이면 정확히 일치할 때만)
+            embedder: 유사 질의 매칭용 임베더 (embed(texts) -> 행렬)
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.embedder = embedder if similarity_threshold > 0 else None
+        
+        self._entries: "OrderedDict[tuple, _Entry]" = OrderedDict()
+        self._by_context: Dict[str, Set[tuple]] = {}
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "near_hits": 0, "misses": 0, "evictions": 0}
+    
+    def get(self, query: str, context: str = "") -> Optional[str]:
+        """캐시된 응답 조회 (없으면 None)"""
+        if not self.max_entries:
+            return None
+        
+        normalized = normalize_query(query)
+        context_fp = context_fingerprint(context)
+        key = (normalized, context_fp)
+        now = time.monotonic()
+        
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at > now:
+                self._entries.move_to_end(key)
+                self._counters["hits"] += 1
+                return entry.response
+            if entry is not None:
+                self._remove(key)
+            candidates = list(self._by_context.get(context_fp, ()))
+        
+        if self.embedder is not None and candidates:
+            vector = self.embedder.embed([normalized])[0]
+            tokens = key_tokens(normalized)
+            best_key, best_score = None, self.similarity_threshold
+            with self._lock:
+                for candidate in candidates:
+                    entry = self._entries.get(candidate)
+                    if entry is None or entry.vector is None or entry.expires_at <= now:
+                        continue
+                    if entry.tokens != tokens:
+                        continue
+                    score = float(entry.vector @ vector)
+                    if score >= best_score:
+                        best_key, best_score = candidate, score
+                if best_key is not None:
+                    self._entries.move_to_end(best_key)
+                    self._counters["near_hits"] += 1
+                    return self._entries[best_key].response
+        
+        with self._lock:
+            self._counters["misses"] += 1
+        return None
+    
+    def put(self, query: str, context: str, response: str):
+        """응답 저장"""
+        if not self.max_entries or not response:
+            return
+        
+        normalized = normalize_query(query)
+        context_fp = context_fingerprint(context)
+        key = (normalized, context_fp)
+        vector = self.embedder.embed([normalized])[0] if self.embedder is not None else None
+        
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = _Entry(
+                context_fp, response, time.monotonic() + self.ttl_seconds, vector,
+                key_tokens(normalized)
+            )
+            self._by_context.setdefault(context_fp, set()).add(key)
+            
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._counters["evictions"] += 1
+    
+    def stats(self) -> Dict[str, float]:
+        """적중/미스 통계"""
+        with self._lock:
+            stats = dict(self._counters, entries=len(self._entries))
+        lookups = stats["hits"] + stats["near_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["hits"] + stats["near_hits"]) / lookups if lookups else 0.0
+        return stats
+    
+    def clear(self):
+        """캐시 비우기"""
+        with self._lock:
+            self._entries.clear()
+            self._by_context.clear()
+    
+    def _remove(self, key: tuple):
+        """항목 제거 (lock 보유 상태에서 호출)"""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        keys = self._by_context.get(entry.context_fp)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_context[entry.context_fp]
+
+
+_response_cache: Optional[ResponseCache] = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """프로세스 전역 AI 응답 캐시"""
+    global _response_cache
+    
+    if _response_cache is None:
+        with _response_cache_lock:
+            if _response_cache is None:
+                from config.settings import (
+                    RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_TTL_SECONDS,
+                    RESPONSE_CACHE_SIMILARITY
+                )
+                from services.rag_index import HashedNgramEmbedder
+                
+                _response_cache = ResponseCache(
+                    max_entries=RESPONSE_CACHE_MAX_ENTRIES,
+                    ttl_seconds=RESPONSE_CACHE_TTL_SECONDS,
+                    similarity_threshold=RESPONSE_CACHE_SIMILARITY,
+                    embedder=HashedNgramEmbedder(),
+                )
+    return _response_cache
@@ -0,0 +1,95 @@
+"""
+K-Stay Single Flight
+동일한 진행 중 요청 합치기 (같은 키의 동시 호출은 한 번만 실행)
+"""
+
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+import threading
+
+
+class SingleFlight:
+    """
+    요청 합치기
+    
+    같은 키로 동시에 들어온 호출 중 첫 호출(리더)만 실제로 실행하고,
+    나머지(팔로워)는 리더의 Future를 기다려 같은 결과(또는 예외)를 받습니다.
+    호출이 끝나면 키가 비워지므로 결과를 캐시하지는 않습니다.
+    Streamlit 스크립트 스레드 간에 안전합니다.
+    """
+    
+    def __init__(self):
+        self._calls: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self._counters = {"calls": 0, "executions": 0, "coalesced": 0}
+    
+    def begin(self, key: Hashable) -> Tuple[Future, bool]:
+        """
+        호출 시작
+        
+        Returns:
+            (Future, 리더 여부). 리더는 실행 후 반드시 finish()를 호출해야 합니다.
+        """
+        with self._lock:
+            self._counters["calls"] += 1
+            future = self._calls.get(key)
+            if future is not None:
+                self._counters["coalesced"] += 1
+                return future, False
+            
+            future = Future()
+            self._calls[key] = future
+            self._counters["executions"] += 1
+            return future, True
+    
+    def finish(self, key: Hashable, future: Future, result: Any = None,
+               error: Optional[BaseException] = None):
+        """리더의 실행 결과를 기다리던 호출들에 전달"""
+        with self._lock:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+    
+    def do(self, key: Hashable, fn: Callable[[], Any], timeout: Optional[float] = None) -> Any:
+        """
+        키당 한 번만 fn 실행
+        
+        Args:
+            key: 요청 키 (정규화된 요청)
+            fn: 실제 호출
+            timeout: 팔로워의 최대 대기 시간 (초)
+        """
+        future, leader = self.begin(key)
+        if not leader:
+            return future.result(timeout)
+        
+        try:
+            result = fn()
+        except BaseException as e:
+            self.finish(key, future, error=e)
+            raise
+        self.finish(key, future, result)
+        return result
+    
+    def stats(self) -> Dict[str, int]:
+        """호출/실행/합쳐진 호출 수"""
+        with self._lock:
+            return dict(self._counters, in_flight=len(self._calls))
+
+
+_single_flight: Optional[SingleFlight] = None
+_single_flight_lock = threading.Lock()
+
+
+def get_single_flight() -> SingleFlight:
+    """프로세스 전역 요청 합치기"""
+    global _single_flight
+    
+    if _single_flight is None:
+        with _single_flight_lock:
+            if _single_flight is None:
+                _single_flight = SingleFlight()
+    return _single_flight
@@ -0,0 +1,197 @@
+"""
+K-Stay Template Structure Cache
+Word 템플릿 구조 인덱스 캐시 (메모리 + 디스크)
+"""
+
+from typing import Dict, Optional
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+# python-docx (실제 배포 시 활성화)
+try:
+    from docx import Document
+except ImportError:  # 개발 환경에서는 python-docx 없이도 동작
+    Document = None
+
+
+class TemplateStructureCache:
+    """
+    템플릿 구조 캐시
+    
+    템플릿 경로와 (mtime, size)를 키로 파싱 결과를 보관합니다.
+    인덱스는 디스크에 JSON으로 저장되어 새 프로세스에서도 다시 파싱하지
+    않고 불러올 수 있고, 템플릿 파일이 바뀌면 자동으로 무효화됩니다.
+    mtime만 바뀌고 내용(SHA-256)이 같으면 파싱 없이 시그니처만 갱신합니다.
+    """
+    
+    INDEX_VERSION = 1
+    
+    def __init__(self, cache_dir: str):
+        """
+        초기화
+        
+        Args:
+            cache_dir: 구조 인덱스를 저장할 디렉터리
+        """
+        self.cache_dir = cache_dir
+        self._memory: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "parses": 0}
+    
+    def get(self, template_path: str) -> Dict:
+        """
+        템플릿 구조 인덱스 조회 (없거나 오래되었으면 파싱 후 저장)
+        
+        Args:
+            template_path: .docx 템플릿 경로
+        
+        Returns:
+            {"fingerprint", "paragraphs", "tables", "label_cells"} 구조 딕셔너리
+        """
+        path = os.path.abspath(template_path)
+        stat = os.stat(path)
+        signature = [stat.st_mtime_ns, stat.st_size]
+        
+        with self._lock:
+            entry = self._memory.get(path)
+            if entry and entry["signature"] == signature:
+                self.stats["memory_hits"] += 1
+                return entry["structure"]
+        
+        entry = self._load_index(path)
+        if entry and entry["signature"] == signature:
+            counter = "disk_hits"
+        else:
+            digest = self._file_digest(path)
+            if entry and entry["sha256"] == digest:
+                # 내용은 그대로이고 mtime만 변경된 경우
+                counter = "disk_hits"
+                entry["signature"] = signature
+            else:
+                counter = "parses"
+                entry = {
+                    "version": self.INDEX_VERSION,
+                    "template_path": path,
+                    "signature": signature,
+                    "sha256": digest,
+                    "structure": self._parse(path, digest),
+                }
+            self._save_index(path, entry)
+        
+        # 통계는 렌더링 워커 스레드들이 동시에 갱신하므로 lock 안에서 증가
+        with self._lock:
+            self._memory[path] = entry
+            self.stats[counter] += 1
+        
+        return entry["structure"]
+    
+    def invalidate(self, template_path: Optional[str] = None):
+        """메모리/디스크 인덱스 무효화 (경로 미지정 시 전체)"""
+        with self._lock:
+            paths = [os.path.abspath(template_path)] if template_path else list(self._memory)
+            for path in paths:
+                self._memory.pop(path, None)
+                try:
+                    os.remove(self._index_path(path))
+                except FileNotFoundError:
+                    pass
+    
+    def _parse(self, path: str, digest: str) -> Dict:
+        """python-docx로 템플릿을 파싱하여 압축 인덱스 생성"""
+        if Document is None:
+            raise RuntimeError("python-docx가 설치되어 있지 않습니다.")
+        
+        document = Document(path)
+        
+        paragraphs = []
+        for i, paragraph in enumerate(document.paragraphs):
+            text = paragraph.text.strip()
+            if text:
+                style = paragraph.style.name if paragraph.style is not None else ""
+                paragraphs.append({"index": i, "text": text, "style": style})
+        
+        tables = []
+        label_cells = []
+        for t_idx, table in enumerate(document.tables):
+            rows = []
+            for r_idx, row in enumerate(table.rows):
+                cells = [
+                    {"cell_index": c_idx, "text": cell.text.strip()}
+                    for c_idx, cell in enumerate(row.cells)
+                ]
+                rows.append(cells)
+                
+                # 라벨 셀: 텍스트가 있고 오른쪽에 입력 셀이 있는 셀
+                for c_idx, cell in enumerate(cells[:-1]):
+                    if cell["text"]:
+                        label_cells.append({
+                            "table_index": t_idx,
+                            "row": r_idx,
+                            "cell": c_idx,
+                            "text": cell["text"],
+                        })
+            tables.append({"index": t_idx, "rows": rows})
+        
+        return {
+            "fingerprint": digest,
+            "paragraphs": paragraphs,
+            "tables": tables,
+            "label_cells": label_cells,
+        }
+    
+    def _index_path(self, path: str) -> str:
+        """템플릿 경로에 대응하는 인덱스 파일 경로"""
+        name = hashlib.sha1(path.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{name}.json")
+    
+    def _load_index(self, path: str) -> Optional[Dict]:
+        """디스크 인덱스 로드 (없거나 손상/구버전이면 None)"""
+        try:
+            with open(self._index_path(path), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        
+        if entry.get("version") != self.INDEX_VERSION or entry.get("template_path") != path:
+            return None
+        return entry
+    
+    def _save_index(self, path: str, entry: Dict):
+        """디스크 인덱스 저장 (원자적 교체)"""
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp_path, self._index_path(path))
+        except OSError:
+            # 읽기 전용 파일시스템 등: 메모리 캐시만 사용
+            pass
+    
+    @staticmethod
+    def _file_digest(path: str) -> str:
+        """파일 내용 SHA-256"""
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(65536), b""):
+                h.update(block)
+        return h.hexdigest()
+
+
+_template_cache: Optional[TemplateStructureCache] = None
+_template_cache_lock = threading.Lock()
+
+
+def get_template_cache() -> TemplateStructureCache:
+    """프로세스 전역 템플릿 구조 캐시"""
+    global _template_cache
+    
+    if _template_cache is None:
+        with _template_cache_lock:
+            if _template_cache is None:
+                from config.settings import TEMPLATE_INDEX_DIR
+                _template_cache = TemplateStructureCache(TEMPLATE_INDEX_DIR)
+    return _template_cache
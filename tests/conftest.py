@@ -0,0 +1,8 @@
+"""
+K-Stay 테스트 공통 설정
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
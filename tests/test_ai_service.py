@@ -0,0 +1,152 @@
+"""
+AIService 응답 캐시/요청 합치기 테스트
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import threading
+
+import pytest
+
+from services import ai_service
+from services.ai_service import AIService
+from services.response_cache import ResponseCache
+
+
+def _echo_history(self, user_message, messages):
+    """LLM 대신 대화 내용을 그대로 돌려주는 응답 (맥락이 섞이면 드러남)"""
+    return " / ".join(m["content"] for m in messages if m["role"] != "system")
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = ResponseCache(max_entries=16)
+    monkeypatch.setattr(ai_service, "get_response_cache", lambda: cache)
+    monkeypatch.setattr(AIService, "_generate_chat_response", _echo_history)
+    monkeypatch.setattr(AIService, "_stream_chat_response",
+                        lambda self, *args: iter([_echo_history(self, *args)]))
+    return cache
+
+
+def _history(topic: str, message: str):
+    return [
+        {"role": "user", "content": f"{topic} 비자에 대해 알려주세요."},
+        {"role": "assistant", "content": f"{topic} 비자 안내입니다."},
+        {"role": "user", "content": message},
+    ]
+
+
+def test_same_message_with_different_histories_is_not_shared(cache):
+    service = AIService()
+    
+    first = service.chat_response("네", _history("D-10", "네"))
+    second = service.chat_response("네", _history("F-6", "네"))
+    
+    assert "D-10" in first and "F-6" not in first
+    assert "F-6" in second and "D-10" not in second
+    assert cache.stats()["entries"] == 0
+
+
+def test_stream_with_different_histories_is_not_shared(cache):
+    service = AIService()
+    
+    first = "".join(service.chat_response_stream("다음은요?", _history("D-10", "다음은요?")))
+    second = "".join(service.chat_response_stream("다음은요?", _history("F-6", "다음은요?")))
+    
+    assert "D-10" in first and "F-6" in second
+    assert cache.stats()["entries"] == 0
+
+
+def test_first_turn_is_cached(cache):
+    service = AIService()
+    question = "D-10 구직비자에 대해 알려주세요."
+    
+    first = service.chat_response(question, [{"role": "user", "content": question}])
+    second = service.chat_response(question, [])
+    
+    assert first == second
+    assert cache.stats()["hits"] == 1
+
+
+def test_concurrent_calls_with_different_histories_are_not_coalesced(cache, monkeypatch):
+    started = threading.Event()
+    release = threading.Event()
+    
+    def slow_echo(self, user_message, messages):
+        started.set()
+        release.wait(5)
+        return _echo_history(self, user_message, messages)
+    
+    monkeypatch.setattr(AIService, "_generate_chat_response", slow_echo)
+    service = AIService()
+    
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        first = pool.submit(service.chat_response, "네", _history("D-10", "네"))
+        started.wait(5)
+        second = pool.submit(service.chat_response, "네", _history("F-6", "네"))
+        release.set()
+        
+        assert "D-10" in first.result() and "F-6" in second.result()
+
+
+def test_unshared_stream_bypasses_cache_on_first_turn(cache):
+    service = AIService()
+    question = "D-10 구직비자에 대해 알려주세요."
+    
+    "".join(service.chat_response_stream(question, [], shared=False))
+    "".join(service.chat_response_stream(question, [], shared=False))
+    
+    assert cache.stats()["entries"] == 0
+    assert cache.stats()["hits"] == 0
+
+
+class _UnavailableRouter:
+    """모든 모델이 장애 상태인 라우터 (로컬 응답으로 대체)"""
+    
+    def __init__(self):
+        self.fallbacks = []
+    
+    def route(self, call_type, prompt_tokens=0):
+        self.fallbacks.append(call_type)
+        return None
+
+
+def test_degraded_narrative_is_flagged_not_prefixed():
+    router = _UnavailableRouter()
+    llm = type("LLM", (), {"client": object()})()
+    service = AIService(llm=llm, router=router)
+    data = {"major": "컴퓨터공학", "given_name": "Minh", "nationality": "베트남"}
+    
+    text, degraded = service.generate_narrative_draft("{major} 전공자의 계획서", data)
+    
+    assert degraded and router.fallbacks == ["narrative"]
+    assert ai_service.DEGRADED_NOTICE.strip() not in text
+    assert "Minh" in text
+    assert service.generate_narrative("{major} 전공자의 계획서", data) == text
+
+
+class _AvailableRouter(_UnavailableRouter):
+    def route(self, call_type, prompt_tokens=0):
+        return object()
+    
+    def record_fallback(self, call_type):
+        self.fallbacks.append(call_type)
+
+
+@pytest.mark.parametrize("content", ["", "{\"is_valid\": tru", "[]", None])
+def test_malformed_validation_json_falls_back_to_rules(monkeypatch, content):
+    from services.narrative_rules import get_narrative_rule_engine
+    
+    message = type("Message", (), {"content": content})()
+    response = type("Response", (), {"choices": [type("Choice", (), {"message": message})()]})()
+    monkeypatch.setattr(AIService, "_complete", lambda self, *args, **kwargs: response)
+    router = _AvailableRouter()
+    service = AIService(llm=type("LLM", (), {"client": object()})(), router=router)
+    narrative = "저는 2024년 3월부터 한국에서 소프트웨어 개발자로 취업하기 위해 구직 활동을 해왔습니다. " * 5
+    rule_result, hard_passed = get_narrative_rule_engine("A").check(narrative)
+    assert hard_passed
+    
+    result = service.validate_narrative(narrative, "검토하세요", {"scenario_id": "A"})
+    
+    assert result["score"] == rule_result["score"]
+    assert result["suggestions"][-1].startswith("AI 상세 검토가 지연되어")
+    assert router.fallbacks == ["validation"]
@@ -0,0 +1,45 @@
+"""
+DocumentService 렌더링 캐시 테스트
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from services import document_service
+from services.document_service import DocumentService
+from services.render_cache import RenderCache
+
+USER = {"surname": "NGUYEN", "given_name": "Minh", "birth_date": "1998-03-02"}
+FORM = {"employer_name": "케이스테이"}
+
+
+class _TickingClock(datetime):
+    """호출할 때마다 하루씩 지나가는 시계 (문서에 시각이 들어가면 결과가 달라짐)"""
+    ticks = 0
+    
+    @classmethod
+    def now(cls, tz=None):
+        cls.ticks += 1
+        return datetime(2024, 1, 1, tzinfo=tz) + timedelta(days=cls.ticks)
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = RenderCache(max_bytes=1024 * 1024)
+    monkeypatch.setattr(document_service, "get_render_cache", lambda: cache)
+    monkeypatch.setattr(document_service, "datetime", _TickingClock)
+    return cache
+
+
+@pytest.mark.parametrize("doc_name", ["신원보증서", "사업자등록증 사본"], ids=["template", "fallback"])
+def test_cached_document_matches_fresh_render(cache, doc_name):
+    service = DocumentService()
+    
+    first = service.generate_document(doc_name, USER, FORM, {})
+    cached = service.generate_document(doc_name, USER, FORM, {})
+    cache.clear()
+    fresh = service.generate_document(doc_name, USER, FORM, {})
+    
+    assert cache.hits == 1
+    assert first == cached == fresh
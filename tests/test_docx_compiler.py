@@ -0,0 +1,83 @@
+"""
+Word 템플릿 컴파일러 렌더링 테스트 (python-docx로 다시 읽어 확인)
+"""
+
+import io
+
+import docx
+import pytest
+
+from services.docx_compiler import compile_template
+
+VALUE = "A<&>B\n둘째 줄"
+
+
+def _mapping(table_index, row, cell, value):
+    return {"target_type": "table", "table_index": table_index, "row": row,
+            "cell": cell, "value": value}
+
+
+@pytest.fixture
+def template(tmp_path):
+    """병합 셀/굵은 글씨 라벨/중첩 표가 있는 템플릿"""
+    document = docx.Document()
+    table = document.add_table(rows=3, cols=3)
+    table.cell(0, 0).merge(table.cell(0, 1))  # gridSpan
+    table.cell(1, 0).merge(table.cell(2, 0))  # vMerge
+    
+    label = table.cell(1, 1).paragraphs[0]
+    label.add_run("성명").bold = True
+    label.add_run(" (Full Name)")
+    
+    nested = table.cell(0, 2).add_table(rows=1, cols=2)
+    nested.cell(0, 0).text = "중첩"
+    
+    document.add_paragraph("본문")
+    second = document.add_table(rows=1, cols=2)
+    second.cell(0, 1).text = "원본"
+    
+    path = tmp_path / "template.docx"
+    document.save(str(path))
+    return str(path)
+
+
+def _render(template, mappings):
+    return docx.Document(io.BytesIO(compile_template(template).render(mappings)))
+
+
+def test_merged_cells_follow_python_docx_numbering(template):
+    document = _render(template, [
+        _mapping(0, 0, 1, "가로 병합"),
+        _mapping(0, 2, 0, "세로 병합"),
+    ])
+    rows = document.tables[0].rows
+    
+    assert [c.text for c in rows[0].cells[:2]] == ["가로 병합", "가로 병합"]
+    assert rows[1].cells[0].text == rows[2].cells[0].text == "세로 병합"
+
+
+def test_value_is_escaped_and_keeps_first_run_format(template):
+    document = _render(template, [_mapping(0, 1, 1, VALUE)])
+    cell = document.tables[0].rows[1].cells[1]
+    
+    assert cell.text == VALUE
+    assert len(cell.paragraphs) == 1
+    assert cell.paragraphs[0].runs[0].bold
+
+
+def test_nested_table_is_kept_and_not_numbered(template):
+    document = _render(template, [_mapping(1, 0, 1, VALUE)])
+    
+    assert len(document.tables) == 2
+    assert document.tables[0].rows[0].cells[2].tables[0].cell(0, 0).text == "중첩"
+    assert document.tables[1].rows[0].cells[1].text == VALUE
+    assert document.tables[1].rows[0].cells[0].text == ""
+
+
+def test_unmapped_template_renders_unchanged(template):
+    original = docx.Document(template)
+    document = _render(template, [])
+    
+    for before, after in zip(original.tables, document.tables):
+        assert [c.text for r in before.rows for c in r.cells] == \
+            [c.text for r in after.rows for c in r.cells]
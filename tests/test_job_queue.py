@@ -0,0 +1,68 @@
+"""
+JobStore 중단 작업 처리 테스트
+"""
+
+import sqlite3
+import time
+
+from config.settings import SCENARIOS
+from services.job_queue import JOB_FAILED, JOB_QUEUED, JOB_RUNNING, JobStore
+
+
+def test_only_jobs_without_recent_heartbeat_are_failed(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    scenario = SCENARIOS["A"]
+    store.create("live", scenario, {}, owner="replica-1")
+    store.create("dead", scenario, {}, owner="replica-2")
+    store.update("live", status=JOB_RUNNING)
+    store.update("dead", status=JOB_RUNNING, heartbeat_at=time.time() - 300)
+    
+    # 다른 레플리카가 새로 시작해도 heartbeat가 살아 있는 작업은 그대로
+    assert store.fail_stale(60) == 1
+    assert store.get("live")["status"] == JOB_RUNNING
+    assert store.get("dead")["status"] == JOB_FAILED
+    
+    store.update("live", heartbeat_at=time.time() - 300)
+    assert store.heartbeat("replica-1") == 1
+    assert store.fail_stale(60) == 0
+
+
+def test_existing_database_gets_owner_columns(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE package_jobs (id TEXT PRIMARY KEY, user_id TEXT, "
+                     "scenario_id TEXT NOT NULL, scenario_name TEXT, visa_type TEXT, "
+                     "form_data TEXT, narrative_data TEXT, status TEXT, stage TEXT, "
+                     "progress_done INTEGER, progress_total INTEGER, package_digest TEXT, "
+                     "file_size INTEGER, error TEXT, created_at REAL, updated_at REAL, "
+                     "started_at REAL, completed_at REAL)")
+    
+    store = JobStore(path)
+    store.create("job", SCENARIOS["A"], {}, owner="replica-1")
+    
+    job = store.get("job")
+    assert job["owner"] == "replica-1" and job["status"] == JOB_QUEUED
+
+
+def test_job_with_narrative_errors_fails_without_rendering(tmp_path, monkeypatch):
+    from services import narrative_batch
+    from services.job_queue import PackageJobQueue
+    from services.narrative_batch import NarrativeBundle, NarrativeResult
+    
+    failed = NarrativeResult(field_name="job_search_plan", text="", validation={},
+                             error="'월별 구직 활동 계획' 처리 중 오류 발생: major")
+    monkeypatch.setattr(narrative_batch, "prepare_narrative_bundle_sync",
+                        lambda *args, **kwargs: NarrativeBundle("A", {"job_search_plan": failed}))
+    rendered = []
+    monkeypatch.setattr(PackageJobQueue, "_render", lambda self, *args: rendered.append(args))
+    
+    queue = PackageJobQueue(JobStore(str(tmp_path / "jobs.sqlite3")), workers=1, render_processes=0)
+    job_id = queue.submit(SCENARIOS["A"], {}, {}, ai_service=None)
+    for _ in range(100):
+        job = queue.status(job_id)
+        if job["status"] == JOB_FAILED:
+            break
+        time.sleep(0.05)
+    
+    assert job["status"] == JOB_FAILED and "major" in job["error"]
+    assert rendered == []
@@ -0,0 +1,31 @@
+"""
+LLM 스케줄러 대기 시간 제한 테스트
+"""
+
+import time
+
+import pytest
+
+from services.llm_scheduler import LLMScheduler
+
+
+def test_zero_queue_timeout_fails_without_waiting():
+    scheduler = LLMScheduler(rpm=1, queue_timeout=0)
+    scheduler.acquire()
+    
+    started = time.monotonic()
+    with pytest.raises(TimeoutError):
+        scheduler.acquire()
+    
+    assert time.monotonic() - started < 0.5
+
+
+def test_zero_call_timeout_overrides_queue_timeout():
+    scheduler = LLMScheduler(rpm=1, queue_timeout=120)
+    scheduler.acquire()
+    
+    started = time.monotonic()
+    with pytest.raises(TimeoutError):
+        scheduler.acquire(timeout=0.0)
+    
+    assert time.monotonic() - started < 0.5
@@ -0,0 +1,57 @@
+"""
+사연 일괄 처리 실패 항목 테스트
+"""
+
+import pytest
+
+from config.settings import SCENARIOS
+from services import narrative_batch
+from services.narrative_batch import prepare_narrative_bundle_sync
+from services.narrative_prefetch import NarrativePrefetcher
+
+VALID = {"is_valid": True, "score": 90, "issues": [], "suggestions": [], "improved_version": None}
+
+
+class _FakeAIService:
+    def __init__(self, draft=None, error=None):
+        self.draft = draft
+        self.error = error
+    
+    async def agenerate_narrative_draft(self, prompt, data):
+        if self.error:
+            raise self.error
+        return self.draft
+    
+    async def avalidate_narrative(self, text, validation_prompt, scenario_context):
+        return VALID
+
+
+@pytest.fixture(autouse=True)
+def no_prefetch(monkeypatch):
+    monkeypatch.setattr(narrative_batch, "get_narrative_prefetcher",
+                        lambda: NarrativePrefetcher(max_workers=0))
+
+
+@pytest.mark.parametrize("ai_service", [
+    _FakeAIService(draft=("[AI 생성 예시] 로컬 초안", True)),
+    _FakeAIService(error=KeyError("major")),
+])
+def test_failed_generation_is_an_error_and_not_packaged(ai_service):
+    scenario = SCENARIOS["A"]
+    field = scenario.ai_prompts["narrative_field"]
+    
+    bundle = prepare_narrative_bundle_sync(scenario, {}, drafts={}, ai_service=ai_service)
+    
+    assert field in bundle.errors
+    assert field not in bundle.narrative_data
+    assert not bundle.is_valid
+
+
+def test_section_without_prompt_or_draft_is_left_blank():
+    scenario = SCENARIOS["B"]
+    
+    bundle = prepare_narrative_bundle_sync(scenario, {}, drafts={}, ai_service=_FakeAIService())
+    
+    assert bundle.errors == {}
+    assert bundle.narrative_data == {}
+    assert not bundle.is_valid
@@ -0,0 +1,75 @@
+"""
+사연 초안 선행 생성 키 테스트
+"""
+
+from services.narrative_prefetch import prefetch_key
+
+PROMPT = "{education_level} {major} 전공자의 {target_position} 구직 계획서를 작성하세요."
+INPUTS = {"education_level": "석사", "major": "컴퓨터공학", "target_position": "백엔드 개발자"}
+
+
+def test_personal_fields_read_by_generator_are_in_key():
+    first = prefetch_key(PROMPT, {**INPUTS, "given_name": "Minh", "nationality": "베트남"})
+    second = prefetch_key(PROMPT, {**INPUTS, "given_name": "Aziz", "nationality": "우즈베키스탄"})
+    
+    assert first is not None and second is not None
+    assert first != second
+
+
+def test_key_requires_prompt_fields():
+    assert prefetch_key(PROMPT, {"education_level": "석사", "major": "컴퓨터공학"}) is None
+    assert prefetch_key(PROMPT, INPUTS) == prefetch_key(PROMPT, dict(INPUTS, unrelated="x"))
+
+
+class _RecordingAIService:
+    """생성 호출을 기록하는 AI 서비스 (선행 생성과 작업 시점 생성을 구분)"""
+    
+    def __init__(self):
+        self.calls = []
+    
+    def generate_narrative_draft(self, prompt, data):
+        self.calls.append("prefetch")
+        return f"{data['major']} 전공 {data['target_position']} 구직 계획", False
+    
+    async def agenerate_narrative_draft(self, prompt, data):
+        self.calls.append("job")
+        return "작업 시점 생성", False
+    
+    async def avalidate_narrative(self, text, validation_prompt, scenario_context):
+        return {"is_valid": True, "score": 90, "issues": [], "suggestions": [], "improved_version": None}
+
+
+def test_phase1_submission_prefetch_is_used_by_package_job(monkeypatch):
+    import streamlit as st
+    from config.settings import SCENARIOS
+    from pages import scenario_form
+    from services import narrative_batch
+    from services.narrative_batch import prepare_narrative_bundle_sync
+    from services.narrative_prefetch import NarrativePrefetcher
+    
+    scenario = SCENARIOS["A"]
+    prefetcher = NarrativePrefetcher(max_workers=1)
+    ai_service = _RecordingAIService()
+    monkeypatch.setattr(scenario_form, "get_narrative_prefetcher", lambda: prefetcher)
+    monkeypatch.setattr(scenario_form, "get_ai_service", lambda: ai_service)
+    monkeypatch.setattr(narrative_batch, "get_narrative_prefetcher", lambda: prefetcher)
+    
+    user_data = {"given_name": "Minh", "surname": "NGUYEN"}
+    st.session_state.clear()
+    st.session_state.user_data = user_data
+    
+    # Phase 1 폼이 제출하는 값 (기본 정보 + smart_form_fields)
+    scenario_form.submit_phase1_form(scenario, {
+        "name": "NGUYEN MINH", "passport": "M12345678", "nationality": "Vietnam",
+        "job_category": "IT/SW 개발", **INPUTS, "target_industry": "IT",
+    })
+    assert st.session_state.narrative_prefetch_key is not None
+    
+    bundle = prepare_narrative_bundle_sync(
+        scenario, {**user_data, **st.session_state.form_data}, drafts={}, ai_service=ai_service
+    )
+    
+    field = scenario.ai_prompts["narrative_field"]
+    assert bundle.results[field].text == "컴퓨터공학 전공 백엔드 개발자 구직 계획"
+    assert ai_service.calls.count("prefetch") == 1
+    assert prefetcher.stats()["hits"] >= 1
@@ -0,0 +1,70 @@
+"""
+패키지 재현성 테스트 (콘텐츠 해시가 프로세스/증분 재생성과 무관하게 같은지)
+"""
+
+import io
+import json
+import os
+import subprocess
+import sys
+import zipfile
+
+import pytest
+
+from services import package_zip
+from services.document_service import DocumentService
+from services.package_zip import MANIFEST_NAME, content_hash, read_manifest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 시나리오 B: 템플릿 문서 4개 + 기본 문서(사업자등록증 사본) 1개
+SCENARIO_ID = "B"
+USER = {"surname": "NGUYEN", "given_name": "Minh", "birth_date": "1998-03-02",
+        "nationality": "베트남", "passport_no": "C1234567"}
+FORM = {"employer_name": "케이스테이", "weekly_hours": "20"}
+
+_BUILD_IN_SUBPROCESS = """
+import io, json, sys
+from services.document_service import DocumentService
+from services.package_zip import read_manifest
+
+scenario_id, user, form = json.loads(sys.argv[1])
+package = DocumentService().generate_full_package(scenario_id, user, form, {})
+print(read_manifest(io.BytesIO(package))["content_hash"])
+"""
+
+
+def _fresh_digest_in_subprocess() -> str:
+    result = subprocess.run(
+        [sys.executable, "-c", _BUILD_IN_SUBPROCESS,
+         json.dumps([SCENARIO_ID, USER, FORM], ensure_ascii=False)],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    return result.stdout.strip()
+
+
+@pytest.mark.parametrize("raw", [True, False], ids=["raw-copy", "recompress"])
+def test_incremental_build_matches_fresh_build_in_other_process(monkeypatch, raw):
+    if not raw:
+        monkeypatch.setattr(package_zip, "raw_copy_supported", lambda target: False)
+    service = DocumentService()
+    
+    # 폼 값 하나만 다른 이전 패키지 → 기본 문서만 다시 렌더링, 나머지는 복사
+    previous = service.generate_full_package(SCENARIO_ID, USER, dict(FORM, weekly_hours="10"), {})
+    rebuilt = service.generate_full_package(SCENARIO_ID, USER, FORM, {}, previous=previous)
+    
+    assert len(service.last_render_report["reused"]) == 4
+    assert read_manifest(io.BytesIO(rebuilt))["content_hash"] == _fresh_digest_in_subprocess()
+
+
+def test_content_hash_covers_members_before_manifest():
+    package = DocumentService().generate_full_package(SCENARIO_ID, USER, FORM, {})
+    
+    with zipfile.ZipFile(io.BytesIO(package)) as archive:
+        names = [info.filename for info in archive.infolist()]
+        manifest_offset = archive.getinfo(MANIFEST_NAME).header_offset
+        assert names[-2:] == ["README.txt", MANIFEST_NAME]
+        assert {info.date_time for info in archive.infolist()} == {package_zip.PACKAGE_EPOCH}
+    
+    digest = content_hash(io.BytesIO(package), 0, manifest_offset)
+    assert read_manifest(io.BytesIO(package))["content_hash"] == digest
@@ -0,0 +1,65 @@
+"""
+패키지 ZIP 멤버 복사 테스트 (원본 바이트 복사 / 재압축 대체 경로)
+"""
+
+import io
+import zipfile
+
+import pytest
+
+from services import package_zip
+from services.package_zip import PreviousPackage, package_member
+
+MEMBERS = {
+    "통합신청서.txt": ("key-a", "성명: 홍길동\n" * 200),
+    "신원보증서.docx": ("key-b", "보증인 정보\n" * 50),
+    "README.txt": ("key-readme", "K-Stay Document Package\n"),
+}
+
+
+def _build_previous() -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for filename, (key, content) in MEMBERS.items():
+            archive.writestr(package_member(filename, key), content.encode("utf-8"))
+    return buffer.getvalue()
+
+
+def _copy_all(previous: bytes) -> bytes:
+    buffer = io.BytesIO()
+    with PreviousPackage(io.BytesIO(previous)) as source, \
+            zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as target:
+        # 새로 렌더링한 멤버 사이에 복사 멤버가 섞여도 오프셋이 맞아야 함
+        target.writestr(package_member("새문서.txt", "key-new"), "새 내용".encode("utf-8"))
+        for key, _ in MEMBERS.values():
+            source.copy_to(target, source.find(key))
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize("raw", [True, False], ids=["raw-copy", "recompress"])
+def test_copied_members_round_trip(monkeypatch, raw):
+    if raw and not package_zip.raw_copy_supported(zipfile.ZipFile(io.BytesIO(), "w")):
+        pytest.skip("이 Python 버전은 원본 바이트 복사를 지원하지 않음")
+    if not raw:
+        monkeypatch.setattr(package_zip, "raw_copy_supported", lambda target: False)
+    
+    previous = _build_previous()
+    rebuilt = _copy_all(previous)
+    
+    with zipfile.ZipFile(io.BytesIO(previous)) as before, \
+            zipfile.ZipFile(io.BytesIO(rebuilt)) as after:
+        assert after.testzip() is None
+        for filename, (key, content) in MEMBERS.items():
+            old, new = before.getinfo(filename), after.getinfo(filename)
+            # read()는 CRC를 검증함
+            assert after.read(filename).decode("utf-8") == content
+            assert new.CRC == old.CRC
+            assert new.comment == key.encode("ascii")
+            assert new.date_time == package_zip.PACKAGE_EPOCH
+        
+        if raw:
+            copied = PreviousPackage(io.BytesIO(rebuilt))
+            original = PreviousPackage(io.BytesIO(previous))
+            for key, _ in MEMBERS.values():
+                assert copied.read_raw(copied.find(key)) == original.read_raw(original.find(key))
+
@@ -0,0 +1,43 @@
+"""
+rag_documents 로드 테스트
+"""
+
+from services import ai_service
+from services.rag_index import load_rag_documents, save_rag_documents
+
+ROWS = [
+    {"title": "D-2 시간제 취업 변경 공지", "source": "하이코리아", "category": "visa_guide",
+     "content": "시간제 취업 허용 시간이 주당 30시간으로 변경되었습니다.", "is_active": True},
+    {"title": "폐기된 안내", "source": "하이코리아", "category": "visa_guide",
+     "content": "더 이상 유효하지 않은 안내입니다.", "is_active": False},
+]
+
+
+def test_load_falls_back_to_persisted_export(tmp_path):
+    save_rag_documents(str(tmp_path), ROWS)
+    
+    rows = load_rag_documents(str(tmp_path), fetch=lambda: None)
+    
+    assert [row["title"] for row in rows] == ["D-2 시간제 취업 변경 공지"]
+    assert load_rag_documents(str(tmp_path / "missing"), fetch=lambda: None) == []
+
+
+def test_database_rows_take_precedence(tmp_path):
+    save_rag_documents(str(tmp_path), ROWS)
+    
+    rows = load_rag_documents(str(tmp_path), fetch=lambda: ROWS[:1] + [dict(ROWS[0], title="DB")])
+    
+    assert [row["title"] for row in rows] == ["D-2 시간제 취업 변경 공지", "DB"]
+
+
+def test_rag_service_indexes_rag_documents_at_startup(tmp_path, monkeypatch):
+    save_rag_documents(str(tmp_path), ROWS)
+    monkeypatch.setattr(ai_service, "RAG_STORE_DIR", str(tmp_path))
+    monkeypatch.setattr(ai_service, "load_rag_documents",
+                        lambda store_dir: load_rag_documents(store_dir, fetch=None))
+    
+    service = ai_service._build_rag_service(ai_service._knowledge_base_version())
+    
+    titles = {chunk["title"] for chunk in service.chunks}
+    assert "D-2 시간제 취업 변경 공지" in titles
+    assert "폐기된 안내" not in titles
@@ -0,0 +1,34 @@
+"""
+응답 캐시 유사 질의 매칭 테스트
+"""
+
+from services.rag_index import HashedNgramEmbedder
+from services.response_cache import ResponseCache
+
+D2 = "D-2 유학생 비자로 주당 몇 시간까지 아르바이트를 할 수 있나요?"
+D4 = "D-4 유학생 비자로 주당 몇 시간까지 아르바이트를 할 수 있나요?"
+
+
+def _near_cache():
+    return ResponseCache(similarity_threshold=0.92, embedder=HashedNgramEmbedder())
+
+
+def test_near_duplicate_with_different_visa_code_misses():
+    cache = _near_cache()
+    cache.put(D2, "", "D-2 답변")
+    
+    assert cache.get(D4, "") is None
+    assert cache.get(D2.replace("주당", "일주일에 주당"), "") == "D-2 답변"
+
+
+def test_near_duplicate_with_different_number_misses():
+    cache = _near_cache()
+    cache.put("학기 중 주당 20시간 넘게 일해도 되나요?", "", "20시간 답변")
+    
+    assert cache.get("학기 중 주당 30시간 넘게 일해도 되나요?", "") is None
+
+
+def test_default_threshold_is_exact_match_only():
+    from config.settings import RESPONSE_CACHE_SIMILARITY
+    
+    assert RESPONSE_CACHE_SIMILARITY == 0